@@ -6,6 +6,8 @@ Interface Streamlit com RAG local
 import streamlit as st
 import os
 from groq import Groq
+from cache_respostas import CacheRespostas
+from modelo_embeddings import aquecer_em_segundo_plano, modelo_pronto
 from rag_engine import OceanRAG
 from datetime import datetime
 
@@ -59,13 +61,25 @@ st.markdown("""
 def inicializar_rag():
     """
     Inicializa o sistema RAG (cached para não recarregar a cada interação)
+    Só índice e metadados: o modelo de embeddings carrega em segundo plano
+    e é compartilhado pelo processo, então recarregar a base não o descarta
     """
+    aquecer_em_segundo_plano()
     with st.spinner("🔄 Inicializando sistema RAG..."):
         rag = OceanRAG()
         rag.setup(force_rebuild=False)
+        rag.ativar_micro_lotes()  # queries simultâneas de várias sessões em um só encode
     return rag
 
 
+@st.cache_resource
+def inicializar_cache_respostas():
+    """
+    Cache semântico de respostas (compartilhado pelas sessões, persistido em disco)
+    """
+    return CacheRespostas()
+
+
 @st.cache_resource
 def inicializar_groq():
     """
@@ -92,9 +106,10 @@ def inicializar_groq():
 # FUNÇÃO PRINCIPAL DO CHAT
 # ============================================================================
 
-def gerar_resposta(query: str, rag: OceanRAG, groq_client: Groq) -> dict:
+def gerar_resposta(query: str, rag: OceanRAG, groq_client: Groq, cache: CacheRespostas = None) -> dict:
     """
     Gera resposta usando RAG + Groq
+    Perguntas parecidas com os mesmos chunks recuperados vêm do cache semântico
     """
     # 1. Buscar contexto relevante
     resultados = rag.buscar(query, k=5)
@@ -106,6 +121,15 @@ def gerar_resposta(query: str, rag: OceanRAG, groq_client: Groq) -> dict:
             'contexto_usado': False
         }
     
+    # Resposta já gerada para uma pergunta equivalente com este índice?
+    ids_chunks = [chunk['id'] for chunk, score in resultados]
+    if cache is not None:
+        cache.sincronizar_versao(rag.versao_indice)
+        embedding = rag.embedding_query(query)
+        em_cache = cache.obter(embedding, ids_chunks)
+        if em_cache is not None:
+            return {**em_cache, 'do_cache': True}
+    
     # 2. Montar contexto
     contexto = "\n\n".join([
         f"[FONTE: {chunk['fonte']} - {chunk['url']}]\n{chunk['texto']}"
@@ -171,12 +195,15 @@ Responda a pergunta usando APENAS as informações do contexto acima. Cite as fo
                 'score': score
             })
         
-        return {
+        resultado = {
             'resposta': resposta,
             'fontes': list(fontes_unicas.values()),
             'contexto_usado': True,
             'num_chunks': len(resultados)
         }
+        if cache is not None:
+            cache.guardar(query, embedding, ids_chunks, resultado)
+        return resultado
         
     except Exception as e:
         return {
@@ -197,7 +224,9 @@ def main():
     
     # Inicializar sistemas
     rag = inicializar_rag()
+    rag.recarregar_se_alterado()  # índice atualizado pelo coletor (--reindexar)
     groq_client = inicializar_groq()
+    cache_respostas = inicializar_cache_respostas()
     
     # Sidebar com informações
     with st.sidebar:
@@ -210,6 +239,22 @@ def main():
         
         **Total de chunks**: {len(rag.chunks)}
         """)
+        if not modelo_pronto():
+            st.caption("🧠 Modelo de embeddings carregando... a primeira pergunta pode demorar um pouco")
+        
+        st.markdown("### ⚡ Cache de Buscas")
+        for nome, cache in (("Embeddings de queries", rag.cache_embeddings_queries),
+                            ("Resultados", rag.cache_resultados)):
+            estatisticas = cache.estatisticas
+            st.caption(
+                f"**{nome}**: {estatisticas['hits']} hits / {estatisticas['misses']} misses "
+                f"({cache.taxa_acerto():.0%}) · {len(cache)} em cache"
+            )
+        estatisticas = cache_respostas.estatisticas
+        st.caption(
+            f"**Respostas (semântico)**: {estatisticas['hits']} hits / {estatisticas['misses']} misses "
+            f"({cache_respostas.taxa_acerto():.0%}) · {len(cache_respostas)} em cache"
+        )
         
         st.markdown("### ⚠️ Limitações")
         st.warning("""
@@ -237,7 +282,14 @@ def main():
         
         with col1:
             if st.button("🔄 Recarregar Base"):
-                st.cache_resource.clear()
+                # Só o índice: modelo, cliente Groq e cache de respostas continuam
+                # O RAG novo entra no cache antes; sessões que ainda usam o antigo
+                # terminam seus pedidos e só então o codificador dele é fechado
+                antigo = rag
+                inicializar_rag.clear()
+                inicializar_rag()
+                if antigo.codificador is not None:
+                    antigo.codificador.fechar()
                 st.rerun()
         
         with col2:
@@ -277,9 +329,11 @@ def main():
         # Gerar resposta
         with st.chat_message("assistant"):
             with st.spinner("🤔 Consultando base de dados..."):
-                resultado = gerar_resposta(prompt, rag, groq_client)
+                resultado = gerar_resposta(prompt, rag, groq_client, cache_respostas)
             
             st.markdown(resultado['resposta'])
+            if resultado.get('do_cache'):
+                st.caption("⚡ Resposta reaproveitada de uma pergunta equivalente")
             
             # Exibir fontes
             if resultado['fontes']:
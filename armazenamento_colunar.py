@@ -0,0 +1,302 @@
+"""
+Armazenamento Colunar de Ocorrências
+Grava registros OBIS/GBIF em colunas tipadas (um arquivo binário por coluna)
+e permite ler colunas isoladas via memory-map, sem parsear o resto
+"""
+
+import json
+import os
+import shutil
+from datetime import datetime, timezone
+
+import numpy as np
+
+
+# ============================================================================
+# CONFIGURAÇÕES
+# ============================================================================
+
+DIR_COLUNAR = 'data/colunar'
+
+# Tipo de cada campo do esquema de registros do coletor
+#   float64    -> NaN para ausente
+#   int64      -> -1 para ausente
+#   data       -> int64, segundos desde 1970 (UTC); DATA_AUSENTE para ausente
+#   dicionario -> int32 com o código do valor em <coluna>.dict.json; -1 para ausente
+#   texto      -> UTF-8 de tamanho variável em <coluna>.utf8; a coluna guarda o
+#                 offset (int64) do fim de cada valor; vazio = ausente
+#                 (ids únicos por linha, que só inchariam um dicionário)
+TIPOS_COLUNAS = {
+    'nome_cientifico': 'dicionario',
+    'latitude': 'float64',
+    'longitude': 'float64',
+    'data_observacao': 'data',
+    'profundidade_m': 'float64',
+    'temperatura_c': 'float64',
+    'salinidade': 'float64',
+    'precisao_coordenadas': 'float64',
+    'base_de_registro': 'dicionario',
+    'localidade': 'dicionario',
+    'municipio': 'dicionario',
+    'estado': 'dicionario',
+    'pais': 'dicionario',
+    'dataset': 'dicionario',
+    'instituicao': 'dicionario',
+    'coletor': 'dicionario',
+    'publisher': 'dicionario',
+    'licenca': 'dicionario',
+    'gbif_id': 'int64',
+    'obis_id': 'texto',  # UUID na API; URN ou occurrenceID longo nos DwC-A
+    'fontes': 'dicionario'  # proveniência após a deduplicação ('obis', 'obis+gbif')
+}
+
+DTYPES = {
+    'float64': np.dtype('<f8'),
+    'int64': np.dtype('<i8'),
+    'data': np.dtype('<i8'),
+    'dicionario': np.dtype('<i4'),
+    'texto': np.dtype('<i8')
+}
+
+DATA_AUSENTE = np.iinfo(np.int64).min
+TAMANHO_BLOCO = 50000  # linhas acumuladas em memória antes de descarregar no disco
+
+
+# ============================================================================
+# CONVERSÕES
+# ============================================================================
+
+def data_para_epoch(valor):
+    """
+    Converte eventDate (ISO 8601 completo, AAAA-MM, AAAA ou intervalo A/B)
+    em segundos desde 1970 (UTC); usa o início do intervalo
+    """
+    if not valor:
+        return DATA_AUSENTE
+
+    texto = str(valor).split('/')[0].strip()
+    if len(texto) == 4 and texto.isdigit():
+        texto += '-01-01'
+    elif len(texto) == 7:
+        texto += '-01'
+
+    try:
+        data = datetime.fromisoformat(texto.replace('Z', '+00:00'))
+    except ValueError:
+        return DATA_AUSENTE
+
+    if data.tzinfo is None:
+        data = data.replace(tzinfo=timezone.utc)
+    return int(data.timestamp())
+
+
+def epoch_para_iso(segundos):
+    """Inverso de data_para_epoch (None para ausente)"""
+    if segundos == DATA_AUSENTE:
+        return None
+    return datetime.fromtimestamp(int(segundos), tz=timezone.utc).strftime('%Y-%m-%dT%H:%M:%S')
+
+
+# ============================================================================
+# ESCRITA
+# ============================================================================
+
+class EscritorColunar:
+    """
+    Escreve registros linha a linha em um diretório colunar
+    Só um bloco de TAMANHO_BLOCO linhas e os dicionários de strings ficam
+    em memória; o diretório final só aparece em fechar() (troca atômica)
+    """
+
+    def __init__(self, diretorio, colunas, tamanho_bloco=TAMANHO_BLOCO):
+        self.diretorio = diretorio
+        self.colunas = [c for c in dict.fromkeys(colunas) if c in TIPOS_COLUNAS]
+        self.tamanho_bloco = tamanho_bloco
+        self.linhas = 0
+
+        self._temporario = diretorio + '.tmp'
+        shutil.rmtree(self._temporario, ignore_errors=True)
+        os.makedirs(self._temporario)
+
+        self._arquivos = {c: open(os.path.join(self._temporario, self._nome_arquivo(c)), 'wb')
+                          for c in self.colunas}
+        self._blocos = {c: [] for c in self.colunas}
+        self._dicionarios = {c: {} for c in self.colunas if TIPOS_COLUNAS[c] == 'dicionario'}
+        self._textos = {c: open(os.path.join(self._temporario, self._nome_textos(c)), 'wb')
+                        for c in self.colunas if TIPOS_COLUNAS[c] == 'texto'}
+        self._fim_textos = {c: 0 for c in self._textos}
+
+    @staticmethod
+    def _nome_arquivo(coluna):
+        return f"{coluna}.bin"
+
+    @staticmethod
+    def _nome_textos(coluna):
+        return f"{coluna}.utf8"
+
+    def _codificar(self, coluna, valor):
+        tipo = TIPOS_COLUNAS[coluna]
+
+        if tipo == 'float64':
+            return np.nan if valor is None else float(valor)
+        if tipo == 'int64':
+            return -1 if valor is None else int(valor)
+        if tipo == 'data':
+            return data_para_epoch(valor)
+        if tipo == 'texto':
+            return b'' if valor is None else str(valor).encode('utf-8')
+
+        if valor is None or valor == '':
+            return -1
+        dicionario = self._dicionarios[coluna]
+        valor = str(valor)
+        if valor not in dicionario:
+            dicionario[valor] = len(dicionario)
+        return dicionario[valor]
+
+    def adicionar(self, registro):
+        for coluna in self.colunas:
+            self._blocos[coluna].append(self._codificar(coluna, registro.get(coluna)))
+        self.linhas += 1
+
+        if len(self._blocos[self.colunas[0]]) >= self.tamanho_bloco:
+            self._descarregar()
+
+    def _descarregar(self):
+        for coluna in self.colunas:
+            bloco = self._blocos[coluna]
+            if not bloco:
+                continue
+            if coluna in self._textos:
+                self._textos[coluna].write(b''.join(bloco))
+                fins = self._fim_textos[coluna] + np.cumsum([len(valor) for valor in bloco], dtype=np.int64)
+                self._fim_textos[coluna] = int(fins[-1])
+                bloco = fins
+            np.asarray(bloco, dtype=DTYPES[TIPOS_COLUNAS[coluna]]).tofile(self._arquivos[coluna])
+            self._blocos[coluna].clear()
+
+    def fechar(self, metadados=None):
+        """Descarrega o último bloco, grava esquema e dicionários e publica o diretório"""
+        self._descarregar()
+        for arquivo in list(self._arquivos.values()) + list(self._textos.values()):
+            arquivo.close()
+
+        esquema = {
+            'linhas': self.linhas,
+            'colunas': {
+                c: {
+                    'tipo': TIPOS_COLUNAS[c],
+                    'dtype': DTYPES[TIPOS_COLUNAS[c]].str,
+                    'arquivo': self._nome_arquivo(c)
+                }
+                for c in self.colunas
+            },
+            'gerado_em': datetime.now().isoformat(),
+            'metadados': metadados or {}
+        }
+
+        for coluna, dicionario in self._dicionarios.items():
+            valores = sorted(dicionario, key=dicionario.get)
+            with open(os.path.join(self._temporario, f"{coluna}.dict.json"), 'w', encoding='utf-8') as f:
+                json.dump(valores, f, ensure_ascii=False)
+            esquema['colunas'][coluna]['dicionario'] = f"{coluna}.dict.json"
+        for coluna in self._textos:
+            esquema['colunas'][coluna]['textos'] = self._nome_textos(coluna)
+
+        with open(os.path.join(self._temporario, 'esquema.json'), 'w', encoding='utf-8') as f:
+            json.dump(esquema, f, ensure_ascii=False, indent=2)
+
+        antigo = self.diretorio + '.old'
+        shutil.rmtree(antigo, ignore_errors=True)
+        if os.path.exists(self.diretorio):
+            os.replace(self.diretorio, antigo)
+        os.replace(self._temporario, self.diretorio)
+        shutil.rmtree(antigo, ignore_errors=True)
+
+        return esquema
+
+
+# ============================================================================
+# LEITURA
+# ============================================================================
+
+class LeitorColunar:
+    """
+    Lê um diretório colunar; cada coluna é aberta por memory-map sob demanda
+    (só as páginas realmente acessadas são lidas do disco)
+    """
+
+    def __init__(self, diretorio):
+        self.diretorio = diretorio
+        with open(os.path.join(diretorio, 'esquema.json'), 'r', encoding='utf-8') as f:
+            self.esquema = json.load(f)
+        self.linhas = self.esquema['linhas']
+        self._dicionarios = {}
+
+    @staticmethod
+    def existe(diretorio):
+        return os.path.exists(os.path.join(diretorio, 'esquema.json'))
+
+    @property
+    def colunas(self):
+        return list(self.esquema['colunas'])
+
+    def coluna(self, nome):
+        """Array da coluna (memmap somente leitura); dicionários vêm como códigos"""
+        info = self.esquema['colunas'][nome]
+        if self.linhas == 0:
+            return np.empty(0, dtype=np.dtype(info['dtype']))
+        return np.memmap(os.path.join(self.diretorio, info['arquivo']),
+                         dtype=np.dtype(info['dtype']), mode='r', shape=(self.linhas,))
+
+    def textos(self, nome):
+        """Bytes UTF-8 de uma coluna texto (memmap), fatiados pelos offsets da coluna"""
+        caminho = os.path.join(self.diretorio, self.esquema['colunas'][nome]['textos'])
+        if os.path.getsize(caminho) == 0:
+            return np.empty(0, dtype=np.uint8)
+        return np.memmap(caminho, dtype=np.uint8, mode='r')
+
+    def dicionario(self, nome):
+        """Lista de strings de uma coluna dicionário (índice = código)"""
+        if nome not in self._dicionarios:
+            caminho = os.path.join(self.diretorio, self.esquema['colunas'][nome]['dicionario'])
+            with open(caminho, 'r', encoding='utf-8') as f:
+                self._dicionarios[nome] = json.load(f)
+        return self._dicionarios[nome]
+
+    def codigo(self, nome, valor):
+        """Código de um valor em uma coluna dicionário (-1 se não existir)"""
+        try:
+            return self.dicionario(nome).index(valor)
+        except ValueError:
+            return -1
+
+    def valor(self, nome, indice):
+        """Valor decodificado de uma célula (None para ausente)"""
+        tipo = self.esquema['colunas'][nome]['tipo']
+        bruto = self.coluna(nome)[indice]
+
+        if tipo == 'dicionario':
+            return None if bruto < 0 else self.dicionario(nome)[bruto]
+        if tipo == 'data':
+            return epoch_para_iso(bruto)
+        if tipo == 'float64':
+            return None if np.isnan(bruto) else float(bruto)
+        if tipo == 'int64':
+            return None if bruto < 0 else int(bruto)
+        if tipo == 'texto':
+            inicio = int(self.coluna(nome)[indice - 1]) if indice > 0 else 0
+            return bytes(self.textos(nome)[inicio:int(bruto)]).decode('utf-8') or None
+        return bruto.decode('ascii') or None  # 'uuid' de armazéns antigos (S36)
+
+    def registro(self, indice, colunas=None):
+        """Reconstrói o registro (dict) de uma linha"""
+        return {c: self.valor(c, indice) for c in (colunas or self.colunas)}
+
+    def indices(self, nome, valor, limite=None):
+        """Linhas em que a coluna dicionário tem o valor dado"""
+        codigo = self.codigo(nome, valor)
+        if codigo < 0:
+            return np.empty(0, dtype=np.int64)
+        encontrados = np.flatnonzero(self.coluna(nome) == codigo)
+        return encontrados[:limite] if limite is not None else encontrados
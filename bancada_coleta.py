@@ -0,0 +1,229 @@
+"""
+Bancada de Benchmark do Coletor (offline)
+Serve respostas gravadas com `coletar_dados_amazonia_azul.py --gravar DIR`
+e mede coletar_obis, coletar_gbif e coletar_world_bank_climate contra elas:
+tempo de ponta a ponta, requisições e pico de memória por configuração
+
+Uso:
+    python coletar_dados_amazonia_azul.py --gravar gravacoes/base   # uma vez, com rede
+    python bancada_coleta.py servir gravacoes/base --latencia-ms 80
+    python bancada_coleta.py benchmark gravacoes/base --workers 1 4 8 \\
+        --taxa-429 0.02 --saida bench.json --comparar bench_base.json
+"""
+
+import argparse
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from replay_http import ServidorReplay
+
+
+# ============================================================================
+# CONFIGURAÇÕES
+# ============================================================================
+
+FONTES_BENCHMARK = ('obis', 'gbif', 'worldbank')
+WORKERS_PADRAO = [1, 4, 8]
+TOLERANCIA_PADRAO = 0.20  # regressão: rodada mais lenta que a base além disso
+TAXA_LIVRE = (1000.0, 1000)  # --sem-limitador: token bucket fora do caminho
+
+
+# ============================================================================
+# RODADA (EXECUTADA EM UM PROCESSO FILHO)
+# ============================================================================
+
+def rodada(replay, fontes, workers, especies=None, sem_limitador=False, processos_normalizacao=0):
+    """
+    Roda os coletores contra o servidor de replay no diretório atual
+    (o processo filho começa em um diretório temporário) e devolve as métricas
+    """
+    import coletar_dados_amazonia_azul as coletor
+
+    coletor.USAR_CACHE_HTTP = False
+    coletor.sessoes.replay = replay
+    coletor.pipeline_paginas.processos = processos_normalizacao
+    if sem_limitador:
+        coletor.limitador.taxas = {host: TAXA_LIVRE for host in coletor.limitador.taxas}
+        coletor.limitador.padrao = TAXA_LIVRE
+
+    especies = especies or coletor.ESPECIES_PADRAO
+    coletores = {
+        'obis': lambda: coletor.coletar_obis(especies, workers),
+        'gbif': lambda: coletor.coletar_gbif(especies, workers),
+        'worldbank': coletor.coletar_world_bank_climate
+    }
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(fontes)) as executor:
+        resultados = dict(zip(fontes, executor.map(lambda fonte: coletores[fonte](), fontes)))
+    segundos = time.perf_counter() - inicio
+    coletor.pipeline_paginas.fechar()
+
+    registros = sum(entrada.get('registros_coletados', 0)
+                    for fonte in ('obis', 'gbif') if fonte in resultados
+                    for entrada in resultados[fonte]['especies'])
+    return {
+        'workers': workers,
+        'segundos': round(segundos, 3),
+        'registros': registros,
+        'registros_por_s': round(registros / segundos, 1) if segundos > 0 else None,
+        'requisicoes': coletor.sessoes.estatisticas()['requisicoes'],
+        'pico_memoria_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        'limitador': dict(coletor.limitador.estatisticas)
+    }
+
+
+def _rodada_em_processo(servidor, fontes, workers, args):
+    """Uma rodada em processo novo (memória medida isoladamente) e em diretório temporário"""
+    diretorio = tempfile.mkdtemp(prefix='bancada_')
+    comando = [
+        sys.executable, os.path.abspath(__file__), '_rodada', servidor.url,
+        '--fontes', *fontes, '--workers', str(workers),
+        '--processos-normalizacao', str(args.processos_normalizacao)
+    ]
+    if args.especies:
+        comando += ['--especies', os.path.abspath(args.especies)]
+    if args.sem_limitador:
+        comando.append('--sem-limitador')
+
+    try:
+        servidor.zerar_contadores()
+        processo = subprocess.run(comando, cwd=diretorio, capture_output=True, text=True)
+        if processo.returncode != 0:
+            raise RuntimeError(f"rodada com {workers} workers falhou:\n{processo.stderr[-2000:]}")
+        resultado = json.loads(processo.stdout.strip().splitlines()[-1])
+        resultado['servidor'] = dict(servidor.contadores)
+        return resultado
+    finally:
+        shutil.rmtree(diretorio, ignore_errors=True)
+
+
+# ============================================================================
+# COMANDOS
+# ============================================================================
+
+def _criar_servidor(args):
+    return ServidorReplay(
+        args.gravacao, porta=args.porta, latencia_ms=args.latencia_ms, jitter_ms=args.jitter_ms,
+        taxa_erro=args.taxa_erro, taxa_429=args.taxa_429, retry_after=args.retry_after,
+        semente=args.semente
+    )
+
+
+def comando_servir(args):
+    servidor = _criar_servidor(args).iniciar()
+    print(f"🎞️  Replay de {len(servidor.respostas):,} respostas em {servidor.url}")
+    print(f"   python coletar_dados_amazonia_azul.py --replay {servidor.url} --sem-cache")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print(f"\n📊 {servidor.contadores}")
+    finally:
+        servidor.parar()
+
+
+def comparar_com_base(resultados, caminho_base, tolerancia):
+    """Lista de regressões: rodadas mais lentas que a base (mesmos workers) além da tolerância"""
+    with open(caminho_base, 'r', encoding='utf-8') as f:
+        base = {r['workers']: r for r in json.load(f)['rodadas']}
+
+    regressoes = []
+    for resultado in resultados:
+        referencia = base.get(resultado['workers'])
+        if referencia and resultado['segundos'] > referencia['segundos'] * (1 + tolerancia):
+            regressoes.append(
+                f"{resultado['workers']} workers: {resultado['segundos']:.2f}s "
+                f"(base {referencia['segundos']:.2f}s, tolerância {tolerancia:.0%})"
+            )
+    return regressoes
+
+
+def comando_benchmark(args):
+    servidor = _criar_servidor(args).iniciar()
+    print(f"🎞️  Replay de {len(servidor.respostas):,} respostas em {servidor.url} "
+          f"(latência {args.latencia_ms:.0f}ms, 429 {args.taxa_429:.0%}, erro {args.taxa_erro:.0%})")
+
+    resultados = []
+    try:
+        for workers in args.workers:
+            resultado = _rodada_em_processo(servidor, args.fontes, workers, args)
+            resultados.append(resultado)
+            print(f"   • {workers:>3} workers: {resultado['segundos']:7.1f}s | "
+                  f"{resultado['requisicoes']:,} requisições | {resultado['registros']:,} registros | "
+                  f"pico {resultado['pico_memoria_mb']:.0f} MB | "
+                  f"{resultado['servidor']['http_429']} x 429, {resultado['servidor']['http_503']} x 503")
+    finally:
+        servidor.parar()
+
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            json.dump({'fontes': args.fontes, 'configuracao': vars(args) | {'comando': None},
+                       'rodadas': resultados}, f, ensure_ascii=False, indent=2, default=str)
+        print(f"   📝 Resultados: {args.saida}")
+
+    if args.comparar:
+        regressoes = comparar_com_base(resultados, args.comparar, args.tolerancia)
+        for regressao in regressoes:
+            print(f"   ❌ Regressão: {regressao}")
+        if regressoes:
+            sys.exit(1)
+        print("   ✅ Sem regressões em relação à base")
+
+
+def comando_rodada(args):
+    especies = None
+    if args.especies:
+        from coletar_dados_amazonia_azul import carregar_lista_especies
+        especies = carregar_lista_especies(args.especies)
+    resultado = rodada(args.replay, args.fontes, args.workers, especies,
+                       args.sem_limitador, args.processos_normalizacao)
+    print(json.dumps(resultado))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay e benchmark offline do coletor")
+    subcomandos = parser.add_subparsers(dest='comando', required=True)
+
+    def opcoes_servidor(sub):
+        sub.add_argument('gravacao', help='Diretório gravado com --gravar')
+        sub.add_argument('--porta', type=int, default=0)
+        sub.add_argument('--latencia-ms', type=float, default=0.0)
+        sub.add_argument('--jitter-ms', type=float, default=0.0)
+        sub.add_argument('--taxa-erro', type=float, default=0.0, help='Fração de respostas 503')
+        sub.add_argument('--taxa-429', type=float, default=0.0, help='Fração de respostas 429')
+        sub.add_argument('--retry-after', type=int, default=1, help='Segundos no Retry-After dos 429')
+        sub.add_argument('--semente', type=int, default=42)
+
+    def opcoes_rodada(sub):
+        sub.add_argument('--fontes', nargs='+', choices=FONTES_BENCHMARK, default=list(FONTES_BENCHMARK))
+        sub.add_argument('--especies', metavar='ARQUIVO', help='Lista de espécies usada na gravação')
+        sub.add_argument('--sem-limitador', action='store_true',
+                         help='Desliga o limitador de taxa (mede só o coletor)')
+        sub.add_argument('--processos-normalizacao', type=int, default=0)
+
+    servir = subcomandos.add_parser('servir', help='Sobe o servidor de replay')
+    opcoes_servidor(servir)
+
+    benchmark = subcomandos.add_parser('benchmark', help='Mede o coletor para cada nº de workers')
+    opcoes_servidor(benchmark)
+    opcoes_rodada(benchmark)
+    benchmark.add_argument('--workers', type=int, nargs='+', default=WORKERS_PADRAO)
+    benchmark.add_argument('--saida', help='Grava os resultados em JSON')
+    benchmark.add_argument('--comparar', metavar='JSON', help='Resultados de base; sai com código 1 se regredir')
+    benchmark.add_argument('--tolerancia', type=float, default=TOLERANCIA_PADRAO)
+
+    interna = subcomandos.add_parser('_rodada')  # usado pelo benchmark em cada processo filho
+    interna.add_argument('replay')
+    interna.add_argument('--workers', type=int, required=True)
+    opcoes_rodada(interna)
+
+    args = parser.parse_args()
+    {'servir': comando_servir, 'benchmark': comando_benchmark, '_rodada': comando_rodada}[args.comando](args)
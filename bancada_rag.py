@@ -0,0 +1,144 @@
+"""
+Bancada de Benchmark das Buscas do RAG
+lote:        vazão (queries/s) de OceanRAG.buscar em loop x OceanRAG.buscar_lote
+concorrente: várias threads (sessões) chamando buscar, com e sem micro-lotes
+
+Uso:
+    python bancada_rag.py lote --queries 256 --tamanhos 1 8 32 128
+    python bancada_rag.py lote --arquivo perguntas.txt
+    python bancada_rag.py concorrente --threads 16 --espera-ms 2 5 10
+"""
+
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from lote_embeddings import LOTE_MAXIMO
+from rag_engine import OceanRAG
+
+
+# ============================================================================
+# CONFIGURAÇÕES
+# ============================================================================
+
+# Perguntas de exemplo exibidas no app
+PERGUNTAS_EXEMPLO = [
+    "Quais espécies de tartarugas foram registradas?",
+    "Existem dados sobre Chelonia mydas?",
+    "Mostre registros de tartaruga marinha",
+    "Quais são os objetivos da Década dos Oceanos?",
+    "Quais dados oceanográficos estão disponíveis?",
+    "Quais indicadores climáticos afetam o Oceano Atlântico?",
+    "Qual a temperatura do oceano na costa brasileira?",
+    "Quantas unidades de conservação marinha existem?"
+]
+
+
+def gerar_queries(n, arquivo=None):
+    """n queries distintas (do arquivo, uma por linha, ou variações das perguntas de exemplo)"""
+    if arquivo:
+        with open(arquivo, 'r', encoding='utf-8') as f:
+            base = [linha.strip() for linha in f if linha.strip()]
+    else:
+        base = PERGUNTAS_EXEMPLO
+    return [base[i % len(base)] + ('' if i < len(base) else f" ({i // len(base)})") for i in range(n)]
+
+
+# ============================================================================
+# BENCHMARK
+# ============================================================================
+
+def medir_vazao(rag, queries, k, tamanho_lote):
+    """Queries/s processando `queries` em lotes de `tamanho_lote` (1 = buscar em loop)"""
+    rag.invalidar_caches()  # mede o modelo e o índice, não o cache de buscas
+    inicio = time.perf_counter()
+    if tamanho_lote == 1:
+        for query in queries:
+            rag.buscar(query, k)
+    else:
+        for i in range(0, len(queries), tamanho_lote):
+            rag.buscar_lote(queries[i:i + tamanho_lote], k)
+    segundos = time.perf_counter() - inicio
+    return len(queries) / segundos, segundos
+
+
+def comando_lote(args):
+    rag = OceanRAG()
+    rag.setup(force_rebuild=False)
+    queries = gerar_queries(args.queries, args.arquivo)
+
+    # Aquecimento: carrega o modelo e as páginas do índice
+    rag.buscar_lote(queries[:8], args.k)
+
+    print(f"\n🔍 {len(queries)} queries, k={args.k}, {rag.index.ntotal} vetores")
+    referencia = None
+    for tamanho in args.tamanhos:
+        vazao, segundos = medir_vazao(rag, queries, args.k, tamanho)
+        referencia = referencia or vazao
+        rotulo = 'buscar (loop)' if tamanho == 1 else f"buscar_lote({tamanho})"
+        print(f"   • {rotulo:<18} {vazao:8.1f} queries/s | {segundos:6.2f}s | {vazao / referencia:4.1f}x")
+
+
+def medir_concorrente(rag, queries, k, threads):
+    """Vazão e latências (ms) com `threads` sessões disputando o mesmo OceanRAG"""
+    def uma(query):
+        inicio = time.perf_counter()
+        rag.buscar(query, k)
+        return (time.perf_counter() - inicio) * 1000
+
+    rag.invalidar_caches()
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        latencias = list(executor.map(uma, queries))
+    segundos = time.perf_counter() - inicio
+    return len(queries) / segundos, np.percentile(latencias, 50), np.percentile(latencias, 99)
+
+
+def comando_concorrente(args):
+    rag = OceanRAG()
+    rag.setup(force_rebuild=False)
+    queries = gerar_queries(args.queries, args.arquivo)
+    rag.buscar_lote(queries[:8], args.k)
+
+    print(f"\n🔍 {len(queries)} queries, {args.threads} threads, k={args.k}, {rag.index.ntotal} vetores")
+    configuracoes = [None] + args.espera_ms
+    for espera in configuracoes:
+        if espera is None:
+            rotulo = 'sem micro-lotes'
+        else:
+            rag.codificador = None
+            rag.ativar_micro_lotes(args.lote_maximo, espera)
+            rotulo = f"lote≤{args.lote_maximo}, {espera:g}ms"
+
+        vazao, p50, p99 = medir_concorrente(rag, queries, args.k, args.threads)
+        detalhe = ''
+        if rag.codificador is not None:
+            estatisticas = rag.codificador.estatisticas
+            detalhe = f" | {estatisticas['textos'] / max(1, estatisticas['lotes']):.1f} queries/lote"
+            rag.codificador.fechar()
+        print(f"   • {rotulo:<20} {vazao:8.1f} queries/s | p50 {p50:7.1f}ms | p99 {p99:7.1f}ms{detalhe}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark das buscas do RAG")
+    subcomandos = parser.add_subparsers(dest='comando', required=True)
+
+    lote = subcomandos.add_parser('lote', help='buscar em loop x buscar_lote')
+    lote.add_argument('--queries', type=int, default=256)
+    lote.add_argument('--arquivo', help='Queries, uma por linha')
+    lote.add_argument('-k', type=int, default=5)
+    lote.add_argument('--tamanhos', type=int, nargs='+', default=[1, 8, 32, 128],
+                      help='Tamanhos de lote (1 = buscar em loop, a referência)')
+
+    concorrente = subcomandos.add_parser('concorrente', help='Threads concorrentes com e sem micro-lotes')
+    concorrente.add_argument('--queries', type=int, default=512)
+    concorrente.add_argument('--arquivo', help='Queries, uma por linha')
+    concorrente.add_argument('-k', type=int, default=5)
+    concorrente.add_argument('--threads', type=int, default=16)
+    concorrente.add_argument('--lote-maximo', type=int, default=LOTE_MAXIMO)
+    concorrente.add_argument('--espera-ms', type=float, nargs='+', default=[2.0, 5.0, 10.0])
+
+    args = parser.parse_args()
+    {'lote': comando_lote, 'concorrente': comando_concorrente}[args.comando](args)
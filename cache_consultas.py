@@ -0,0 +1,74 @@
+"""
+Cache LRU das Buscas do RAG
+Embeddings de queries e resultados (query + k) em memória, limitados por
+tamanho e TTL; o OceanRAG limpa os dois sempre que o índice muda
+"""
+
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+
+# ============================================================================
+# CONFIGURAÇÕES
+# ============================================================================
+
+TAMANHO_CACHE_QUERIES = 1024  # entradas por cache
+TTL_CACHE_QUERIES = 3600      # segundos
+
+
+def normalizar_query(query):
+    """Chave da query: Unicode NFC, sem diferença de maiúsculas nem de espaços"""
+    return ' '.join(unicodedata.normalize('NFC', query).casefold().split())
+
+
+class CacheLRU:
+    """
+    Dicionário limitado (seguro entre threads): acima de tamanho_maximo sai
+    a entrada usada há mais tempo; entradas mais velhas que ttl expiram
+    """
+
+    def __init__(self, tamanho_maximo=TAMANHO_CACHE_QUERIES, ttl=TTL_CACHE_QUERIES):
+        self.tamanho_maximo = tamanho_maximo
+        self.ttl = ttl
+        self.estatisticas = {'hits': 0, 'misses': 0, 'despejados': 0, 'invalidacoes': 0}
+        self._entradas = OrderedDict()  # chave -> (valor, guardado_em)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entradas)
+
+    def obter(self, chave):
+        """Valor em cache ou None (conta hit/miss)"""
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada is not None and time.monotonic() - entrada[1] > self.ttl:
+                del self._entradas[chave]
+                entrada = None
+
+            if entrada is None:
+                self.estatisticas['misses'] += 1
+                return None
+
+            self._entradas.move_to_end(chave)
+            self.estatisticas['hits'] += 1
+            return entrada[0]
+
+    def guardar(self, chave, valor):
+        with self._lock:
+            self._entradas[chave] = (valor, time.monotonic())
+            self._entradas.move_to_end(chave)
+            while len(self._entradas) > self.tamanho_maximo:
+                self._entradas.popitem(last=False)
+                self.estatisticas['despejados'] += 1
+
+    def limpar(self):
+        """Descarta tudo (índice reconstruído ou recarregado); contadores são mantidos"""
+        with self._lock:
+            self._entradas.clear()
+            self.estatisticas['invalidacoes'] += 1
+
+    def taxa_acerto(self):
+        consultas = self.estatisticas['hits'] + self.estatisticas['misses']
+        return self.estatisticas['hits'] / consultas if consultas else 0.0
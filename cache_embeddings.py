@@ -0,0 +1,190 @@
+"""
+Cache Persistente de Embeddings
+Embeddings chaveados por hash(modelo + texto do chunk), para que reconstruir
+o índice só passe pelo modelo os chunks novos ou alterados
+"""
+
+import hashlib
+import json
+import os
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: só o lock entre threads do mesmo processo
+    fcntl = None
+
+
+# ============================================================================
+# CONFIGURAÇÕES
+# ============================================================================
+
+DIR_CACHE_EMBEDDINGS = '.cache/embeddings'
+TAMANHO_CHAVE = 16  # bytes do blake2b
+
+
+def chave_embedding(texto, modelo):
+    """Hash de 16 bytes do nome do modelo + texto (outro modelo => outra chave)"""
+    return hashlib.blake2b(f"{modelo}\0{texto}".encode('utf-8'), digest_size=TAMANHO_CHAVE).digest()
+
+
+# ============================================================================
+# CACHE
+# ============================================================================
+
+class CacheEmbeddings:
+    """
+    Um diretório por modelo em DIR_CACHE_EMBEDDINGS, só com anexação:
+      vetores.f32 -> linhas float32 de `dimensao` (lidas por memory-map)
+      chaves.bin  -> uma chave de 16 bytes por linha, na mesma ordem;
+                     a posição da chave é o offset da linha em vetores.f32
+    Os vetores são gravados antes das chaves: uma gravação interrompida deixa
+    no máximo linhas sem chave, descartadas ao abrir
+    Anexações passam por uma trava de arquivo (.trava, fcntl): a coleta com
+    --reindexar e o app podem gravar no mesmo cache ao mesmo tempo; antes de
+    anexar, cada processo lê as linhas que os outros gravaram
+    """
+
+    def __init__(self, modelo, diretorio=DIR_CACHE_EMBEDDINGS):
+        self.modelo = modelo
+        self.diretorio = os.path.join(diretorio, modelo.replace('/', '__'))
+        self.estatisticas = {'reaproveitados': 0, 'calculados': 0}
+        self._lock = threading.Lock()
+        self._vetores = None  # memmap, recriado após cada anexação
+        self._total = 0  # linhas em vetores.f32 conhecidas por este processo
+
+        os.makedirs(self.diretorio, exist_ok=True)
+        self._caminho_vetores = os.path.join(self.diretorio, 'vetores.f32')
+        self._caminho_chaves = os.path.join(self.diretorio, 'chaves.bin')
+        self._caminho_meta = os.path.join(self.diretorio, 'meta.json')
+        self._caminho_trava = os.path.join(self.diretorio, '.trava')
+
+        self.dimensao = None
+        self.linhas = {}
+        with self._trava_arquivo():
+            self._carregar_chaves()
+
+    @contextmanager
+    def _trava_arquivo(self):
+        """Exclusão entre processos durante leitura de sobras e anexação"""
+        with open(self._caminho_trava, 'a') as trava:
+            if fcntl is not None:
+                fcntl.flock(trava.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(trava.fileno(), fcntl.LOCK_UN)
+
+    def _carregar_chaves(self):
+        """
+        Lê de chaves.bin as linhas ainda não conhecidas para o índice chave -> linha,
+        descartando sobras de gravações interrompidas (chamar com a trava do arquivo)
+        Arquivo de vetores ausente conta como 0 linhas
+        """
+        if self.dimensao is None and os.path.exists(self._caminho_meta):
+            with open(self._caminho_meta, 'r', encoding='utf-8') as f:
+                self.dimensao = json.load(f)['dimensao']
+        if self.dimensao is None:
+            return
+
+        tamanho_chaves = os.path.getsize(self._caminho_chaves) if os.path.exists(self._caminho_chaves) else 0
+        tamanho_vetores = os.path.getsize(self._caminho_vetores) if os.path.exists(self._caminho_vetores) else 0
+        bytes_linha = self.dimensao * 4
+        total = min(tamanho_chaves // TAMANHO_CHAVE, tamanho_vetores // bytes_linha)
+
+        if tamanho_chaves != total * TAMANHO_CHAVE:
+            with open(self._caminho_chaves, 'r+b') as f:
+                f.truncate(total * TAMANHO_CHAVE)
+        if tamanho_vetores != total * bytes_linha:
+            with open(self._caminho_vetores, 'r+b') as f:
+                f.truncate(total * bytes_linha)
+
+        if total > self._total:
+            with open(self._caminho_chaves, 'rb') as f:
+                f.seek(self._total * TAMANHO_CHAVE)
+                bruto = f.read((total - self._total) * TAMANHO_CHAVE)
+            for i in range(total - self._total):
+                self.linhas[bruto[i * TAMANHO_CHAVE:(i + 1) * TAMANHO_CHAVE]] = self._total + i
+            self._total = total
+            self._vetores = None
+
+    def __len__(self):
+        return len(self.linhas)
+
+    def _memmap(self):
+        if self._vetores is None and self._total:
+            self._vetores = np.memmap(self._caminho_vetores, dtype='<f4', mode='r',
+                                      shape=(self._total, self.dimensao))
+        return self._vetores
+
+    def vetores(self):
+        """Todos os vetores do cache (memmap somente leitura, na ordem de inserção)"""
+        with self._lock:
+            memmap = self._memmap()
+        return memmap if memmap is not None else np.empty((0, self.dimensao or 0), dtype=np.float32)
+
+    def obter(self, textos):
+        """Vetores já em cache, na ordem de textos, sem chamar o modelo (None se faltar algum)"""
+        chaves = [chave_embedding(texto, self.modelo) for texto in textos]
+        with self._lock:
+            linhas = [self.linhas.get(chave) for chave in chaves]
+            if not linhas or None in linhas:
+                return None
+            return np.array(self._memmap()[linhas])
+
+    def _anexar(self, chaves, vetores):
+        """
+        Acrescenta linhas novas (chamar com o lock); as que outro processo
+        gravou enquanto estas eram calculadas não são repetidas
+        """
+        with self._trava_arquivo():
+            self._carregar_chaves()
+            if self.dimensao is None:
+                self.dimensao = int(vetores.shape[1])
+                with open(self._caminho_meta, 'w', encoding='utf-8') as f:
+                    json.dump({'modelo': self.modelo, 'dimensao': self.dimensao}, f)
+
+            novas = [i for i, chave in enumerate(chaves) if chave not in self.linhas]
+            if not novas:
+                return
+            with open(self._caminho_vetores, 'ab') as f:
+                np.ascontiguousarray(vetores[novas], dtype='<f4').tofile(f)
+                f.flush()
+                os.fsync(f.fileno())
+            with open(self._caminho_chaves, 'ab') as f:
+                f.write(b''.join(chaves[i] for i in novas))
+
+            for i in novas:
+                self.linhas[chaves[i]] = self._total
+                self._total += 1
+            self._vetores = None
+
+    def embeddings(self, textos, codificar):
+        """
+        Matriz (len(textos), dimensao) float32 na ordem de textos
+        codificar(lista de textos) -> array só é chamado para os textos sem cache
+        (cada texto distinto uma única vez)
+        """
+        chaves = [chave_embedding(texto, self.modelo) for texto in textos]
+
+        with self._lock:
+            faltantes = {}
+            for chave, texto in zip(chaves, textos):
+                if chave not in self.linhas and chave not in faltantes:
+                    faltantes[chave] = texto
+
+            if faltantes:
+                novos = np.asarray(codificar(list(faltantes.values())), dtype=np.float32)
+                self._anexar(list(faltantes), novos)
+
+            self.estatisticas['calculados'] += len(faltantes)
+            self.estatisticas['reaproveitados'] += len(textos) - len(faltantes)
+
+            if not textos:
+                return np.empty((0, self.dimensao or 0), dtype=np.float32)
+            linhas = np.fromiter((self.linhas[chave] for chave in chaves), dtype=np.int64, count=len(chaves))
+            return np.array(self._memmap()[linhas])
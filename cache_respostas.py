@@ -0,0 +1,161 @@
+"""
+Cache Semântico de Respostas do Chat
+Perguntas parecidas (embedding acima de um limiar de similaridade) que
+recuperam exatamente os mesmos chunks reaproveitam a resposta já gerada,
+sem nova chamada ao LLM; persistido em disco e descartado quando o índice muda
+"""
+
+import atexit
+import os
+import pickle
+import threading
+import time
+
+import numpy as np
+
+
+# ============================================================================
+# CONFIGURAÇÕES
+# ============================================================================
+
+ARQUIVO_CACHE_RESPOSTAS = '.cache/respostas_chat.pkl'
+LIMIAR_SIMILARIDADE = 0.92  # cosseno mínimo entre as perguntas
+TAMANHO_CACHE_RESPOSTAS = 500
+INTERVALO_GRAVACAO_S = 30   # respostas novas vão ao disco no máximo a cada 30s...
+MAX_NAO_GRAVADAS = 20       # ...ou a cada 20 respostas, e sempre ao encerrar o processo
+
+
+class CacheRespostas:
+    """
+    Respostas agrupadas pelo conjunto de chunks recuperados; dentro do grupo,
+    vale a pergunta mais parecida com similaridade >= limiar
+    Acima de tamanho_maximo sai a resposta usada há mais tempo (LRU)
+    Gravação em disco agrupada (intervalo_gravacao / max_nao_gravadas) e
+    completada por salvar(), registrado no atexit
+    """
+
+    def __init__(self, caminho=ARQUIVO_CACHE_RESPOSTAS, limiar=LIMIAR_SIMILARIDADE,
+                 tamanho_maximo=TAMANHO_CACHE_RESPOSTAS, intervalo_gravacao=INTERVALO_GRAVACAO_S,
+                 max_nao_gravadas=MAX_NAO_GRAVADAS):
+        self.caminho = caminho
+        self.limiar = limiar
+        self.tamanho_maximo = tamanho_maximo
+        self.intervalo_gravacao = intervalo_gravacao
+        self.max_nao_gravadas = max_nao_gravadas
+        self.estatisticas = {'hits': 0, 'misses': 0, 'despejados': 0, 'gravacoes': 0}
+        self.versao = None
+        self._grupos = {}  # tupla de ids de chunks -> lista de entradas
+        self._nao_gravadas = 0
+        self._ultima_gravacao = time.monotonic()
+        self._lock = threading.Lock()
+        self._carregar()
+        atexit.register(self.salvar)
+
+    def __len__(self):
+        return sum(len(entradas) for entradas in self._grupos.values())
+
+    def _carregar(self):
+        if not os.path.exists(self.caminho):
+            return
+        try:
+            with open(self.caminho, 'rb') as f:
+                dados = pickle.load(f)
+            self.versao = dados['versao']
+            self._grupos = dados['grupos']
+        except Exception as e:
+            print(f"⚠️  Cache de respostas ignorado: {str(e)}")
+
+    def _salvar(self):
+        """Grava o cache (atômico; chamar com o lock)"""
+        if os.path.dirname(self.caminho):
+            os.makedirs(os.path.dirname(self.caminho), exist_ok=True)
+        with open(self.caminho + '.tmp', 'wb') as f:
+            pickle.dump({'versao': self.versao, 'grupos': self._grupos}, f)
+        os.replace(self.caminho + '.tmp', self.caminho)
+        self._nao_gravadas = 0
+        self._ultima_gravacao = time.monotonic()
+        self.estatisticas['gravacoes'] += 1
+
+    def salvar(self):
+        """Grava as respostas ainda não persistidas (chamado também ao encerrar o processo)"""
+        with self._lock:
+            if self._nao_gravadas:
+                self._salvar()
+
+    @staticmethod
+    def _normalizar(embedding):
+        vetor = np.asarray(embedding, dtype=np.float32).ravel()
+        norma = np.linalg.norm(vetor)
+        return vetor / norma if norma > 0 else vetor
+
+    def sincronizar_versao(self, versao):
+        """Descarta todas as respostas se o índice mudou desde que foram geradas"""
+        with self._lock:
+            if versao == self.versao:
+                return
+            self._grupos = {}
+            self.versao = versao
+            self._salvar()
+
+    def obter(self, embedding, ids_chunks):
+        """Resposta (dict) de uma pergunta parecida com os mesmos chunks, ou None"""
+        chave = tuple(sorted(ids_chunks))
+        vetor = self._normalizar(embedding)
+
+        with self._lock:
+            entradas = self._grupos.get(chave, [])
+            melhor = None
+            if entradas:
+                similaridades = np.stack([entrada['embedding'] for entrada in entradas]) @ vetor
+                indice = int(np.argmax(similaridades))
+                if similaridades[indice] >= self.limiar:
+                    melhor = entradas[indice]
+
+            if melhor is None:
+                self.estatisticas['misses'] += 1
+                return None
+
+            melhor['ultimo_uso'] = time.time()
+            self.estatisticas['hits'] += 1
+            return melhor['resposta']
+
+    def guardar(self, query, embedding, ids_chunks, resposta):
+        with self._lock:
+            self._grupos.setdefault(tuple(sorted(ids_chunks)), []).append({
+                'query': query,
+                'embedding': self._normalizar(embedding),
+                'resposta': resposta,
+                'criado_em': time.time(),
+                'ultimo_uso': time.time()
+            })
+            self._despejar()
+            self._nao_gravadas += 1
+            if (self._nao_gravadas >= self.max_nao_gravadas
+                    or time.monotonic() - self._ultima_gravacao >= self.intervalo_gravacao):
+                self._salvar()
+
+    def _despejar(self):
+        """Remove as respostas usadas há mais tempo até caber em tamanho_maximo (chamar com o lock)"""
+        excesso = len(self) - self.tamanho_maximo
+        if excesso <= 0:
+            return
+
+        antigas = sorted(
+            ((entrada['ultimo_uso'], chave, id(entrada))
+             for chave, entradas in self._grupos.items() for entrada in entradas)
+        )[:excesso]
+        remover = {}
+        for _, chave, identificador in antigas:
+            remover.setdefault(chave, set()).add(identificador)
+
+        for chave, identificadores in remover.items():
+            restantes = [e for e in self._grupos[chave] if id(e) not in identificadores]
+            if restantes:
+                self._grupos[chave] = restantes
+            else:
+                del self._grupos[chave]
+        self.estatisticas['despejados'] += excesso
+
+    def taxa_acerto(self):
+        consultas = self.estatisticas['hits'] + self.estatisticas['misses']
+        return self.estatisticas['hits'] / consultas if consultas else 0.0
@@ -4,11 +4,25 @@ Apenas consome APIs oficiais brasileiras
 ZERO dados hardcoded
 """
 
+import argparse
 import requests
 import json
 import os
+import shutil
 from datetime import datetime
 import time
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from urllib.parse import urlparse
+
+from armazenamento_colunar import DIR_COLUNAR, EscritorColunar
+from deduplicacao import IndiceDuplicatas
+from grade_copernicus import DIR_COPERNICUS_ENTRADA, DIR_GRADES, arquivos_locais, ingerir_arquivo
+from ingestao_dwca import CAIXA_ZEE_BRASIL, descrever_archive, linhas_dwca, na_caixa, nome_especie, para_registro_api
+from pipeline_coleta import PROCESSOS_NORMALIZACAO, PipelinePaginas, RelatorioExecucao
+from replay_http import GravadorRespostas
+from transporte_http import CacheHTTP, LimitadorTaxa, PoolSessoes, atraso_backoff, ler_retry_after
 
 # ============================================================================
 # CONFIGURAÇÕES
@@ -20,30 +34,184 @@ HEADERS = {
 }
 
 TIMEOUT = 30
-RETRY_DELAY = 3  # segundos entre tentativas
+TENTATIVAS = 5  # com backoff exponencial + jitter (ver transporte_http.py)
+
+# Lista de espécies marinhas brasileiras usada sem --especies
+ESPECIES_PADRAO = [
+    'Chelonia mydas',
+    'Caretta caretta',
+    'Eretmochelys imbricata',
+    'Trichechus manatus',
+    'Sotalia guianensis',
+    'Tursiops truncatus',
+    'Epinephelus itajara',
+    'Manta birostris',
+    'Rhincodon typus',
+    'Carcharodon carcharias'
+]
+
+# Coleta concorrente: workers por fonte e limite de conexões simultâneas por host
+# Com --processos N, limites e taxas por host são divididos entre os N processos
+MAX_WORKERS = 8
+LIMITE_POR_HOST = {
+    'api.obis.org': 3,
+    'api.gbif.org': 4
+}
+LIMITE_PADRAO_HOST = 2
+
+# Paginação completa: registros vão para um JSONL por espécie, página a página
+DIR_REGISTROS = 'data/registros'
+TAMANHO_PAGINA_OBIS = 5000  # máximo aceito pela API: 10.000
+TAMANHO_PAGINA_GBIF = 300   # máximo aceito pela API
+LIMITE_OFFSET_GBIF = 100000  # a busca do GBIF não pagina além disso (usar download/DwC-A)
+
+# Ocorrências vão para um armazém colunar (data/colunar/<fonte>/, ver armazenamento_colunar.py)
+# EXPORTAR_JSON também embute todos os registros no JSON resumo (formato antigo)
+EXPORTAR_JSON = False
+
+# Coleta incremental: marca d'água por fonte e espécie (um JSON por espécie)
+DIR_ESTADO_COLETA = os.path.join(DIR_REGISTROS, 'estado')
+# O OBIS só é comparado pelo total: edições/remoções que não mudam o total
+# passam despercebidas, então após estes dias a espécie é recoletada inteira
+DIAS_RECOLETA_COMPLETA_OBIS = 30
+
+# Checkpoints por espécie/página; RETOMAR (--resume) continua de onde parou
+DIR_CHECKPOINTS = os.path.join(DIR_REGISTROS, 'checkpoints')
+RETOMAR = False
+
+# Agregados calculados pelos servidores (guardados junto ao resumo de cada espécie)
+URL_API_OBIS = 'https://api.obis.org/v3'
+PRECISAO_GRADE_OBIS = 3  # geohash de 3 caracteres (~156 x 156 km)
+FACETAS_GBIF = {  # parâmetro facet -> nome da tabela
+    'year': 'por_ano',
+    'stateProvince': 'por_estado',
+    'basisOfRecord': 'por_base_de_registro'
+}
+LIMITE_FACETAS_GBIF = 200
+
+# World Bank: indicadores por chamada (a API aceita até 60) e registros por página
+INDICADORES_POR_LOTE_WORLD_BANK = 60
+TAMANHO_PAGINA_WORLD_BANK = 1000
+
+# Ingestão de Darwin Core Archives: registros acumulados por espécie antes de
+# acrescentar ao JSONL, e teto de registros em buffer somando todas as espécies
+TAMANHO_LOTE_DWCA = 1000
+MAX_BUFFER_DWCA = 100000
+
+# Cache HTTP persistente (TTL por host e limite de tamanho em transporte_http.py)
+USAR_CACHE_HTTP = True
 
 # ============================================================================
 # UTILITÁRIOS
 # ============================================================================
 
-def fazer_requisicao(url, params=None, tentativas=3):
-    """Faz requisição HTTP com retry"""
+_semaforos_host = {}
+_semaforos_lock = threading.Lock()
+_print_lock = threading.Lock()
+_cache_http = None
+_gravador = None  # GravadorRespostas quando rodando com --gravar
+_cache_lock = threading.Lock()
+
+# Taxa por host compartilhada por todas as threads (token bucket)
+limitador = LimitadorTaxa()
+
+# Sessões keep-alive por host (pool do tamanho do limite de conexões do host)
+sessoes = PoolSessoes(HEADERS, LIMITE_POR_HOST, LIMITE_PADRAO_HOST)
+relatorio = RelatorioExecucao()
+pipeline_paginas = PipelinePaginas(relatorio)
+
+
+def log(mensagem):
+    """print() seguro entre threads (evita linhas embaralhadas na coleta paralela)"""
+    with _print_lock:
+        print(mensagem)
+
+
+def _semaforo_host(url):
+    """Retorna o semáforo que limita as conexões simultâneas ao host da URL"""
+    host = urlparse(url).netloc
+    with _semaforos_lock:
+        if host not in _semaforos_host:
+            limite = LIMITE_POR_HOST.get(host, LIMITE_PADRAO_HOST)
+            _semaforos_host[host] = threading.BoundedSemaphore(limite)
+        return _semaforos_host[host]
+
+
+def obter_cache_http():
+    """Cache HTTP compartilhado do processo (None se desativado)"""
+    global _cache_http
+    if not USAR_CACHE_HTTP:
+        return None
+    with _cache_lock:
+        if _cache_http is None:
+            _cache_http = CacheHTTP()
+        return _cache_http
+
+
+def fazer_requisicao(url, params=None, tentativas=TENTATIVAS, revalidar=False):
+    """
+    Faz requisição HTTP com retry (respeitando o limite de conexões por host)
+    Respostas ficam em cache no disco: dentro do TTL são servidas sem rede,
+    depois são revalidadas com ETag/Last-Modified (304 reaproveita o corpo)
+    revalidar=True ignora o TTL e sempre consulta o servidor (sondagens de
+    "o que mudou?" não podem ver uma resposta antiga)
+    A taxa por host é controlada pelo limitador; 429/503 pausam o host pelo
+    Retry-After (ou backoff exponencial com jitter) antes de tentar de novo
+    """
+    cache = obter_cache_http()
+    chave = CacheHTTP.chave(url, params)
+    entrada = cache.obter(chave) if cache else None
+    
+    if entrada and not revalidar and cache.fresca(entrada):
+        cache.registrar('hits')
+        return json.loads(entrada['corpo'])
+    
+    headers = CacheHTTP.cabecalhos_condicionais(entrada) if entrada else None
+    
     for tentativa in range(tentativas):
+        if tentativa > 0:
+            limitador.registrar('retentativas')
         try:
-            response = requests.get(url, params=params, headers=HEADERS, timeout=TIMEOUT)
-            if response.status_code == 200:
-                return response.json()
-            elif response.status_code == 503:
-                print(f"      ⏳ API indisponível, tentativa {tentativa + 1}/{tentativas}...")
-                time.sleep(RETRY_DELAY)
+            limitador.aguardar(url)
+            with _semaforo_host(url):
+                response = sessoes.get(url, params=params, headers=headers, timeout=TIMEOUT)
+            if response.status_code == 304 and entrada:
+                limitador.sucesso(url)
+                cache.registrar('revalidados')
+                cache.renovar(chave)
+                return json.loads(entrada['corpo'])
+            elif response.status_code == 200:
+                limitador.sucesso(url)
+                data = response.json()
+                if _gravador:
+                    _gravador.gravar(response, sessoes.origem(response.request.url))
+                if cache:
+                    cache.registrar('misses')
+                    cache.guardar(
+                        chave, url, response.content,
+                        etag=response.headers.get('ETag'),
+                        last_modified=response.headers.get('Last-Modified')
+                    )
+                return data
+            elif response.status_code in (429, 503):
+                pausa = limitador.throttle(
+                    url, response.status_code,
+                    ler_retry_after(response.headers.get('Retry-After')),
+                    tentativa
+                )
+                log(f"      ⏳ HTTP {response.status_code}, aguardando {pausa:.1f}s "
+                    f"(tentativa {tentativa + 1}/{tentativas})...")
+            elif response.status_code in (500, 502, 504):
+                log(f"      ⏳ HTTP {response.status_code}, tentativa {tentativa + 1}/{tentativas}...")
+                time.sleep(atraso_backoff(tentativa))
             else:
-                print(f"      ❌ HTTP {response.status_code}")
+                log(f"      ❌ HTTP {response.status_code}")
                 return None
-        except requests.exceptions.Timeout:
-            print(f"      ⏳ Timeout, tentativa {tentativa + 1}/{tentativas}...")
-            time.sleep(RETRY_DELAY)
+        except (requests.exceptions.Timeout, requests.exceptions.ConnectionError):
+            log(f"      ⏳ Timeout/conexão, tentativa {tentativa + 1}/{tentativas}...")
+            time.sleep(atraso_backoff(tentativa))
         except Exception as e:
-            print(f"      ❌ Erro: {str(e)}")
+            log(f"      ❌ Erro: {str(e)}")
             return None
     
     return None
@@ -88,14 +256,617 @@ def limpar_jsons_obsoletos(arquivos_esperados):
         print("   ✅ Nenhum arquivo obsoleto encontrado")
 
 
+def cronometrar(funcao, *args, **kwargs):
+    """
+    Executa a função medindo o tempo de parede
+    Retorna (resultado, segundos)
+    """
+    inicio = time.perf_counter()
+    resultado = funcao(*args, **kwargs)
+    return resultado, time.perf_counter() - inicio
+
+
+def imprimir_relatorio_tempos(tempos, tempo_total):
+    """
+    Mostra o tempo de parede de cada fonte e a sobreposição entre elas
+    (soma dos tempos por fonte / tempo de parede); não é um speedup medido:
+    para isso, comparar com uma execução --sequencial
+    """
+    print("\n⏱️  Tempo por fonte:")
+    for fonte, segundos in tempos.items():
+        print(f"   • {fonte}: {segundos:.1f}s")
+    
+    soma = sum(tempos.values())
+    print(f"   • Total (parede): {tempo_total:.1f}s")
+    if tempo_total > 0:
+        print(f"   • Soma das fontes: {soma:.1f}s (sobreposição {soma / tempo_total:.1f}x)")
+
+
+def imprimir_relatorio_estagios(estagios):
+    """Vazão de cada estágio do pipeline (registros/s e MB/s na janela ativa)"""
+    print("\n🏭 Estágios:")
+    for nome, metricas in estagios.items():
+        registros_s = metricas['registros_por_s'] or 0
+        mb_s = (metricas['bytes_por_s'] or 0) / 1e6
+        print(f"   • {nome}: {metricas['registros']:,} registros | {metricas['bytes'] / 1e6:.1f} MB | "
+              f"{registros_s:,.0f} reg/s | {mb_s:.2f} MB/s | {metricas['segundos_ocupado']:.1f}s ocupado")
+
+
+def tamanho_diretorio(diretorio):
+    """Bytes de todos os arquivos abaixo de um diretório"""
+    return sum(os.path.getsize(os.path.join(raiz, nome))
+               for raiz, _, nomes in os.walk(diretorio) for nome in nomes)
+
+
+def atualizar_indice_rag():
+    """
+    Atualiza o índice FAISS do chatbot com os dados recém-coletados: só os
+    chunks novos, alterados ou removidos mudam (o app recarrega sozinho)
+    Retorna o número de chunks indexados (0 se o rag_engine não puder ser usado)
+    """
+    try:
+        from rag_engine import OceanRAG
+    except ImportError as e:
+        print(f"   ⚠️  Índice não atualizado: {str(e)}")
+        return 0
+    
+    rag = OceanRAG()
+    rag.atualizar_indice()
+    return len(rag.chunks)
+
+
+# ============================================================================
+# REGISTROS EM DISCO E COLETA INCREMENTAL
+# ============================================================================
+
+# Sinaliza aos workers que a coleta foi interrompida (Ctrl+C)
+interrupcao = threading.Event()
+
+
+class ColetaInterrompida(Exception):
+    """Coleta interrompida entre páginas; o checkpoint permite retomar"""
+
+
+class FalhaPaginacao(Exception):
+    """Uma página não veio mesmo após as retentativas; o checkpoint permite retomar"""
+
+
+def salvar_json_atomico(dados, caminho):
+    """Grava o JSON em arquivo temporário e troca de uma vez (nunca fica pela metade)"""
+    temporario = caminho + '.tmp'
+    with open(temporario, 'w', encoding='utf-8') as f:
+        json.dump(dados, f, ensure_ascii=False, indent=2)
+    os.replace(temporario, caminho)
+
+
+def caminho_registros(fonte, especie):
+    """Caminho do JSONL com todos os registros de uma espécie em uma fonte"""
+    slug = especie.lower().replace(' ', '_')
+    return os.path.join(DIR_REGISTROS, fonte, f"{slug}.jsonl")
+
+
+def escrever_pagina(arquivo, registros):
+    """
+    Acrescenta uma página de registros ao JSONL (um registro por linha)
+    Retorna o número de registros escritos
+    """
+    for registro in registros:
+        arquivo.write(json.dumps(registro, ensure_ascii=False) + '\n')
+    arquivo.flush()
+    return len(registros)
+
+
+def ler_registros(caminho):
+    """Lê um JSONL registro a registro, sem carregar o arquivo inteiro"""
+    with open(caminho, 'r', encoding='utf-8') as f:
+        for linha in f:
+            if linha.strip():
+                yield json.loads(linha)
+
+
+def caminho_estado(fonte, especie):
+    slug = especie.lower().replace(' ', '_')
+    return os.path.join(DIR_ESTADO_COLETA, fonte, f"{slug}.json")
+
+
+def estado_especie(fonte, especie):
+    """
+    Marca d'água da última coleta completa da espécie na fonte (ou None),
+    com os agregados daquela coleta quando houver
+    Sem estado salvo, aproveita o data_coleta do JSON resumo se aquela coleta
+    foi completa e o JSONL ainda existe
+    """
+    caminho_estado_especie = caminho_estado(fonte, especie)
+    if os.path.exists(caminho_estado_especie):
+        with open(caminho_estado_especie, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    
+    caminho = caminho_registros(fonte, especie)
+    resumo = os.path.join('data', f"{fonte}_ocorrencias.json")
+    if not (os.path.exists(caminho) and os.path.exists(resumo)):
+        return None
+    
+    with open(resumo, 'r', encoding='utf-8') as f:
+        especies = json.load(f).get('especies', [])
+    
+    for entrada in especies:
+        if entrada.get('nome_cientifico') == especie and entrada.get('coleta_completa'):
+            return {
+                'marca_dagua': entrada['data_coleta'],
+                'total': entrada.get(f"total_registros_{fonte}", 0),
+                'registros': entrada.get('registros_coletados', 0),
+                'agregados': entrada.get('agregados')
+            }
+    return None
+
+
+def atualizar_estado_especie(fonte, especie, marca_dagua, total, registros, agregados=None):
+    """
+    Registra a marca d'água de uma coleta completa (gravação atômica)
+    Um arquivo por espécie: shards em processos diferentes não se sobrescrevem
+    agregados: reaproveitados enquanto a espécie não mudar na fonte
+    """
+    caminho = caminho_estado(fonte, especie)
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    salvar_json_atomico({
+        'marca_dagua': marca_dagua,
+        'total': total,
+        'registros': registros,
+        'agregados': agregados
+    }, caminho)
+
+
+def caminho_checkpoint(fonte, especie):
+    slug = especie.lower().replace(' ', '_')
+    return os.path.join(DIR_CHECKPOINTS, fonte, f"{slug}.json")
+
+
+def ler_checkpoint(fonte, especie):
+    """Checkpoint da espécie (só no modo RETOMAR; None se não houver)"""
+    caminho = caminho_checkpoint(fonte, especie)
+    if not RETOMAR or not os.path.exists(caminho):
+        return None
+    with open(caminho, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def salvar_checkpoint(fonte, especie, dados):
+    caminho = caminho_checkpoint(fonte, especie)
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    salvar_json_atomico(dados, caminho)
+
+
+def concluir_checkpoint(fonte, especie, entrada):
+    """Marca a espécie como concluída, guardando a entrada do JSON resumo"""
+    salvar_checkpoint(fonte, especie, {'concluida': True, 'entrada': entrada})
+
+
+def limpar_checkpoints():
+    shutil.rmtree(DIR_CHECKPOINTS, ignore_errors=True)
+
+
+def mesclar_registros(caminho, caminho_novos, campo_id, ids_novos):
+    """
+    Mescla os registros novos no JSONL existente, sem duplicar:
+    registros antigos com o mesmo id são substituídos pela versão nova
+    Retorna (registros no arquivo final, registros que já existiam)
+    """
+    temporario = caminho + '.tmp'
+    total = 0
+    substituidos = 0
+    
+    with open(temporario, 'w', encoding='utf-8') as saida:
+        if os.path.exists(caminho):
+            with open(caminho, 'r', encoding='utf-8') as antigo:
+                for linha in antigo:
+                    if not linha.strip():
+                        continue
+                    if json.loads(linha).get(campo_id) in ids_novos:
+                        substituidos += 1
+                        continue
+                    saida.write(linha)
+                    total += 1
+        
+        with open(caminho_novos, 'r', encoding='utf-8') as novos:
+            for linha in novos:
+                saida.write(linha)
+                total += 1
+    
+    os.replace(temporario, caminho)
+    os.remove(caminho_novos)
+    return total, substituidos
+
+
+def coletar_especie_paginada(fonte, especie, paginas, normalizar, campo_id=None,
+                             registros_anteriores=0, inicio=None):
+    """
+    Percorre todas as páginas de uma espécie gravando os registros em disco
+    Memória constante: só a página atual fica em RAM
+    paginas(cursor) gera (resultados, total, próximo cursor); após cada página
+    o cursor e o tamanho do JSONL vão para um checkpoint atômico, e no modo
+    RETOMAR a coleta continua dali (descartando uma página gravada pela metade)
+    Uma página que falha (FalhaPaginacao) encerra a espécie como incompleta,
+    com o checkpoint da última página gravada
+    Com campo_id, as páginas são um delta que é mesclado (sem duplicatas)
+    ao JSONL existente, que já tinha registros_anteriores; sem campo_id,
+    o JSONL é regravado do zero
+    Retorna dict com total da API, lidos, gravados, registros no arquivo,
+    novos, completa, caminho e início da coleta
+    """
+    caminho = caminho_registros(fonte, especie)
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    destino = caminho + '.novos' if campo_id else caminho
+    modo = 'delta' if campo_id else 'completo'
+    
+    total = 0
+    lidos = 0
+    gravados = 0
+    cursor = None
+    ids_novos = set()
+    
+    checkpoint = ler_checkpoint(fonte, especie)
+    if checkpoint and checkpoint.get('modo') == modo and os.path.exists(destino):
+        with open(destino, 'r+b') as f:
+            f.truncate(checkpoint['bytes'])
+        total, lidos, gravados = checkpoint['total'], checkpoint['lidos'], checkpoint['gravados']
+        cursor = checkpoint['cursor']
+        inicio = checkpoint['inicio']
+        if campo_id:
+            ids_novos = {r.get(campo_id) for r in ler_registros(destino)}
+        log(f"   ↩️  {especie}: retomando {fonte.upper()} após {lidos:,}/{total:,} registros")
+        arquivo = open(destino, 'a', encoding='utf-8')
+    else:
+        arquivo = open(destino, 'w', encoding='utf-8')
+    
+    escrita = relatorio.estagio('registros_jsonl')
+    tamanho = os.path.getsize(destino)
+    
+    # Busca e normalização (pool de processos) correm à frente desta gravação
+    falhou = False
+    with arquivo:
+        try:
+            for registros, lidos_pagina, total, cursor in pipeline_paginas.processar(paginas(cursor), normalizar):
+                if interrupcao.is_set():
+                    raise ColetaInterrompida(especie)
+                
+                inicio_escrita = time.perf_counter()
+                lidos += lidos_pagina
+                gravados += escrever_pagina(arquivo, registros)
+                if campo_id:
+                    ids_novos.update(r.get(campo_id) for r in registros)
+                
+                tamanho_anterior, tamanho = tamanho, os.path.getsize(destino)
+                salvar_checkpoint(fonte, especie, {
+                    'modo': modo,
+                    'inicio': inicio,
+                    'cursor': cursor,
+                    'total': total,
+                    'lidos': lidos,
+                    'gravados': gravados,
+                    'bytes': tamanho
+                })
+                escrita.registrar(len(registros), tamanho - tamanho_anterior, time.perf_counter() - inicio_escrita)
+        except FalhaPaginacao:
+            falhou = True
+    
+    registros_arquivo = gravados
+    novos = gravados
+    completa = not falhou and lidos >= total
+    if campo_id and not completa:
+        registros_arquivo = registros_anteriores  # o delta fica em .novos até completar
+    elif campo_id and not ids_novos:
+        os.remove(destino)
+        registros_arquivo = registros_anteriores
+    elif campo_id:
+        registros_arquivo, substituidos = mesclar_registros(caminho, destino, campo_id, ids_novos)
+        novos = gravados - substituidos
+    elif total == 0:
+        os.remove(caminho)
+    
+    return {
+        'total': total,
+        'lidos': lidos,
+        'gravados': gravados,
+        'registros': registros_arquivo,
+        'novos': novos,
+        'completa': completa,
+        'caminho': caminho,
+        'inicio': inicio
+    }
+
+
+def montar_especie(fonte, especie, total, resultado, base_url, agregados=None):
+    """
+    Entrada da espécie no JSON resumo (os registros ficam no JSONL/armazém colunar)
+    agregados: tabelas pequenas calculadas pelo servidor (por ano, estado, grade...)
+    """
+    entrada = {
+        'nome_cientifico': especie,
+        f"total_registros_{fonte}": total,
+        'registros_coletados': resultado['registros'],
+        'coleta_completa': resultado['completa'],
+        'arquivo_registros': resultado['caminho'],
+        'fonte_api': base_url,
+        'data_coleta': datetime.now().isoformat()
+    }
+    if agregados:
+        entrada['agregados'] = agregados
+    return entrada
+
+
+def _publicar_armazem(fonte, escritor, metadados):
+    """Fecha o escritor colunar da fonte e informa linhas e tamanho em disco"""
+    if escritor is None:
+        return None
+    
+    esquema = escritor.fechar(metadados=metadados)
+    diretorio = escritor.diretorio
+    tamanho = sum(os.path.getsize(os.path.join(diretorio, f)) for f in os.listdir(diretorio))
+    log(f"   🗃️  {fonte.upper()}: {esquema['linhas']:,} linhas no armazém colunar "
+        f"({tamanho / 1024:.0f} KB em {diretorio}/)")
+    return esquema
+
+
+def construir_armazens_colunares(dados_obis, dados_gbif):
+    """
+    Deduplica OBIS x GBIF e grava os dois armazéns colunares
+    (lat/lon float64, datas int64 epoch, strings com dicionário)
+    Por espécie, em tempo linear: indexa o OBIS, descarta do GBIF o que já
+    está no OBIS e grava o OBIS com a proveniência (fontes, gbif_id)
+    Streaming: só o índice da espécie atual e um bloco de linhas em memória
+    """
+    obis = {e['nome_cientifico']: e for e in dados_obis['especies']}
+    gbif = {e['nome_cientifico']: e for e in dados_gbif['especies']}
+    escritores = {'obis': None, 'gbif': None}
+    
+    def gravar(fonte, registro, extras=()):
+        if escritores[fonte] is None:
+            colunas = ['nome_cientifico'] + list(registro) + list(extras)
+            escritores[fonte] = EscritorColunar(os.path.join(DIR_COLUNAR, fonte), colunas)
+        escritores[fonte].adicionar(registro)
+    
+    def registros(entrada):
+        caminho = entrada.get('arquivo_registros') if entrada else None
+        if caminho and os.path.exists(caminho):
+            yield from ler_registros(caminho)
+    
+    duplicatas = 0
+    for especie in list(dict.fromkeys(list(obis) + list(gbif))):
+        indice = IndiceDuplicatas()
+        for registro in registros(obis.get(especie)):
+            indice.indexar(registro, especie)
+        
+        for registro in registros(gbif.get(especie)):
+            if not indice.casar(registro, especie):
+                registro['nome_cientifico'] = especie
+                gravar('gbif', registro)
+        
+        for registro in registros(obis.get(especie)):
+            gbif_id = indice.proveniencia(registro, especie)
+            registro['nome_cientifico'] = especie
+            registro['fontes'] = 'obis+gbif' if gbif_id is not None else 'obis'
+            registro['gbif_id'] = gbif_id
+            gravar('obis', registro, extras=('fontes', 'gbif_id'))
+        
+        if especie in obis:
+            obis[especie]['registros_tambem_no_gbif'] = indice.duplicatas
+        if especie in gbif:
+            gbif[especie]['registros_duplicados_obis'] = indice.duplicatas
+        duplicatas += indice.duplicatas
+    
+    _publicar_armazem('obis', escritores['obis'], dados_obis['metadados'])
+    _publicar_armazem('gbif', escritores['gbif'], dados_gbif['metadados'])
+    log(f"   🔗 Deduplicação: {duplicatas:,} ocorrências do GBIF já estavam no OBIS "
+        f"(mantidas uma vez, com as duas fontes)")
+    return duplicatas
+
+
+def exportar_json_completo(dados, caminho):
+    """
+    Exporta o JSON no formato antigo (todos os registros embutidos em cada
+    espécie, indent=2), gravando registro a registro a partir dos JSONL
+    """
+    def bloco(obj, nivel):
+        texto = json.dumps(obj, ensure_ascii=False, indent=2)
+        return texto.replace('\n', '\n' + '  ' * nivel)
+    
+    with open(caminho, 'w', encoding='utf-8') as f:
+        f.write('{\n  "metadados": ' + bloco(dados['metadados'], 1) + ',\n  "especies": [')
+        
+        for i, entrada in enumerate(dados['especies']):
+            cabecalho = {k: v for k, v in entrada.items() if k != 'arquivo_registros'}
+            texto = bloco(cabecalho, 2)
+            f.write((',' if i else '') + '\n    ' + texto[:-1].rstrip() + ',\n      "registros": [')
+            
+            caminho_jsonl = entrada.get('arquivo_registros')
+            if caminho_jsonl and os.path.exists(caminho_jsonl):
+                for j, registro in enumerate(ler_registros(caminho_jsonl)):
+                    f.write((',' if j else '') + '\n        ' + bloco(registro, 4))
+            
+            f.write('\n      ]\n    }')
+        
+        f.write('\n  ]\n}\n')
+
+
 # ============================================================================
 # 1. OBIS - OCEAN BIODIVERSITY INFORMATION SYSTEM
 # ============================================================================
 
-def coletar_obis(especies):
+def normalizar_registro_obis(record):
+    """Converte uma ocorrência da API do OBIS para o esquema do coletor"""
+    # 0.0 é coordenada válida (equador, meridiano de Greenwich): só None descarta
+    if record.get('decimalLatitude') is None or record.get('decimalLongitude') is None:
+        return None
+    
+    return {
+        'latitude': record.get('decimalLatitude'),
+        'longitude': record.get('decimalLongitude'),
+        'data_observacao': record.get('eventDate'),
+        'profundidade_m': record.get('depth'),
+        'temperatura_c': record.get('temperature'),
+        'salinidade': record.get('salinity'),
+        'localidade': record.get('locality'),
+        'dataset': record.get('datasetName'),
+        'instituicao': record.get('institutionCode'),
+        'pais': record.get('country'),
+        'obis_id': record.get('id')
+    }
+
+
+def paginas_obis(especie, base_url, geometria, cursor=None, tamanho=TAMANHO_PAGINA_OBIS,
+                 revalidar=False):
+    """
+    Percorre as ocorrências de uma espécie no OBIS pelo cursor `after`
+    (id da última ocorrência da página anterior) até atingir o `total`
+    Gera (resultados, total, cursor) por página; o cursor retoma a paginação
+    revalidar=True não serve páginas do cache sem consultar o servidor
+    """
+    after = cursor['after'] if cursor else None
+    lidos = cursor['lidos'] if cursor else 0
+    
+    while True:
+        params = {
+            'scientificname': especie,
+            'geometry': geometria,
+            'size': tamanho
+        }
+        if after:
+            params['after'] = after
+        
+        data = fazer_requisicao(base_url, params, revalidar=revalidar)
+        if not data:
+            raise FalhaPaginacao(especie)
+        
+        resultados = data.get('results', [])
+        total = data.get('total', 0)
+        if not resultados:
+            return
+        
+        lidos += len(resultados)
+        after = resultados[-1].get('id')
+        yield resultados, total, {'after': after, 'lidos': lidos}
+        
+        if lidos >= total or len(resultados) < tamanho or not after:
+            return
+
+
+def contar_obis(especie, base_url, geometria):
+    """
+    Total de ocorrências da espécie no OBIS (uma requisição de 1 registro)
+    Sempre consultado no servidor: um total em cache esconderia registros novos
+    """
+    data = fazer_requisicao(base_url, {
+        'scientificname': especie,
+        'geometry': geometria,
+        'size': 1
+    }, revalidar=True)
+    return data.get('total', 0) if data else None
+
+
+def agregados_obis(especie, geometria):
+    """
+    Tabelas agregadas pelo OBIS (poucos KB, sem baixar registros):
+    resumo (registros, datasets), registros por ano e grade geohash
+    """
+    filtros = {'scientificname': especie, 'geometry': geometria}
+    agregados = {}
+    
+    resumo = fazer_requisicao(f"{URL_API_OBIS}/statistics", filtros)
+    if resumo:
+        agregados['resumo'] = {chave: resumo[chave] for chave in ('records', 'datasets', 'taxa') if chave in resumo}
+    
+    anos = fazer_requisicao(f"{URL_API_OBIS}/statistics/years", filtros)
+    if anos:
+        agregados['por_ano'] = {
+            str(item['year']): item.get('records', item.get('count', 0))
+            for item in sorted(anos, key=lambda item: item.get('year') or 0)
+            if item.get('year') is not None
+        }
+    
+    grade = fazer_requisicao(f"{URL_API_OBIS}/occurrence/grid/{PRECISAO_GRADE_OBIS}", filtros)
+    if grade and grade.get('features'):
+        celulas = []
+        for feature in grade['features']:
+            anel = feature.get('geometry', {}).get('coordinates', [[]])[0][:-1]
+            if not anel:
+                continue
+            celulas.append({
+                'lat': round(sum(ponto[1] for ponto in anel) / len(anel), 2),
+                'lon': round(sum(ponto[0] for ponto in anel) / len(anel), 2),
+                'registros': feature.get('properties', {}).get('n', 0)
+            })
+        agregados['grade'] = sorted(celulas, key=lambda celula: -celula['registros'])
+    
+    return agregados
+
+
+def _coletar_especie_obis(especie, base_url, geometria, incremental=False):
+    """
+    Coleta todas as ocorrências de uma espécie no OBIS
+    Incremental: a API do OBIS não filtra por data de modificação, então a
+    espécie só é recoletada quando o total mudou desde a marca d'água ou
+    quando a marca d'água tem mais de DIAS_RECOLETA_COMPLETA_OBIS dias
+    (edições e remoções que mantêm o total só aparecem nessa recoleta);
+    a sondagem e as páginas recoletadas não vêm do cache HTTP
+    Retorna o dicionário da espécie ou None se não houver dados
+    """
+    checkpoint = ler_checkpoint('obis', especie)
+    if checkpoint and checkpoint.get('concluida'):
+        log(f"   ⏭️  {especie}: já coletada (checkpoint)")
+        return checkpoint['entrada']
+    
+    inicio = datetime.now().isoformat()
+    estado = estado_especie('obis', especie) if incremental else None
+    caminho = caminho_registros('obis', especie)
+    
+    dias = (datetime.now() - datetime.fromisoformat(estado['marca_dagua'])).days if estado else 0
+    if estado and dias >= DIAS_RECOLETA_COMPLETA_OBIS:
+        log(f"   🔄 {especie}: última coleta completa há {dias} dias, recoletando tudo")
+    elif estado and os.path.exists(caminho):
+        total = contar_obis(especie, base_url, geometria)
+        if total is not None and total == estado['total']:
+            log(f"   ⏭️  {especie}: sem novidades desde {estado['marca_dagua'][:10]}")
+            agregados = estado.get('agregados')
+            if agregados is None:  # estado de uma versão sem agregados: busca uma vez e guarda
+                agregados = agregados_obis(especie, geometria)
+                atualizar_estado_especie('obis', especie, estado['marca_dagua'], estado['total'],
+                                         estado['registros'], agregados)
+            resultado = {'registros': estado['registros'], 'completa': True, 'caminho': caminho}
+            entrada = montar_especie('obis', especie, total, resultado, base_url, agregados)
+            concluir_checkpoint('obis', especie, entrada)
+            return entrada
+    
+    resultado = coletar_especie_paginada(
+        'obis', especie,
+        lambda cursor: paginas_obis(especie, base_url, geometria, cursor, revalidar=incremental),
+        normalizar_registro_obis,
+        inicio=inicio
+    )
+    total = resultado['total']
+    
+    if total == 0 and resultado['completa']:
+        log(f"   ⚠️  {especie}: sem dados disponíveis")
+        concluir_checkpoint('obis', especie, None)
+        return None
+    
+    agregados = agregados_obis(especie, geometria)
+    entrada = montar_especie('obis', especie, total, resultado, base_url, agregados)
+    if resultado['completa']:
+        atualizar_estado_especie('obis', especie, resultado['inicio'], total, resultado['registros'],
+                                 agregados)
+        concluir_checkpoint('obis', especie, entrada)
+    
+    aviso = "" if resultado['completa'] else " (coleta incompleta)"
+    log(f"   ✅ {especie}: {total:,} registros | {resultado['gravados']:,} gravados{aviso}")
+    
+    return entrada
+
+
+def coletar_obis(especies, max_workers=MAX_WORKERS, incremental=False):
     """
     Coleta dados do OBIS (sistema internacional, mas dados brasileiros)
     API: https://api.obis.org/
+    Espécies são coletadas em paralelo (limitado por LIMITE_POR_HOST)
     """
     
     print("\n" + "="*80)
@@ -105,53 +876,16 @@ def coletar_obis(especies):
     print("="*80)
     
     base_url = "https://api.obis.org/v3/occurrence"
-    dados_coletados = []
     
     # Polígono da ZEE brasileira (simplificado)
     geometria_brasil = "POLYGON((-50 5,-30 5,-30 -35,-50 -35,-50 5))"
     
-    for especie in especies:
-        print(f"\n🔍 Coletando: {especie}")
-        
-        params = {
-            'scientificname': especie,
-            'geometry': geometria_brasil,
-            'size': 100
-        }
-        
-        data = fazer_requisicao(base_url, params)
-        
-        if data and data.get('total', 0) > 0:
-            registros = []
-            
-            for record in data.get('results', []):
-                if record.get('decimalLatitude') and record.get('decimalLongitude'):
-                    registros.append({
-                        'latitude': record.get('decimalLatitude'),
-                        'longitude': record.get('decimalLongitude'),
-                        'data_observacao': record.get('eventDate'),
-                        'profundidade_m': record.get('depth'),
-                        'temperatura_c': record.get('temperature'),
-                        'salinidade': record.get('salinity'),
-                        'localidade': record.get('locality'),
-                        'dataset': record.get('datasetName'),
-                        'instituicao': record.get('institutionCode'),
-                        'pais': record.get('country')
-                    })
-            
-            dados_coletados.append({
-                'nome_cientifico': especie,
-                'total_registros_obis': data.get('total', 0),
-                'registros': registros,
-                'fonte_api': base_url,
-                'data_coleta': datetime.now().isoformat()
-            })
-            
-            print(f"   ✅ {data.get('total', 0):,} registros | {len(registros)} processados")
-        else:
-            print(f"   ⚠️  Sem dados disponíveis")
-        
-        time.sleep(2)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        resultados = executor.map(
+            lambda especie: _coletar_especie_obis(especie, base_url, geometria_brasil, incremental),
+            especies
+        )
+        dados_coletados = [r for r in resultados if r is not None]
     
     metadados = {
         'fonte': 'OBIS - Ocean Biodiversity Information System',
@@ -175,10 +909,176 @@ def coletar_obis(especies):
 # 2. GBIF - GLOBAL BIODIVERSITY INFORMATION FACILITY
 # ============================================================================
 
-def coletar_gbif(especies):
+def normalizar_registro_gbif(record):
+    """Converte uma ocorrência da API do GBIF para o esquema do coletor"""
+    if record.get('decimalLatitude') is None or record.get('decimalLongitude') is None:
+        return None
+    
+    return {
+        'latitude': record.get('decimalLatitude'),
+        'longitude': record.get('decimalLongitude'),
+        'data_observacao': record.get('eventDate'),
+        'base_de_registro': record.get('basisOfRecord'),
+        'localidade': record.get('locality'),
+        'municipio': record.get('municipality'),
+        'estado': record.get('stateProvince'),
+        'instituicao': record.get('institutionCode'),
+        'coletor': record.get('recordedBy'),
+        'dataset': record.get('datasetName'),
+        'publisher': record.get('publishingOrgKey'),
+        'gbif_id': record.get('key'),
+        'precisao_coordenadas': record.get('coordinateUncertaintyInMeters'),
+        'licenca': record.get('license')
+    }
+
+
+def paginas_gbif(especie, base_url, cursor=None, desde=None, tamanho=TAMANHO_PAGINA_GBIF):
+    """
+    Percorre as ocorrências de uma espécie no GBIF por `offset`
+    até atingir o `count` (ou o limite de paginação da API de busca)
+    desde (AAAA-MM-DD) restringe a registros interpretados a partir da data;
+    essas páginas não vêm do cache HTTP (a URL se repete no mesmo dia)
+    Gera (resultados, total, cursor) por página; o cursor retoma a paginação
+    """
+    offset = cursor['offset'] if cursor else 0
+    
+    while True:
+        params = {
+            'scientificName': especie,
+            'country': 'BR',  # Brasil
+            'hasCoordinate': 'true',
+            'hasGeospatialIssue': 'false',
+            'limit': tamanho,
+            'offset': offset
+        }
+        if desde:
+            params['lastInterpreted'] = f"{desde},*"
+        
+        data = fazer_requisicao(base_url, params, revalidar=bool(desde))
+        if not data:
+            raise FalhaPaginacao(especie)
+        
+        resultados = data.get('results', [])
+        total = data.get('count', 0)
+        if not resultados:
+            return
+        
+        offset += len(resultados)
+        yield resultados, total, {'offset': offset}
+        
+        if data.get('endOfRecords', True) or offset >= total:
+            return
+        if offset + tamanho > LIMITE_OFFSET_GBIF:
+            log(f"   ⚠️  {especie}: limite de paginação do GBIF atingido ({offset:,}/{total:,})")
+            return
+
+
+def contar_gbif(especie, base_url):
+    """Total de ocorrências da espécie no GBIF (consulta com limit=0, sem cache)"""
+    data = fazer_requisicao(base_url, {
+        'scientificName': especie,
+        'country': 'BR',
+        'hasCoordinate': 'true',
+        'hasGeospatialIssue': 'false',
+        'limit': 0
+    }, revalidar=True)
+    return data.get('count', 0) if data else None
+
+
+def agregados_gbif(especie, base_url):
+    """
+    Contagens por ano, estado e base de registro via facetas do GBIF
+    (uma consulta com limit=0: só as tabelas, nenhum registro)
+    """
+    data = fazer_requisicao(base_url, {
+        'scientificName': especie,
+        'country': 'BR',
+        'hasCoordinate': 'true',
+        'hasGeospatialIssue': 'false',
+        'limit': 0,
+        'facet': list(FACETAS_GBIF),
+        'facetLimit': LIMITE_FACETAS_GBIF
+    })
+    if not data:
+        return {}
+    
+    agregados = {}
+    for faceta in data.get('facets', []):
+        # A resposta traz o campo em maiúsculas: STATE_PROVINCE -> stateProvince
+        partes = faceta.get('field', '').lower().split('_')
+        parametro = partes[0] + ''.join(parte.title() for parte in partes[1:])
+        nome = FACETAS_GBIF.get(parametro, parametro)
+        contagens = {item['name']: item['count'] for item in faceta.get('counts', [])}
+        agregados[nome] = dict(sorted(contagens.items())) if nome == 'por_ano' else contagens
+    return agregados
+
+
+def _coletar_especie_gbif(especie, base_url, incremental=False):
+    """
+    Coleta todas as ocorrências de uma espécie no GBIF
+    Incremental: pede apenas registros interpretados desde a marca d'água
+    (lastInterpreted) e mescla no JSONL existente pelo gbif_id; sem registros
+    novos nem mudança no total, reaproveita os agregados da coleta anterior
+    Retorna o dicionário da espécie ou None se não houver dados
+    """
+    checkpoint = ler_checkpoint('gbif', especie)
+    if checkpoint and checkpoint.get('concluida'):
+        log(f"   ⏭️  {especie}: já coletada (checkpoint)")
+        return checkpoint['entrada']
+    
+    inicio = datetime.now().isoformat()
+    estado = estado_especie('gbif', especie) if incremental else None
+    agregados = None
+    
+    if estado and os.path.exists(caminho_registros('gbif', especie)):
+        resultado = coletar_especie_paginada(
+            'gbif', especie,
+            lambda cursor: paginas_gbif(especie, base_url, cursor, desde=estado['marca_dagua'][:10]),
+            normalizar_registro_gbif,
+            campo_id='gbif_id',
+            registros_anteriores=estado['registros'],
+            inicio=inicio
+        )
+        total = contar_gbif(especie, base_url)
+        if total is None:
+            total = estado['total'] + resultado['novos']
+        if resultado['gravados'] == 0 and total == estado['total']:
+            agregados = estado.get('agregados')
+        detalhe = f"{resultado['novos']:,} novos | {resultado['gravados'] - resultado['novos']:,} atualizados"
+    else:
+        resultado = coletar_especie_paginada(
+            'gbif', especie,
+            lambda cursor: paginas_gbif(especie, base_url, cursor),
+            normalizar_registro_gbif,
+            inicio=inicio
+        )
+        total = resultado['total']
+        detalhe = f"{resultado['gravados']:,} gravados"
+        
+        if total == 0 and resultado['completa']:
+            log(f"   ⚠️  {especie}: sem dados disponíveis")
+            concluir_checkpoint('gbif', especie, None)
+            return None
+    
+    if agregados is None:
+        agregados = agregados_gbif(especie, base_url)
+    entrada = montar_especie('gbif', especie, total, resultado, base_url, agregados)
+    if resultado['completa']:
+        atualizar_estado_especie('gbif', especie, resultado['inicio'], total, resultado['registros'],
+                                 agregados)
+        concluir_checkpoint('gbif', especie, entrada)
+    
+    aviso = "" if resultado['completa'] else " (coleta incompleta)"
+    log(f"   ✅ {especie}: {total:,} registros | {detalhe}{aviso}")
+    
+    return entrada
+
+
+def coletar_gbif(especies, max_workers=MAX_WORKERS, incremental=False):
     """
     Coleta dados do GBIF (complementar ao OBIS)
     API: https://api.gbif.org/v1/
+    Espécies são coletadas em paralelo (limitado por LIMITE_POR_HOST)
     """
     
     print("\n" + "="*80)
@@ -188,56 +1088,13 @@ def coletar_gbif(especies):
     print("="*80)
     
     base_url = "https://api.gbif.org/v1/occurrence/search"
-    dados_coletados = []
     
-    for especie in especies:
-        print(f"\n🔍 Coletando: {especie}")
-        
-        params = {
-            'scientificName': especie,
-            'country': 'BR',  # Brasil
-            'hasCoordinate': 'true',
-            'hasGeospatialIssue': 'false',
-            'limit': 100
-        }
-        
-        data = fazer_requisicao(base_url, params)
-        
-        if data and data.get('count', 0) > 0:
-            registros = []
-            
-            for record in data.get('results', []):
-                if record.get('decimalLatitude') and record.get('decimalLongitude'):
-                    registros.append({
-                        'latitude': record.get('decimalLatitude'),
-                        'longitude': record.get('decimalLongitude'),
-                        'data_observacao': record.get('eventDate'),
-                        'base_de_registro': record.get('basisOfRecord'),
-                        'localidade': record.get('locality'),
-                        'municipio': record.get('municipality'),
-                        'estado': record.get('stateProvince'),
-                        'instituicao': record.get('institutionCode'),
-                        'coletor': record.get('recordedBy'),
-                        'dataset': record.get('datasetName'),
-                        'publisher': record.get('publishingOrgKey'),
-                        'gbif_id': record.get('key'),
-                        'precisao_coordenadas': record.get('coordinateUncertaintyInMeters'),
-                        'licenca': record.get('license')
-                    })
-            
-            dados_coletados.append({
-                'nome_cientifico': especie,
-                'total_registros_gbif': data.get('count', 0),
-                'registros': registros,
-                'fonte_api': base_url,
-                'data_coleta': datetime.now().isoformat()
-            })
-            
-            print(f"   ✅ {data.get('count', 0):,} registros | {len(registros)} processados")
-        else:
-            print(f"   ⚠️  Sem dados disponíveis")
-        
-        time.sleep(1)  # Rate limiting
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        resultados = executor.map(
+            lambda especie: _coletar_especie_gbif(especie, base_url, incremental),
+            especies
+        )
+        dados_coletados = [r for r in resultados if r is not None]
     
     metadados = {
         'fonte': 'GBIF - Global Biodiversity Information Facility',
@@ -257,6 +1114,124 @@ def coletar_gbif(especies):
     }
 
 
+# ============================================================================
+# DARWIN CORE ARCHIVE - EXPORTAÇÕES EM LOTE DO OBIS/GBIF
+# ============================================================================
+
+METADADOS_DWCA = {
+    'obis': {
+        'fonte': 'OBIS - Ocean Biodiversity Information System',
+        'url': 'https://obis.org/',
+        'operador': 'UNESCO-IOC',
+        'licenca': 'CC-BY 4.0'
+    },
+    'gbif': {
+        'fonte': 'GBIF - Global Biodiversity Information Facility',
+        'url': 'https://www.gbif.org/',
+        'operador': 'GBIF Secretariat',
+        'licenca': 'CC0 / CC-BY 4.0 (varia por dataset)'
+    }
+}
+
+
+def ingerir_dwca(caminho, fonte, especies=None, caixa=CAIXA_ZEE_BRASIL):
+    """
+    Ingere uma exportação Darwin Core Archive (zip) no lugar da API da fonte
+    Uma única passada por occurrence.txt: cada linha dentro da caixa da ZEE
+    passa pelo mesmo normalizar_registro_<fonte> da API e vai para o buffer
+    da sua espécie, acrescentado ao JSONL a cada TAMANHO_LOTE_DWCA registros
+    (ou todos os buffers, ao passar de MAX_BUFFER_DWCA)
+    especies (opcional) restringe às espécies listadas
+    Retorna o JSON resumo no mesmo formato de coletar_obis/coletar_gbif
+    """
+    normalizar = {'obis': normalizar_registro_obis, 'gbif': normalizar_registro_gbif}[fonte]
+    alvo = set(especies) if especies else None
+
+    print("\n" + "="*80)
+    print(f"📦 {fonte.upper()} - Darwin Core Archive")
+    print(f"   Arquivo: {descrever_archive(caminho)}")
+    print("="*80)
+
+    # Os JSONL só substituem os anteriores quando a ingestão termina
+    buffers = {}
+    contagens = {}
+    temporarios = {}
+    em_buffer = 0
+    lidas = 0
+    fora_da_caixa = 0
+
+    def descarregar(especie):
+        destino = temporarios.get(especie)
+        modo = 'a'
+        if destino is None:
+            destino = temporarios[especie] = caminho_registros(fonte, especie) + '.dwca'
+            os.makedirs(os.path.dirname(destino), exist_ok=True)
+            modo = 'w'
+        with open(destino, modo, encoding='utf-8') as arquivo:
+            return escrever_pagina(arquivo, buffers.pop(especie))
+
+    for linha in linhas_dwca(caminho):
+        if interrupcao.is_set():
+            raise ColetaInterrompida(caminho)
+
+        lidas += 1
+        if lidas % 1000000 == 0:
+            log(f"   📄 {lidas:,} linhas lidas ({sum(contagens.values()):,} na ZEE)")
+
+        if not na_caixa(linha, caixa):
+            fora_da_caixa += 1
+            continue
+
+        especie = nome_especie(linha)
+        if especie is None or (alvo is not None and especie not in alvo):
+            continue
+
+        registro = normalizar(para_registro_api(linha, fonte))
+        if registro is None:
+            continue
+
+        buffers.setdefault(especie, []).append(registro)
+        contagens[especie] = contagens.get(especie, 0) + 1
+        em_buffer += 1
+
+        if len(buffers[especie]) >= TAMANHO_LOTE_DWCA:
+            em_buffer -= descarregar(especie)
+        elif em_buffer >= MAX_BUFFER_DWCA:
+            for pendente in list(buffers):
+                em_buffer -= descarregar(pendente)
+
+    for pendente in list(buffers):
+        descarregar(pendente)
+
+    base_url = f"dwca:{os.path.basename(caminho)}"
+    dados_coletados = []
+    for especie in sorted(contagens):
+        destino = caminho_registros(fonte, especie)
+        os.replace(temporarios[especie], destino)
+        resultado = {'registros': contagens[especie], 'completa': True, 'caminho': destino}
+        dados_coletados.append(montar_especie(fonte, especie, contagens[especie], resultado, base_url))
+
+    print(f"   ✅ {lidas:,} linhas | {fora_da_caixa:,} fora da ZEE | "
+          f"{sum(contagens.values()):,} registros em {len(contagens)} espécies")
+
+    metadados = dict(METADADOS_DWCA[fonte])
+    metadados.update({
+        'arquivo_dwca': os.path.basename(caminho),
+        'filtro_geografico': (f"Águas brasileiras (ZEE): lat {caixa['lat_min']} a {caixa['lat_max']}, "
+                              f"lon {caixa['lon_min']} a {caixa['lon_max']}"),
+        'data_coleta': datetime.now().isoformat(),
+        'linhas_lidas': lidas,
+        'linhas_fora_da_zee': fora_da_caixa,
+        'total_especies_consultadas': len(alvo) if alvo else len(contagens),
+        'especies_com_dados': len(dados_coletados)
+    })
+
+    return {
+        'metadados': metadados,
+        'especies': dados_coletados
+    }
+
+
 # ============================================================================
 # 3. COPERNICUS MARINE SERVICE - OCEANOGRAPHIC DATA
 # ============================================================================
@@ -296,41 +1271,61 @@ def coletar_copernicus_marine():
     ]
     
     dados_coletados = []
+    area_interesse = {
+        'regiao': 'Águas Brasileiras - Atlântico Sul',
+        'lat_min': lat_min,
+        'lat_max': lat_max,
+        'lon_min': lon_min,
+        'lon_max': lon_max
+    }
     
-    print("\n🔍 Tentando acessar Copernicus Marine API...")
-    
-    # Tentativa de obter lista de produtos
-    catalog_url = f"{base_url}/products"
-    catalog_data = fazer_requisicao(catalog_url)
-    
-    if catalog_data:
-        print("   ✅ Catálogo Copernicus acessível")
-        dados_coletados.append({
-            'tipo': 'catalogo',
-            'produtos_disponiveis': catalog_data,
-            'data_coleta': datetime.now().isoformat()
-        })
+    # Arquivos NetCDF/Zarr baixados do portal: resumos por célula e por mês
+    locais = arquivos_locais()
+    if locais:
+        print(f"\n📂 {len(locais)} arquivo(s) Copernicus em {DIR_COPERNICUS_ENTRADA}/")
+    for caminho in locais:
+        try:
+            produto = ingerir_arquivo(caminho, area_interesse)
+        except (ImportError, ValueError, KeyError, OSError) as e:
+            print(f"   ⚠️  {os.path.basename(caminho)}: {str(e)}")
+            continue
+        produto['area_interesse'] = area_interesse
+        produto['status'] = 'Processado de arquivo local'
+        produto['data_referencia'] = datetime.now().isoformat()
+        dados_coletados.append(produto)
+        print(f"   ✅ {produto['produto_id']}: {', '.join(produto['variaveis']) or 'nenhuma variável conhecida'}")
+    
+    if dados_coletados:
+        print(f"   🗺️  Grades resumidas por célula em {DIR_GRADES}/")
     else:
-        print("   ⚠️  API Copernicus requer autenticação ou está indisponível")
-        print("   📝 Estruturando referência aos produtos disponíveis")
+        print("\n🔍 Tentando acessar Copernicus Marine API...")
+        
+        # Tentativa de obter lista de produtos
+        catalog_url = f"{base_url}/products"
+        catalog_data = fazer_requisicao(catalog_url)
         
-        # Estrutura de referência quando API não está acessível
-        for produto in produtos_interesse:
+        if catalog_data:
+            print("   ✅ Catálogo Copernicus acessível")
             dados_coletados.append({
-                'produto': produto['nome'],
-                'produto_id': produto['id'],
-                'variaveis': produto['variaveis'],
-                'area_interesse': {
-                    'regiao': 'Águas Brasileiras - Atlântico Sul',
-                    'lat_min': lat_min,
-                    'lat_max': lat_max,
-                    'lon_min': lon_min,
-                    'lon_max': lon_max
-                },
-                'status': 'Disponível via portal Copernicus',
-                'acesso': 'Requer registro gratuito em marine.copernicus.eu',
-                'data_referencia': datetime.now().isoformat()
+                'tipo': 'catalogo',
+                'produtos_disponiveis': catalog_data,
+                'data_coleta': datetime.now().isoformat()
             })
+        else:
+            print("   ⚠️  API Copernicus requer autenticação ou está indisponível")
+            print("   📝 Estruturando referência aos produtos disponíveis")
+            
+            # Estrutura de referência quando API não está acessível
+            for produto in produtos_interesse:
+                dados_coletados.append({
+                    'produto': produto['nome'],
+                    'produto_id': produto['id'],
+                    'variaveis': produto['variaveis'],
+                    'area_interesse': area_interesse,
+                    'status': 'Disponível via portal Copernicus',
+                    'acesso': 'Requer registro gratuito em marine.copernicus.eu',
+                    'data_referencia': datetime.now().isoformat()
+                })
     
     metadados = {
         'fonte': 'Copernicus Marine Service - European Union',
@@ -351,7 +1346,7 @@ def coletar_copernicus_marine():
         'licenca': 'Dados gratuitos e abertos (registro necessário)',
         'nota': 'API requer token de autenticação - registro em marine.copernicus.eu',
         'data_coleta': datetime.now().isoformat(),
-        'produtos_consultados': len(produtos_interesse),
+        'produtos_consultados': len(locais) or len(produtos_interesse),
         'produtos_referenciados': len(dados_coletados)
     }
     
@@ -492,6 +1487,31 @@ def coletar_unidades_conservacao():
 # 6. WORLD BANK - CLIMATE CHANGE DATA
 # ============================================================================
 
+def registros_world_bank(base_url, codigos, periodo='2000:2024'):
+    """
+    Gera os registros de vários indicadores pedidos em uma só chamada
+    (códigos unidos por ';', exige source=2), seguindo data[0]['pages']
+    """
+    url = f"{base_url}/{';'.join(codigos)}"
+    pagina = 1
+    paginas = 1
+    
+    while pagina <= paginas:
+        data = fazer_requisicao(url, {
+            'format': 'json',
+            'source': 2,
+            'per_page': TAMANHO_PAGINA_WORLD_BANK,
+            'date': periodo,
+            'page': pagina
+        })
+        if not data or len(data) < 2 or not data[1]:
+            return
+        
+        paginas = int(data[0].get('pages', 1))
+        yield from data[1]
+        pagina += 1
+
+
 def coletar_world_bank_climate():
     """
     Coleta dados climáticos do Brasil via World Bank API
@@ -543,47 +1563,47 @@ def coletar_world_bank_climate():
     
     dados_coletados = []
     
+    # Todos os indicadores em lotes (código1;código2;...), paginados;
+    # os registros voltam misturados e são separados por record['indicator']['id']
+    codigos = [indicador['codigo'] for indicador in indicadores]
+    print(f"\n🔍 Coletando {len(codigos)} indicadores em lotes de até {INDICADORES_POR_LOTE_WORLD_BANK}")
+    
+    valores_por_indicador = {codigo: [] for codigo in codigos}
+    acessiveis = set()
+    for inicio in range(0, len(codigos), INDICADORES_POR_LOTE_WORLD_BANK):
+        lote = codigos[inicio:inicio + INDICADORES_POR_LOTE_WORLD_BANK]
+        for record in registros_world_bank(base_url, lote):
+            codigo = record.get('indicator', {}).get('id')
+            if codigo not in valores_por_indicador:
+                continue
+            acessiveis.add(codigo)
+            if record.get('value') is not None:
+                valores_por_indicador[codigo].append({
+                    'ano': record.get('date'),
+                    'valor': record.get('value'),
+                    'unidade': record.get('unit', ''),
+                    'pais': record.get('country', {}).get('value')
+                })
+    
     for indicador in indicadores:
-        print(f"\n🔍 Coletando: {indicador['nome']}")
-        
-        url = f"{base_url}/{indicador['codigo']}"
-        params = {
-            'format': 'json',
-            'per_page': 20,
-            'date': '2000:2024'
-        }
-        
-        data = fazer_requisicao(url, params)
+        valores = valores_por_indicador[indicador['codigo']]
+        print(f"\n📈 {indicador['nome']}")
         
-        if data and len(data) > 1:
-            valores = []
-            
-            for record in data[1]:
-                if record.get('value') is not None:
-                    valores.append({
-                        'ano': record.get('date'),
-                        'valor': record.get('value'),
-                        'unidade': record.get('unit', ''),
-                        'pais': record.get('country', {}).get('value')
-                    })
+        if valores:
+            dados_coletados.append({
+                'indicador': indicador['nome'],
+                'codigo': indicador['codigo'],
+                'relevancia_oceanica': indicador['relevancia'],
+                'dados_temporais': valores,
+                'fonte_api': f"{base_url}/{indicador['codigo']}",
+                'data_coleta': datetime.now().isoformat()
+            })
             
-            if valores:
-                dados_coletados.append({
-                    'indicador': indicador['nome'],
-                    'codigo': indicador['codigo'],
-                    'relevancia_oceanica': indicador['relevancia'],
-                    'dados_temporais': valores,
-                    'fonte_api': url,
-                    'data_coleta': datetime.now().isoformat()
-                })
-                
-                print(f"   ✅ {len(valores)} registros temporais coletados")
-            else:
-                print(f"   ⚠️  Dados não disponíveis")
+            print(f"   ✅ {len(valores)} registros temporais coletados")
+        elif indicador['codigo'] in acessiveis:
+            print(f"   ⚠️  Dados não disponíveis")
         else:
             print(f"   ⚠️  Indicador não acessível")
-        
-        time.sleep(1)
     
     metadados = {
         'fonte': 'World Bank - World Development Indicators',
@@ -831,13 +1851,179 @@ def _gerar_estrutura_decada_oceanos_fallback():
     }
 
 
+# ============================================================================
+# COLETA EM SHARDS (VÁRIOS PROCESSOS)
+# ============================================================================
+
+def carregar_lista_especies(caminho):
+    """
+    Lê uma lista de espécies (um nome científico por linha)
+    Linhas em branco e comentários (#) são ignorados; repetições também
+    """
+    especies = []
+    with open(caminho, 'r', encoding='utf-8') as f:
+        for linha in f:
+            nome = linha.split('#')[0].strip()
+            if nome:
+                especies.append(nome)
+    return list(dict.fromkeys(especies))
+
+
+def dividir_em_shards(especies, processos):
+    """Distribui as espécies em rodízio (equilibra listas ordenadas por tamanho)"""
+    return [especies[i::processos] for i in range(processos) if especies[i::processos]]
+
+
+def configuracao_processo():
+    """Flags da linha de comando e limites por host que os processos filhos herdam"""
+    return {
+        'usar_cache': USAR_CACHE_HTTP,
+        'retomar': RETOMAR,
+        'replay': sessoes.replay,
+        'gravacao': _gravador.diretorio if _gravador else None,
+        'limites_host': dict(LIMITE_POR_HOST),
+        'taxas': dict(limitador.taxas),
+        'taxa_padrao': limitador.padrao
+    }
+
+
+def _configurar_processo_shard(processos, configuracao):
+    """
+    Ajusta o processo filho: herda as flags da linha de comando e divide
+    conexões e taxas por host entre os shards, para que a soma dos processos
+    respeite os mesmos limites de uma coleta em processo único
+    Calculado sempre a partir dos limites do processo principal: um processo
+    do pool que recebe um segundo shard não divide os limites de novo
+    """
+    global USAR_CACHE_HTTP, RETOMAR, _gravador
+    USAR_CACHE_HTTP = configuracao['usar_cache']
+    RETOMAR = configuracao['retomar']
+    sessoes.replay = configuracao['replay']
+    if configuracao['gravacao'] and _gravador is None:
+        _gravador = GravadorRespostas(configuracao['gravacao'])
+
+    # Atualizado no lugar: o pool de sessões usa o mesmo dicionário
+    LIMITE_POR_HOST.update({host: max(1, limite // processos)
+                            for host, limite in configuracao['limites_host'].items()})
+
+    limitador.taxas = {host: (taxa / processos, max(1, rajada // processos))
+                       for host, (taxa, rajada) in configuracao['taxas'].items()}
+    taxa, rajada = configuracao['taxa_padrao']
+    limitador.padrao = (taxa / processos, max(1, rajada // processos))
+
+
+def _contadores_http():
+    """Contadores HTTP acumulados pelo processo (cache, limitador e sessões)"""
+    cache = obter_cache_http()
+    return {
+        'cache': dict(cache.estatisticas) if cache else {},
+        'limitador': dict(limitador.estatisticas),
+        'sessoes': sessoes.estatisticas()
+    }
+
+
+def _executar_shard(indice, especies, processos, max_workers, incremental, configuracao,
+                    processos_normalizacao=PROCESSOS_NORMALIZACAO):
+    """
+    Executado em um processo separado: coleta OBIS e GBIF de um shard
+    Devolve só os contadores deste shard (o processo pode ter rodado outros)
+    """
+    _configurar_processo_shard(processos, configuracao)
+    antes = _contadores_http()
+    relatorio.estagios.clear()
+    pipeline_paginas.processos = processos_normalizacao
+    log(f"\n🧩 Shard {indice + 1}/{processos}: {len(especies)} espécies (PID {os.getpid()})")
+
+    try:
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            obis = executor.submit(coletar_obis, especies, max_workers, incremental)
+            gbif = executor.submit(coletar_gbif, especies, max_workers, incremental)
+            dados_obis, dados_gbif = obis.result(), gbif.result()
+    except KeyboardInterrupt:
+        interrupcao.set()  # Ctrl+C chega a todos os processos do grupo
+        raise
+    finally:
+        pipeline_paginas.fechar()
+        if _cache_http is not None:
+            _cache_http.sincronizar()
+
+    estatisticas = {
+        grupo: {chave: valor - antes[grupo].get(chave, 0) for chave, valor in contadores.items()}
+        for grupo, contadores in _contadores_http().items()
+    }
+    estatisticas['estagios'] = relatorio.resumo()
+    return dados_obis, dados_gbif, estatisticas
+
+
+def mesclar_shards(partes):
+    """Junta os JSONs resumo de uma fonte produzidos pelos shards"""
+    metadados = dict(partes[0]['metadados'])
+    especies = [entrada for parte in partes for entrada in parte['especies']]
+
+    metadados['data_coleta'] = datetime.now().isoformat()
+    metadados['total_especies_consultadas'] = sum(p['metadados']['total_especies_consultadas'] for p in partes)
+    metadados['especies_com_dados'] = len(especies)
+
+    return {'metadados': metadados, 'especies': especies}
+
+
+def _acumular_estatisticas(estatisticas):
+    """Soma no processo principal os contadores HTTP de um shard"""
+    cache = obter_cache_http()
+    if cache:
+        for evento, quantidade in estatisticas['cache'].items():
+            cache.registrar(evento, quantidade)
+    for evento, quantidade in estatisticas['limitador'].items():
+        limitador.registrar(evento, quantidade)
+    sessoes.acumular(estatisticas['sessoes'])
+    relatorio.acumular(estatisticas['estagios'])
+
+
+def coletar_em_shards(especies, processos, max_workers=MAX_WORKERS, incremental=False):
+    """
+    Divide as espécies em shards e coleta OBIS + GBIF em processos separados
+    (contexto 'spawn': cada processo abre suas próprias sessões e cache)
+    Cada processo grava seus registros, checkpoints e estado por espécie, então
+    a execução continua retomável e incremental como no modo de um processo
+    """
+    shards = dividir_em_shards(especies, processos)
+    print(f"\n🧩 {len(especies)} espécies em {len(shards)} shards (processos)")
+
+    # O pool de normalização também é dividido entre os shards
+    normalizacao_por_shard = pipeline_paginas.processos and max(1, pipeline_paginas.processos // len(shards))
+    
+    contexto = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=len(shards), mp_context=contexto) as executor:
+        futuros = [
+            executor.submit(_executar_shard, indice, shard, len(shards), max_workers,
+                            incremental, configuracao_processo(), normalizacao_por_shard)
+            for indice, shard in enumerate(shards)
+        ]
+        partes = [futuro.result() for futuro in futuros]
+
+    for _, _, estatisticas in partes:
+        _acumular_estatisticas(estatisticas)
+
+    return mesclar_shards([p[0] for p in partes]), mesclar_shards([p[1] for p in partes])
+
+
 # ============================================================================
 # FUNÇÃO PRINCIPAL
 # ============================================================================
 
-def executar_coleta():
+def executar_coleta(max_workers=MAX_WORKERS, paralelo=True, incremental=False,
+                    especies=None, processos=1, dwca=None,
+                    processos_normalizacao=PROCESSOS_NORMALIZACAO, reindexar=False):
     """
     Executa coleta de todas as fontes
+    paralelo=False reproduz a coleta sequencial (uma fonte e uma espécie por vez)
+    incremental=True busca só o que mudou desde a última coleta completa
+    especies substitui ESPECIES_PADRAO; processos > 1 divide as espécies em
+    shards coletados em processos separados (OBIS e GBIF)
+    dwca ({'obis': zip, 'gbif': zip}) ingere exportações em lote no lugar da API
+    Estágios: busca -> normalização (pool de processos) -> registros em disco ->
+    deduplicação -> gravação -> índice (reindexar=True); a vazão de cada um vai
+    para data/execucoes/coleta_<data>.json
     """
     
     os.makedirs('data', exist_ok=True)
@@ -852,39 +2038,106 @@ def executar_coleta():
     # Limpar JSONs obsoletos antes de começar
     limpar_jsons_obsoletos(arquivos_esperados)
     
+    # Sem --resume, checkpoints de execuções anteriores são descartados
+    if not RETOMAR:
+        limpar_checkpoints()
+    
     print("\n" + "="*80)
     print("🇧🇷 OCEANIA - COLETOR AUTOMÁTICO DE DADOS")
     print("   Fontes Ativas: OBIS, GBIF, Copernicus Marine")
     print("="*80)
     print(f"\n⏰ Início: {datetime.now().strftime('%H:%M:%S')}\n")
     
-    # Lista de espécies marinhas brasileiras (único hardcode necessário)
-    especies_alvo = [
-        'Chelonia mydas',
-        'Caretta caretta',
-        'Eretmochelys imbricata',
-        'Trichechus manatus',
-        'Sotalia guianensis',
-        'Tursiops truncatus',
-        'Epinephelus itajara',
-        'Manta birostris',
-        'Rhincodon typus',
-        'Carcharodon carcharias'
-    ]
+    especies_alvo = list(especies) if especies else ESPECIES_PADRAO
     
     print(f"🎯 Espécies alvo: {len(especies_alvo)}\n")
     
-    # 1. OBIS
-    dados_obis = coletar_obis(especies_alvo)
-    salvar_json(dados_obis, 'data/obis_ocorrencias.json')
+    workers = max_workers if paralelo else 1
+    caminhos_ocorrencias = {'OBIS': 'data/obis_ocorrencias.json', 'GBIF': 'data/gbif_ocorrencias.json'}
+    coletores_api = {'OBIS': coletar_obis, 'GBIF': coletar_gbif}
+    dwca = dwca or {}
     
-    # 2. GBIF
-    dados_gbif = coletar_gbif(especies_alvo)
-    salvar_json(dados_gbif, 'data/gbif_ocorrencias.json')
+    fontes = {}
+    for nome, caminho_dwca in dwca.items():
+        fontes[nome.upper()] = (ingerir_dwca, (caminho_dwca, nome, especies), caminhos_ocorrencias[nome.upper()])
     
-    # 3. Copernicus Marine
-    dados_copernicus = coletar_copernicus_marine()
-    salvar_json(dados_copernicus, 'data/copernicus_oceanografia.json')
+    pela_api = [nome for nome in coletores_api if nome not in fontes]
+    if processos > 1 and len(pela_api) == 2:
+        fontes['OBIS+GBIF'] = (coletar_em_shards, (especies_alvo, processos, workers, incremental), None)
+    else:
+        for nome in pela_api:
+            fontes[nome] = (coletores_api[nome], (especies_alvo, workers, incremental), caminhos_ocorrencias[nome])
+    fontes['Copernicus'] = (coletar_copernicus_marine, (), 'data/copernicus_oceanografia.json')
+    
+    # 1-3. OBIS, GBIF e Copernicus Marine (em paralelo, salvando cada fonte ao terminar)
+    def coletar_e_salvar(nome):
+        funcao, args, caminho = fontes[nome]
+        dados, segundos = cronometrar(funcao, *args)
+        
+        # OBIS e GBIF só são salvos depois da deduplicação entre eles
+        if caminho and 'especies' not in dados:
+            salvar_json(dados, caminho)
+        return dados, segundos
+    
+    inicio = time.perf_counter()
+    
+    pipeline_paginas.processos = processos_normalizacao
+    try:
+        with ThreadPoolExecutor(max_workers=len(fontes) if paralelo else 1) as executor:
+            futuros = {nome: executor.submit(coletar_e_salvar, nome) for nome in fontes}
+            try:
+                resultados = {nome: futuro.result() for nome, futuro in futuros.items()}
+            except KeyboardInterrupt:
+                interrupcao.set()  # workers param na próxima página; checkpoints ficam
+                raise
+    finally:
+        pipeline_paginas.fechar()
+    
+    # Bytes da busca: tráfego de rede de todas as requisições (inclui shards)
+    relatorio.estagio('busca').bytes = sessoes.estatisticas()['bytes_rede']
+    
+    if 'OBIS+GBIF' in resultados:
+        dados_obis, dados_gbif = resultados['OBIS+GBIF'][0]
+    else:
+        dados_obis = resultados['OBIS'][0]
+        dados_gbif = resultados['GBIF'][0]
+    dados_copernicus = resultados['Copernicus'][0]
+    tempos = {nome: segundos for nome, (_, segundos) in resultados.items()}
+    
+    # 4. Deduplicação OBIS x GBIF + armazéns colunares
+    print("\n🔗 Deduplicando OBIS x GBIF e gravando armazéns colunares...")
+    with relatorio.cronometrar('deduplicacao') as metricas:
+        _, tempos['Deduplicação'] = cronometrar(construir_armazens_colunares, dados_obis, dados_gbif)
+        metricas['registros'] = sum(entrada.get('registros_coletados', 0)
+                                    for dados in (dados_obis, dados_gbif) for entrada in dados['especies'])
+        metricas['bytes'] = tamanho_diretorio(DIR_COLUNAR)
+    
+    # 5. JSONs resumo OBIS/GBIF
+    with relatorio.cronometrar('gravacao') as metricas:
+        for nome, dados in (('OBIS', dados_obis), ('GBIF', dados_gbif)):
+            caminho = caminhos_ocorrencias[nome]
+            if EXPORTAR_JSON:
+                exportar_json_completo(dados, caminho)
+            else:
+                salvar_json(dados, caminho)
+            metricas['registros'] += len(dados['especies'])
+            metricas['bytes'] += os.path.getsize(caminho)
+    
+    # 6. Índice do chatbot (opcional: exige as dependências do rag_engine)
+    if reindexar:
+        print("\n🧠 Reconstruindo o índice FAISS do chatbot...")
+        with relatorio.cronometrar('indice') as metricas:
+            metricas['registros'] = atualizar_indice_rag()
+    
+    tempo_total = time.perf_counter() - inicio
+    
+    # Checkpoints só são descartados quando todas as espécies foram até o fim;
+    # senão ficam (os das concluídas também, para o --resume pulá-las)
+    incompletas = [f"{nome} {entrada['nome_cientifico']}"
+                   for nome, dados in (('OBIS', dados_obis), ('GBIF', dados_gbif))
+                   for entrada in dados['especies'] if not entrada.get('coleta_completa', True)]
+    if not incompletas:
+        limpar_checkpoints()
     
     # Relatório final
     print("\n" + "="*80)
@@ -894,22 +2147,115 @@ def executar_coleta():
     print("\n📁 Arquivos gerados:")
     print("   • obis_ocorrencias.json")
     print("   • gbif_ocorrencias.json")
+    print(f"   • {DIR_REGISTROS}/ (todos os registros OBIS/GBIF, JSONL por espécie)")
+    print(f"   • {DIR_COLUNAR}/obis, {DIR_COLUNAR}/gbif (ocorrências em colunas tipadas)")
     print("   • copernicus_oceanografia.json")
     
     print("\n📊 Estatísticas:")
-    print(f"   • OBIS: {dados_obis['metadados']['especies_com_dados']}/{len(especies_alvo)} espécies")
-    print(f"   • GBIF: {dados_gbif['metadados']['especies_com_dados']}/{len(especies_alvo)} espécies")
+    print(f"   • OBIS: {dados_obis['metadados']['especies_com_dados']}/{dados_obis['metadados']['total_especies_consultadas']} espécies")
+    print(f"   • GBIF: {dados_gbif['metadados']['especies_com_dados']}/{dados_gbif['metadados']['total_especies_consultadas']} espécies")
     print(f"   • Copernicus: {dados_copernicus['metadados']['produtos_referenciados']}/{dados_copernicus['metadados']['produtos_consultados']} produtos oceanográficos")
     
+    imprimir_relatorio_tempos(tempos, tempo_total)
+    
+    cache = obter_cache_http()
+    if cache:
+        cache.sincronizar()
+        est = cache.estatisticas
+        print(f"\n🗄️  Cache HTTP: {est['hits']} hits | {est['revalidados']} revalidados (304) | "
+              f"{est['misses']} baixados | {est['despejados']} despejados")
+    
+    est = limitador.estatisticas
+    print(f"🚦 Limitador: {est['http_429']} x 429 | {est['http_503']} x 503 | "
+          f"{est['retry_after']} Retry-After | {est['retentativas']} retentativas | "
+          f"{est['esperas']} esperas ({est['segundos_espera']:.1f}s)")
+    
+    est = sessoes.estatisticas()
+    print(f"🔌 Conexões: {est['requisicoes']} requisições | {est['conexoes']} abertas | "
+          f"{est['reusos']} reaproveitadas | {est['bytes_rede'] / 1e6:.1f} MB na rede "
+          f"({est['bytes_conteudo'] / 1e6:.1f} MB descomprimidos)")
+    
+    caminho_relatorio = relatorio.salvar({
+        'tempo_total_s': round(tempo_total, 3),
+        'tempos_por_fonte_s': {fonte: round(segundos, 3) for fonte, segundos in tempos.items()},
+        'configuracao': {
+            'workers': max_workers,
+            'paralelo': paralelo,
+            'incremental': incremental,
+            'processos': processos,
+            'processos_normalizacao': processos_normalizacao,
+            'especies': len(especies_alvo)
+        },
+        'cache_http': dict(cache.estatisticas) if cache else None,
+        'limitador': dict(limitador.estatisticas),
+        'conexoes': sessoes.estatisticas()
+    })
+    imprimir_relatorio_estagios(relatorio.resumo())
+    print(f"   📝 Relatório da execução: {caminho_relatorio}")
+    
+    if incompletas:
+        print(f"\n⚠️  {len(incompletas)} coleta(s) incompleta(s): {', '.join(incompletas)}")
+        print(f"   Checkpoints mantidos em {DIR_CHECKPOINTS}/")
+        print("   Para continuar de onde parou: python coletar_dados_amazonia_azul.py --resume")
+    
     print(f"\n⏰ Conclusão: {datetime.now().strftime('%H:%M:%S')}")
     print("\n🚀 Próximo passo: streamlit run app.py\n")
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Coletor de dados da Amazônia Azul")
+    parser.add_argument('--workers', type=int, default=MAX_WORKERS,
+                        help='Workers simultâneos por fonte')
+    parser.add_argument('--sequencial', action='store_true',
+                        help='Coleta uma fonte e uma espécie por vez (linha de base)')
+    parser.add_argument('--sem-cache', action='store_true',
+                        help='Ignora o cache HTTP e baixa tudo novamente')
+    parser.add_argument('--exportar-json', action='store_true',
+                        help='Embute todos os registros nos JSONs OBIS/GBIF (formato antigo)')
+    parser.add_argument('--resume', action='store_true',
+                        help='Retoma a execução interrompida a partir dos checkpoints')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Coleta só registros novos/alterados desde a última coleta')
+    parser.add_argument('--especies', metavar='ARQUIVO',
+                        help='Lista de espécies (um nome científico por linha)')
+    parser.add_argument('--processos', type=int, default=1,
+                        help='Processos para OBIS/GBIF (espécies divididas em shards)')
+    parser.add_argument('--processos-normalizacao', type=int, default=PROCESSOS_NORMALIZACAO,
+                        help='Processos que normalizam páginas enquanto a busca continua '
+                             '(padrão 0 = na própria thread; o pool só compensa com normalização cara)')
+    parser.add_argument('--reindexar', action='store_true',
+                        help='Atualiza o índice FAISS do chatbot (só os chunks que mudaram) ao final da coleta')
+    parser.add_argument('--gravar', metavar='DIR',
+                        help='Grava as respostas das APIs para replay (implica --sem-cache)')
+    parser.add_argument('--replay', metavar='URL',
+                        help='Envia as requisições a um servidor de replay (bancada_coleta.py servir)')
+    parser.add_argument('--dwca-obis', metavar='ZIP',
+                        help='Ingere uma exportação Darwin Core Archive do OBIS no lugar da API')
+    parser.add_argument('--dwca-gbif', metavar='ZIP',
+                        help='Ingere uma exportação Darwin Core Archive do GBIF no lugar da API')
+    args = parser.parse_args()
+    
+    USAR_CACHE_HTTP = not (args.sem_cache or args.gravar)
+    sessoes.replay = args.replay
+    if args.gravar:
+        _gravador = GravadorRespostas(args.gravar)
+    EXPORTAR_JSON = args.exportar_json
+    RETOMAR = args.resume
+    
     try:
-        executar_coleta()
+        executar_coleta(
+            max_workers=args.workers,
+            paralelo=not args.sequencial,
+            incremental=args.incremental,
+            especies=carregar_lista_especies(args.especies) if args.especies else None,
+            processos=max(1, args.processos),
+            dwca={fonte: caminho for fonte, caminho in (('obis', args.dwca_obis), ('gbif', args.dwca_gbif)) if caminho},
+            processos_normalizacao=max(0, args.processos_normalizacao),
+            reindexar=args.reindexar
+        )
     except KeyboardInterrupt:
         print("\n\n⚠️  Coleta interrompida pelo usuário")
+        print("   Para continuar de onde parou: python coletar_dados_amazonia_azul.py --resume")
     except Exception as e:
         print(f"\n\n❌ Erro fatal: {str(e)}")
         import traceback
@@ -0,0 +1,101 @@
+"""
+Fixtures compartilhadas dos testes
+servidor_stub: servidor HTTP local com respostas programáveis por caminho
+coletor: o módulo do coletor isolado em um diretório temporário, com
+cache, limitador e sessões novos (sem rede, sem esperas de taxa)
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+
+class ServidorStub:
+    """
+    rotas: caminho -> funcao(params, cabecalhos) que devolve
+    (status, corpo) ou (status, corpo, cabecalhos); corpo dict/list vira JSON,
+    bytes vão como estão (ex.: já comprimidos, com Content-Encoding)
+    Responde em HTTP/1.1, então clientes podem reaproveitar a conexão
+    requisicoes: (caminho, params, cabecalhos) de cada GET recebido
+    """
+
+    def __init__(self):
+        self.rotas = {}
+        self.requisicoes = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                partes = urlsplit(self.path)
+                params = {chave: valores[-1] for chave, valores in parse_qs(partes.query).items()}
+                cabecalhos = dict(self.headers)
+                stub.requisicoes.append((partes.path, params, cabecalhos))
+
+                rota = stub.rotas.get(partes.path)
+                resposta = rota(params, cabecalhos) if rota else (404, {'erro': 'sem rota'})
+                status, corpo = resposta[0], resposta[1]
+                extras = resposta[2] if len(resposta) > 2 else {}
+                if corpo is None:
+                    dados = b''
+                elif isinstance(corpo, bytes):
+                    dados = corpo
+                else:
+                    dados = json.dumps(corpo).encode('utf-8')
+
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(dados)))
+                for nome, valor in extras.items():
+                    self.send_header(nome, valor)
+                self.end_headers()
+                if status != 304:
+                    self.wfile.write(dados)
+
+            def log_message(self, *args):
+                pass
+
+        self._servidor = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self._servidor.server_address[1]}"
+        self._thread = threading.Thread(target=self._servidor.serve_forever, args=(0.05,), daemon=True)
+        self._thread.start()
+
+    def contar(self, caminho):
+        return sum(1 for requisicao in self.requisicoes if requisicao[0] == caminho)
+
+    def fechar(self):
+        self._servidor.shutdown()
+        self._servidor.server_close()
+
+
+@pytest.fixture
+def servidor_stub():
+    stub = ServidorStub()
+    yield stub
+    stub.fechar()
+
+
+@pytest.fixture
+def coletor(tmp_path, monkeypatch):
+    import coletar_dados_amazonia_azul as coletor
+    import transporte_http
+    from transporte_http import LimitadorTaxa, PoolSessoes
+
+    monkeypatch.chdir(tmp_path)  # data/ e .cache/ são caminhos relativos
+    monkeypatch.setattr(coletor, 'USAR_CACHE_HTTP', True)
+    monkeypatch.setattr(coletor, 'RETOMAR', False)
+    monkeypatch.setattr(coletor, '_cache_http', None)
+    monkeypatch.setattr(coletor, 'limitador', LimitadorTaxa(taxas={}, padrao=(1000.0, 1000)))
+    monkeypatch.setattr(coletor, 'sessoes', PoolSessoes(coletor.HEADERS))
+    sem_espera = lambda *args, **kwargs: 0.0
+    monkeypatch.setattr(coletor, 'atraso_backoff', sem_espera)
+    monkeypatch.setattr(transporte_http, 'atraso_backoff', sem_espera)
+    monkeypatch.setattr(coletor.pipeline_paginas, 'processos', 0)
+    coletor.interrupcao.clear()
+    yield coletor
+    if coletor._cache_http is not None:
+        coletor._cache_http.fechar()
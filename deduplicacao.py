@@ -0,0 +1,85 @@
+"""
+Deduplicação de Ocorrências entre Fontes
+OBIS e GBIF republicam os mesmos datasets; uma ocorrência é considerada
+duplicada quando coincide em espécie, posição arredondada, dia e dataset
+"""
+
+import hashlib
+
+
+# ============================================================================
+# CONFIGURAÇÕES
+# ============================================================================
+
+CASAS_DECIMAIS = 3  # ~110 m no equador; absorve diferenças de arredondamento entre fontes
+
+
+# ============================================================================
+# CHAVE ESPAÇO-TEMPORAL
+# ============================================================================
+
+def chave_ocorrencia(registro, especie, casas=CASAS_DECIMAIS):
+    """
+    Hash de 64 bits de (espécie, lat/lon arredondadas, dia do evento, dataset)
+    Retorna None se o registro não tiver coordenadas
+    """
+    latitude = registro.get('latitude')
+    longitude = registro.get('longitude')
+    if latitude is None or longitude is None:
+        return None
+
+    dia = (registro.get('data_observacao') or '').split('/')[0][:10]
+    dataset = ' '.join((registro.get('dataset') or '').lower().split())
+
+    # + 0.0 evita que -0.000 e 0.000 gerem chaves diferentes
+    lat = round(float(latitude), casas) + 0.0
+    lon = round(float(longitude), casas) + 0.0
+
+    texto = f"{especie.lower()}|{lat:.{casas}f}|{lon:.{casas}f}|{dia}|{dataset}"
+    return int.from_bytes(hashlib.blake2b(texto.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+# ============================================================================
+# ÍNDICE DE DUPLICATAS
+# ============================================================================
+
+class IndiceDuplicatas:
+    """
+    Índice hash da fonte primária (OBIS) para casar registros da secundária
+    (GBIF) em tempo linear; cada registro primário casa com no máximo um
+    secundário. Memória: uma entrada por chave primária + uma por duplicata
+    """
+
+    def __init__(self, campo_id_secundario='gbif_id'):
+        self.campo_id_secundario = campo_id_secundario
+        self._disponiveis = {}       # chave -> registros primários ainda sem par
+        self._correspondencias = {}  # chave -> ids secundários casados
+        self.duplicatas = 0
+
+    def indexar(self, registro, especie):
+        """Passo 1: registra uma ocorrência da fonte primária"""
+        chave = chave_ocorrencia(registro, especie)
+        if chave is not None:
+            self._disponiveis[chave] = self._disponiveis.get(chave, 0) + 1
+
+    def casar(self, registro, especie):
+        """
+        Passo 2: True se a ocorrência da fonte secundária já existe na primária
+        (ela deve ser descartada; a proveniência fica guardada no índice)
+        """
+        chave = chave_ocorrencia(registro, especie)
+        if not self._disponiveis.get(chave):
+            return False
+
+        self._disponiveis[chave] -= 1
+        self._correspondencias.setdefault(chave, []).append(registro.get(self.campo_id_secundario))
+        self.duplicatas += 1
+        return True
+
+    def proveniencia(self, registro, especie):
+        """
+        Passo 3: id do registro secundário casado com esta ocorrência primária
+        (ou None); cada id é entregue uma única vez
+        """
+        ids = self._correspondencias.get(chave_ocorrencia(registro, especie))
+        return ids.pop() if ids else None
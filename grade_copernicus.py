@@ -0,0 +1,465 @@
+"""
+Ingestão de Grades Oceanográficas do Copernicus Marine (NetCDF/Zarr)
+Abre arquivos baixados do portal sem carregar o cubo: só a caixa da costa
+brasileira é lida, alguns passos de tempo por vez, e reduzida a resumos
+por célula (média no período) e por mês (média regional)
+"""
+
+import os
+
+import numpy as np
+
+try:
+    import xarray as xr
+except ImportError:  # opcional: sem ele, só NetCDF3 clássico (memory-map direto)
+    xr = None
+
+
+# ============================================================================
+# CONFIGURAÇÕES
+# ============================================================================
+
+DIR_COPERNICUS_ENTRADA = 'data/copernicus_bruto'  # arquivos .nc/.zarr baixados
+DIR_GRADES = 'data/copernicus'                    # resumos por célula (.npz)
+
+# Variáveis dos produtos Copernicus resumidas: nome no arquivo -> (nome, unidade)
+VARIAVEIS_GRADE = {
+    'thetao': ('temperatura', '°C'),
+    'so': ('salinidade', 'PSU'),
+    'chl': ('clorofila', 'mg/m³'),
+    'CHL': ('clorofila', 'mg/m³')
+}
+
+NOMES_LATITUDE = ('latitude', 'lat')
+NOMES_LONGITUDE = ('longitude', 'lon')
+NOMES_TEMPO = ('time', 'tempo')
+NOMES_PROFUNDIDADE = ('depth', 'deptht', 'lev')
+
+MAX_BYTES_BLOCO = 64 * 1024 * 1024  # teto de RAM por bloco de passos de tempo lido
+RESOLUCAO_RESUMO_GRAUS = 1.0        # células agregadas no JSON (a grade fina vai para o .npz)
+
+
+# ============================================================================
+# NETCDF3 CLÁSSICO (MEMORY-MAP SEM DEPENDÊNCIAS)
+# ============================================================================
+
+_TIPOS_NETCDF3 = {1: '>i1', 2: 'S1', 3: '>i2', 4: '>i4', 5: '>f4', 6: '>f8'}
+
+# Preenchimento padrão do NetCDF por tipo (kind, bytes): células nunca escritas
+# de variáveis sem _FillValue; como no netCDF4/xarray, bytes não são mascarados
+_PREENCHIMENTO_PADRAO = {
+    ('i', 2): -32767,
+    ('i', 4): -2147483647,
+    ('f', 4): 9.9692099683868690e+36,
+    ('f', 8): 9.9692099683868690e+36
+}
+
+
+class LeitorNetCDF3:
+    """
+    Lê o cabeçalho de um NetCDF3 (CDF-1/CDF-2) e expõe cada variável como
+    array numpy sobre um memory-map do arquivo (inclusive variáveis de
+    registro, via strides); nada é lido até a fatia ser acessada
+    """
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self._mapa = np.memmap(caminho, dtype=np.uint8, mode='r')
+        self._posicao = 0
+
+        if bytes(self._mapa[:3]) != b'CDF' or int(self._mapa[3]) not in (1, 2):
+            raise ValueError(f"{caminho} não é NetCDF3 clássico")
+        self._versao = int(self._mapa[3])
+        self._posicao = 4
+
+        self.registros = self._inteiro()
+        self.dimensoes = self._ler_dimensoes()
+        self.atributos = self._ler_atributos()
+        self.variaveis = self._ler_variaveis()
+
+    # --- cabeçalho (XDR, big-endian, campos alinhados em 4 bytes) ---
+
+    def _bytes(self, n):
+        trecho = bytes(self._mapa[self._posicao:self._posicao + n])
+        self._posicao += n + (-n % 4)
+        return trecho
+
+    def _inteiro(self):
+        valor = int.from_bytes(bytes(self._mapa[self._posicao:self._posicao + 4]), 'big')
+        self._posicao += 4
+        return valor
+
+    def _nome(self):
+        return self._bytes(self._inteiro()).decode('utf-8')
+
+    def _lista(self):
+        """Tag + número de elementos (ABSENT = 0, 0)"""
+        self._inteiro()
+        return self._inteiro()
+
+    def _ler_dimensoes(self):
+        dimensoes = []
+        for _ in range(self._lista()):
+            nome = self._nome()
+            dimensoes.append((nome, self._inteiro()))  # 0 = dimensão de registro
+        return dimensoes
+
+    def _ler_atributos(self):
+        atributos = {}
+        for _ in range(self._lista()):
+            nome = self._nome()
+            tipo = np.dtype(_TIPOS_NETCDF3[self._inteiro()])
+            n = self._inteiro()
+            valores = np.frombuffer(self._bytes(n * tipo.itemsize), dtype=tipo)
+            if tipo.kind == 'S':
+                atributos[nome] = valores.tobytes().decode('utf-8', 'replace').rstrip('\x00')
+            else:
+                atributos[nome] = valores[0].item() if n == 1 else valores.tolist()
+        return atributos
+
+    def _ler_variaveis(self):
+        especificacoes = []
+        for _ in range(self._lista()):
+            nome = self._nome()
+            dims = [self._inteiro() for _ in range(self._inteiro())]
+            atributos = self._ler_atributos()
+            tipo = np.dtype(_TIPOS_NETCDF3[self._inteiro()])
+            tamanho = self._inteiro()
+            if self._versao == 1:
+                inicio = self._inteiro()
+            else:
+                inicio = int.from_bytes(self._bytes(8), 'big')
+            especificacoes.append((nome, dims, atributos, tipo, tamanho, inicio))
+
+        de_registro = [e for e in especificacoes if e[1] and self.dimensoes[e[1][0]][1] == 0]
+        # Uma única variável de registro não tem preenchimento entre registros
+        tamanho_registro = sum(e[4] for e in de_registro)
+        if len(de_registro) == 1:
+            nome, dims, _, tipo, _, _ = de_registro[0]
+            tamanho_registro = tipo.itemsize * int(np.prod([self.dimensoes[d][1] for d in dims[1:]]))
+
+        variaveis = {}
+        for nome, dims, atributos, tipo, _, inicio in especificacoes:
+            nomes_dims = tuple(self.dimensoes[d][0] for d in dims)
+            forma = [self.dimensoes[d][1] for d in dims]
+            strides = list(np.cumprod([tipo.itemsize] + forma[:0:-1])[::-1]) if forma else []
+            if dims and forma[0] == 0:
+                forma[0] = self.registros
+                strides[0] = tamanho_registro
+            array = np.ndarray(tuple(forma), dtype=tipo, buffer=self._mapa,
+                               offset=inicio, strides=tuple(int(s) for s in strides))
+            variaveis[nome] = (nomes_dims, array, atributos)
+        return variaveis
+
+
+# ============================================================================
+# ACESSO UNIFORME ÀS VARIÁVEIS
+# ============================================================================
+
+def _decodificar(valores, atributos):
+    """
+    _FillValue/missing_value -> NaN e scale_factor/add_offset (CF)
+    Sem _FillValue, vale o preenchimento padrão do tipo no NetCDF
+    """
+    valores = np.asarray(valores)
+    dados = valores.astype(np.float64)
+    preenchimentos = [atributos[chave] for chave in ('_FillValue', 'missing_value') if chave in atributos]
+    padrao = _PREENCHIMENTO_PADRAO.get((valores.dtype.kind, valores.dtype.itemsize))
+    if '_FillValue' not in atributos and padrao is not None:
+        preenchimentos.append(np.asarray(padrao, dtype=valores.dtype))
+    for preenchimento in preenchimentos:
+        dados[np.isin(valores, preenchimento)] = np.nan
+    return dados * atributos.get('scale_factor', 1.0) + atributos.get('add_offset', 0.0)
+
+
+def _tempo_cf(valores, unidades):
+    """'days since 1950-01-01 00:00:00' -> datetime64[s]"""
+    unidade, base = unidades.split(' since ')
+    segundos = {'seconds': 1, 'minutes': 60, 'hours': 3600, 'days': 86400}[unidade.strip().lower()]
+    base = np.datetime64(base.strip().replace(' ', 'T')[:19].rstrip('Z'), 's')
+    return base + (np.asarray(valores, dtype=np.float64) * segundos).astype('timedelta64[s]')
+
+
+class VariavelGrade:
+    """
+    Variável de uma grade aberta: dims + ler(selecao), onde selecao mapeia
+    dimensão -> slice/índice; só a fatia pedida é lida do disco
+    """
+
+    def __init__(self, dims, origem, atributos=None, decodificada=False):
+        self.dims = tuple(dims)
+        self.forma = dict(zip(self.dims, origem.shape))
+        self._origem = origem
+        self._atributos = atributos or {}
+        self._decodificada = decodificada
+
+    def ler(self, selecao):
+        """Fatia decodificada, com os eixos na ordem de self.dims (menos os selecionados por índice)"""
+        if self._decodificada:  # xarray: leitura preguiçosa já aplica máscara e escala
+            return np.asarray(self._origem.isel(selecao).values, dtype=np.float64)
+        indices = tuple(selecao.get(d, slice(None)) for d in self.dims)
+        return _decodificar(self._origem[indices], self._atributos)
+
+
+def _primeiro(nomes, disponiveis):
+    return next((n for n in nomes if n in disponiveis), None)
+
+
+def abrir_grade(caminho):
+    """
+    Abre um arquivo Copernicus e devolve coordenadas (lat, lon, tempo,
+    profundidade) e as variáveis de VARIAVEIS_GRADE presentes
+    NetCDF3 é mapeado direto; NetCDF4/HDF5 e Zarr exigem xarray
+    """
+    try:
+        leitor = LeitorNetCDF3(caminho) if os.path.isfile(caminho) else None
+    except ValueError:
+        leitor = None
+
+    if leitor is not None:
+        brutas = leitor.variaveis
+        coordenada = lambda nome: _decodificar(brutas[nome][1], brutas[nome][2]) if nome else None
+        variaveis = {nome: VariavelGrade(brutas[nome][0], brutas[nome][1], brutas[nome][2])
+                     for nome in VARIAVEIS_GRADE if nome in brutas}
+        nome_tempo = _primeiro(NOMES_TEMPO, brutas)
+        tempo = None
+        if nome_tempo:
+            tempo = _tempo_cf(brutas[nome_tempo][1], brutas[nome_tempo][2].get('units', 'days since 1970-01-01'))
+        titulo = leitor.atributos.get('title')
+    else:
+        if xr is None:
+            raise ImportError(f"{caminho}: NetCDF4/Zarr requer xarray (pip install xarray netCDF4 zarr)")
+        if os.path.isdir(caminho):
+            conjunto = xr.open_zarr(caminho)
+        else:
+            conjunto = xr.open_dataset(caminho)
+        brutas = conjunto.variables
+        coordenada = lambda nome: np.asarray(conjunto[nome].values, dtype=np.float64) if nome else None
+        variaveis = {nome: VariavelGrade(conjunto[nome].dims, conjunto[nome], decodificada=True)
+                     for nome in VARIAVEIS_GRADE if nome in conjunto.data_vars}
+        nome_tempo = _primeiro(NOMES_TEMPO, brutas)
+        tempo = conjunto[nome_tempo].values.astype('datetime64[s]') if nome_tempo else None
+        titulo = conjunto.attrs.get('title')
+
+    nomes = {
+        'latitude': _primeiro(NOMES_LATITUDE, brutas),
+        'longitude': _primeiro(NOMES_LONGITUDE, brutas),
+        'tempo': nome_tempo,
+        'profundidade': _primeiro(NOMES_PROFUNDIDADE, brutas)
+    }
+    longitude = coordenada(nomes['longitude'])
+    if longitude is not None and longitude.size and np.nanmax(longitude) > 180:
+        longitude = (longitude + 180.0) % 360.0 - 180.0  # grades 0..360 -> -180..180, como as caixas
+    return {
+        'titulo': titulo,
+        'nomes': nomes,
+        'latitude': coordenada(nomes['latitude']),
+        'longitude': longitude,
+        'profundidade': coordenada(nomes['profundidade']),
+        'tempo': tempo,
+        'variaveis': variaveis
+    }
+
+
+# ============================================================================
+# RECORTE E RESUMOS
+# ============================================================================
+
+def recorte(coordenada, minimo, maximo):
+    """slice contíguo dos índices com minimo <= coordenada <= maximo (eixo crescente ou decrescente)"""
+    dentro = np.flatnonzero((coordenada >= minimo) & (coordenada <= maximo))
+    if dentro.size == 0:
+        return slice(0, 0)
+    if dentro[-1] - dentro[0] + 1 != dentro.size:
+        # Ex.: caixa que atravessa o meridiano 0 numa grade 0..360
+        raise ValueError(f"Caixa {minimo}..{maximo} cruza a emenda do eixo da grade")
+    return slice(int(dentro[0]), int(dentro[-1]) + 1)
+
+
+def resumir_variavel(grade, nome, caixa):
+    """
+    Reduz uma variável à caixa da costa em uma passada pelos passos de tempo:
+    - por célula: média, mínimo, máximo e nº de observações no período
+    - por mês e no período todo: média regional ponderada por cos(lat)
+      (área da célula), mínimo e máximo
+    Só um bloco de passos de tempo (até MAX_BYTES_BLOCO) fica em memória;
+    com eixo de profundidade, usa o nível mais raso (superfície)
+    Os eixos são achados pelo nome das dimensões, em qualquer ordem no arquivo
+    """
+    variavel = grade['variaveis'][nome]
+    nomes = grade['nomes']
+    fatia_lat = recorte(grade['latitude'], caixa['lat_min'], caixa['lat_max'])
+    fatia_lon = recorte(grade['longitude'], caixa['lon_min'], caixa['lon_max'])
+    latitudes = grade['latitude'][fatia_lat]
+    longitudes = grade['longitude'][fatia_lon]
+    if latitudes.size == 0 or longitudes.size == 0:
+        return None
+
+    tem_tempo = nomes['tempo'] in variavel.dims
+    eixos = ([nomes['tempo']] if tem_tempo else []) + [nomes['latitude'], nomes['longitude']]
+    if not set(eixos[-2:]) <= set(variavel.dims):
+        raise ValueError(f"{nome}: dimensões {variavel.dims} sem latitude/longitude")
+
+    selecao = {nomes['latitude']: fatia_lat, nomes['longitude']: fatia_lon}
+    if nomes['profundidade'] in variavel.dims:
+        selecao[nomes['profundidade']] = 0
+    for dim in variavel.dims:
+        if dim in eixos or dim in selecao:
+            continue
+        if variavel.forma[dim] != 1:
+            raise ValueError(f"{nome}: dimensão '{dim}' ({variavel.forma[dim]}) não suportada")
+        selecao[dim] = 0
+
+    # Ordem dos eixos na fatia lida -> (tempo, lat, lon)
+    lidos = [dim for dim in variavel.dims if not isinstance(selecao.get(dim), int)]
+    transposicao = [lidos.index(dim) for dim in eixos]
+
+    forma = (latitudes.size, longitudes.size)
+    soma = np.zeros(forma)
+    contagem = np.zeros(forma, dtype=np.int64)
+    minimo = np.full(forma, np.nan)
+    maximo = np.full(forma, np.nan)
+    peso = np.broadcast_to(np.cos(np.radians(latitudes))[:, None], forma).ravel()
+    meses = {}
+
+    passos = grade['tempo'].size if tem_tempo else 1
+    por_bloco = max(1, MAX_BYTES_BLOCO // (8 * latitudes.size * longitudes.size))
+
+    for inicio in range(0, passos, por_bloco):
+        fim = min(inicio + por_bloco, passos)
+        if tem_tempo:
+            selecao[nomes['tempo']] = slice(inicio, fim)
+        bloco = variavel.ler(selecao).transpose(transposicao).reshape(fim - inicio, *forma)
+
+        validos = ~np.isnan(bloco)
+        soma += np.where(validos, bloco, 0.0).sum(axis=0)
+        contagem += validos.sum(axis=0)
+        minimo = np.fmin(minimo, np.fmin.reduce(bloco, axis=0))
+        maximo = np.fmax(maximo, np.fmax.reduce(bloco, axis=0))
+
+        if not tem_tempo:
+            continue
+
+        # Média regional de cada passo (ponderada pela área da célula) agrupada por mês
+        planos = bloco.reshape(fim - inicio, -1)
+        validos = validos.reshape(fim - inicio, -1)
+        soma_passo = (np.where(validos, planos, 0.0) * peso).sum(axis=1)
+        peso_passo = (validos * peso).sum(axis=1)
+        min_passo = np.fmin.reduce(planos, axis=1)
+        max_passo = np.fmax.reduce(planos, axis=1)
+        rotulos = grade['tempo'][inicio:fim].astype('datetime64[M]').astype(str)
+
+        for i, mes in enumerate(rotulos):
+            acumulado = meses.setdefault(mes, [0.0, 0.0, np.nan, np.nan])
+            acumulado[0] += soma_passo[i]
+            acumulado[1] += peso_passo[i]
+            acumulado[2] = np.fmin(acumulado[2], min_passo[i])
+            acumulado[3] = np.fmax(acumulado[3], max_passo[i])
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        media = soma / contagem
+
+    # Mesma ponderação da série mensal: cada observação pesa cos(lat)
+    peso_celula = np.cos(np.radians(latitudes))[:, None]
+    peso_total = float((contagem * peso_celula).sum())
+
+    return {
+        'latitude': latitudes,
+        'longitude': longitudes,
+        'media': media,
+        'minimo': minimo,
+        'maximo': maximo,
+        'contagem': contagem,
+        'media_regional': round(float((soma * peso_celula).sum() / peso_total), 3) if peso_total > 0 else None,
+        'passos_tempo': passos,
+        'profundidade_m': (float(grade['profundidade'][0])
+                           if nomes['profundidade'] in variavel.dims else None),
+        'mensal': {
+            str(mes): {
+                'media': round(float(s / p), 3) if p > 0 else None,
+                'minimo': None if np.isnan(mn) else round(float(mn), 3),
+                'maximo': None if np.isnan(mx) else round(float(mx), 3)
+            }
+            for mes, (s, p, mn, mx) in sorted(meses.items())
+        }
+    }
+
+
+def agregar_celulas(resumo, resolucao=RESOLUCAO_RESUMO_GRAUS):
+    """Médias por célula de `resolucao` graus (tabela pequena para o JSON/RAG)"""
+    linha = np.floor(resumo['latitude'] / resolucao).astype(np.int64)
+    coluna = np.floor(resumo['longitude'] / resolucao).astype(np.int64)
+    linhas, inv_lat = np.unique(linha, return_inverse=True)
+    colunas, inv_lon = np.unique(coluna, return_inverse=True)
+
+    soma = np.zeros((linhas.size, colunas.size))
+    contagem = np.zeros((linhas.size, colunas.size), dtype=np.int64)
+    indices = (inv_lat[:, None], inv_lon[None, :])
+    validos = resumo['contagem'] > 0
+    np.add.at(soma, indices, np.where(validos, resumo['media'] * resumo['contagem'], 0.0))
+    np.add.at(contagem, indices, resumo['contagem'])
+
+    celulas = []
+    for i, j in zip(*np.nonzero(contagem)):
+        celulas.append({
+            'lat': round(float((linhas[i] + 0.5) * resolucao), 2),
+            'lon': round(float((colunas[j] + 0.5) * resolucao), 2),
+            'media': round(float(soma[i, j] / contagem[i, j]), 3)
+        })
+    return celulas
+
+
+def ingerir_arquivo(caminho, caixa, destino=DIR_GRADES):
+    """
+    Resume todas as variáveis conhecidas de um arquivo Copernicus
+    Grava a grade fina (média/mín/máx por célula) em <destino>/<arquivo>_<var>.npz
+    e devolve a entrada de produto para o JSON da fonte
+    """
+    grade = abrir_grade(caminho)
+    base = os.path.splitext(os.path.basename(caminho.rstrip('/')))[0]
+    os.makedirs(destino, exist_ok=True)
+
+    variaveis = []
+    for nome, (descricao, unidade) in VARIAVEIS_GRADE.items():
+        if nome not in grade['variaveis']:
+            continue
+        resumo = resumir_variavel(grade, nome, caixa)
+        if resumo is None:
+            continue
+
+        arquivo_celulas = os.path.join(destino, f"{base}_{nome}.npz")
+        np.savez_compressed(arquivo_celulas, latitude=resumo['latitude'], longitude=resumo['longitude'],
+                            media=resumo['media'].astype(np.float32), minimo=resumo['minimo'].astype(np.float32),
+                            maximo=resumo['maximo'].astype(np.float32), contagem=resumo['contagem'])
+
+        validos = resumo['contagem'] > 0
+        variaveis.append({
+            'variavel': nome,
+            'descricao': descricao,
+            'unidade': unidade,
+            'profundidade_m': resumo['profundidade_m'],
+            'passos_tempo': resumo['passos_tempo'],
+            'celulas_grade': int(validos.sum()),
+            'media_regional': resumo['media_regional'],
+            'minimo': None if not validos.any() else round(float(np.nanmin(resumo['minimo'])), 3),
+            'maximo': None if not validos.any() else round(float(np.nanmax(resumo['maximo'])), 3),
+            'mensal': resumo['mensal'],
+            'celulas': agregar_celulas(resumo),
+            'arquivo_celulas': arquivo_celulas
+        })
+
+    return {
+        'produto': grade['titulo'] or base,
+        'produto_id': base,
+        'variaveis': [v['descricao'] for v in variaveis],
+        'arquivo_origem': os.path.basename(caminho.rstrip('/')),
+        'resumos': variaveis
+    }
+
+
+def arquivos_locais(diretorio=DIR_COPERNICUS_ENTRADA):
+    """Arquivos .nc e diretórios .zarr baixados do portal Copernicus"""
+    if not os.path.isdir(diretorio):
+        return []
+    return sorted(os.path.join(diretorio, nome) for nome in os.listdir(diretorio)
+                  if nome.endswith(('.nc', '.nc4', '.zarr')))
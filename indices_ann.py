@@ -0,0 +1,359 @@
+"""
+Índices Vetoriais do RAG (FAISS)
+Flat (exato), IVF-Flat, HNSW e IVF-PQ, escolhidos pelo tamanho do corpus,
+armazenamento quantizado (SQ int8/fp16, PQ) com reordenação exata opcional
+a partir dos vetores float32 em disco, e um benchmark de tempo de construção,
+tamanho, RSS, latência e recall@k contra a busca exata
+
+Uso:
+    python indices_ann.py                       # embeddings do cache em disco
+    python indices_ann.py --sintetico 200000    # vetores sintéticos
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+import faiss
+import numpy as np
+
+
+# ============================================================================
+# CONFIGURAÇÕES
+# ============================================================================
+
+TIPOS_INDICE = ('flat', 'ivf_flat', 'hnsw', 'ivf_pq', 'sq8', 'sq_fp16', 'pq')
+QUANTIZADOS = ('ivf_pq', 'sq8', 'sq_fp16', 'pq')  # distâncias aproximadas: vale reordenar
+
+# Escolha automática pelo número de vetores
+LIMITE_FLAT = 20000       # abaixo disso a busca exata já responde em poucos ms
+LIMITE_IVF_FLAT = 500000  # acima disso os vetores float32 não cabem bem na RAM
+
+HNSW_M = 32               # vizinhos por nó do grafo
+HNSW_EF_CONSTRUCAO = 80
+HNSW_EF_BUSCA = 64
+IVF_NPROBE = 16           # listas visitadas por consulta
+PQ_DIMS_POR_SUBVETOR = 16  # 768 dims -> 48 subvetores de 8 bits (48 bytes por vetor)
+PQ_BITS = 8               # 2^8 centróides por subvetor: o treino exige ao menos 256 vetores
+PONTOS_POR_LISTA = 39     # mínimo de vetores de treino por lista que o FAISS recomenda
+AMOSTRA_TREINO_MAX = 100000
+FATOR_REORDENACAO = 4     # candidatos buscados por resultado antes da reordenação exata
+
+
+def tipo_automatico(n: int) -> str:
+    """Tipo de índice para um corpus de n vetores"""
+    if n < LIMITE_FLAT:
+        return 'flat'
+    if n < LIMITE_IVF_FLAT:
+        return 'ivf_flat'
+    return 'ivf_pq'
+
+
+def _num_listas(n: int) -> int:
+    """~4·√n listas, sem passar de n / PONTOS_POR_LISTA"""
+    return max(1, min(int(4 * np.sqrt(n)), n // PONTOS_POR_LISTA))
+
+
+def _subvetores_pq(dimensao: int) -> int:
+    """Maior divisor de dimensao que não passa de dimensao / PQ_DIMS_POR_SUBVETOR"""
+    subvetores = max(1, dimensao // PQ_DIMS_POR_SUBVETOR)
+    while dimensao % subvetores:
+        subvetores -= 1
+    return subvetores
+
+
+def _minimo_treino(tipo: str, n: int) -> int:
+    """PQ precisa de 2^PQ_BITS vetores por subquantizador e IVF de um por lista"""
+    minimo = 0
+    if tipo in ('ivf_flat', 'ivf_pq'):
+        minimo = _num_listas(n)
+    if tipo in ('ivf_pq', 'pq'):
+        minimo = max(minimo, 2 ** PQ_BITS)
+    return minimo
+
+
+def tipo_efetivo(tipo: str, n: int) -> str:
+    """
+    Tipo que construir_indice(tipo, ...) produz para n vetores: 'auto'
+    resolvido pelo tamanho e, quando n não basta para o treino, o substituto
+    sem treino (SQ8 para os quantizados, Flat para os demais)
+    """
+    if tipo == 'auto':
+        tipo = tipo_automatico(n)
+    if n >= _minimo_treino(tipo, n):
+        return tipo
+    return 'sq8' if tipo in QUANTIZADOS else 'flat'
+
+
+def _descricao_fabrica(tipo: str, dimensao: int, n: int) -> str:
+    """String do faiss.index_factory (sempre com IDs estáveis via IDMap2)"""
+    if tipo == 'flat':
+        return 'IDMap2,Flat'
+    if tipo == 'ivf_flat':
+        return f'IDMap2,IVF{_num_listas(n)},Flat'
+    if tipo == 'hnsw':
+        return f'IDMap2,HNSW{HNSW_M}'
+    if tipo == 'sq8':
+        return 'IDMap2,SQ8'
+    if tipo == 'sq_fp16':
+        return 'IDMap2,SQfp16'
+    if tipo == 'pq':
+        return f'IDMap2,PQ{_subvetores_pq(dimensao)}x{PQ_BITS}'
+    if tipo == 'ivf_pq':
+        return f'IDMap2,IVF{_num_listas(n)},PQ{_subvetores_pq(dimensao)}x{PQ_BITS}'
+    raise ValueError(f"Tipo de índice desconhecido: {tipo} (use {', '.join(TIPOS_INDICE)})")
+
+
+# ============================================================================
+# CONSTRUÇÃO
+# ============================================================================
+
+def construir_indice(tipo: str, vetores: np.ndarray, ids: np.ndarray, semente: int = 42):
+    """
+    Índice (IndexIDMap2) do tipo pedido ('auto' escolhe pelo tamanho)
+    com os vetores já adicionados; IVF e PQ são treinados numa amostra e,
+    em corpus pequenos demais para o treino, viram SQ8/Flat com um aviso
+    """
+    vetores = np.ascontiguousarray(vetores, dtype=np.float32)
+    n, dimensao = vetores.shape
+    if tipo == 'auto':
+        tipo = tipo_automatico(n)
+    if tipo not in TIPOS_INDICE:
+        raise ValueError(f"Tipo de índice desconhecido: {tipo} (use {', '.join(TIPOS_INDICE)})")
+    efetivo = tipo_efetivo(tipo, n)
+    if efetivo != tipo:
+        print(f"⚠️  {n} vetores não bastam para treinar '{tipo}' (mínimo {_minimo_treino(tipo, n)}); "
+              f"usando '{efetivo}'")
+        tipo = efetivo
+
+    indice = faiss.index_factory(dimensao, _descricao_fabrica(tipo, dimensao, n))
+    base = faiss.downcast_index(indice.index)
+
+    if tipo == 'hnsw':
+        base.hnsw.efConstruction = HNSW_EF_CONSTRUCAO
+        base.hnsw.efSearch = HNSW_EF_BUSCA
+
+    if not indice.is_trained:
+        amostra = vetores
+        if n > AMOSTRA_TREINO_MAX:
+            escolhidos = np.random.default_rng(semente).choice(n, AMOSTRA_TREINO_MAX, replace=False)
+            amostra = vetores[np.sort(escolhidos)]
+        indice.train(amostra)
+        if hasattr(base, 'nprobe'):
+            base.nprobe = IVF_NPROBE  # gravado junto com o índice
+
+    indice.add_with_ids(vetores, np.asarray(ids, dtype=np.int64))
+    return indice
+
+
+def tipo_do_indice(indice) -> str:
+    """Tipo ('flat', 'ivf_flat', ...) de um índice construído ou lido do disco"""
+    base = faiss.downcast_index(indice.index if hasattr(indice, 'id_map') else indice)
+    if isinstance(base, faiss.IndexScalarQuantizer):
+        return 'sq_fp16' if base.sq.qtype == faiss.ScalarQuantizer.QT_fp16 else 'sq8'
+    nomes = {
+        'IndexFlat': 'flat',
+        'IndexFlatL2': 'flat',
+        'IndexIVFFlat': 'ivf_flat',
+        'IndexHNSWFlat': 'hnsw',
+        'IndexIVFPQ': 'ivf_pq',
+        'IndexPQ': 'pq'
+    }
+    return nomes.get(type(base).__name__, type(base).__name__)
+
+
+def aceita_remocao(indice) -> bool:
+    """HNSW não remove vetores: atualizações exigem reconstruir o índice"""
+    return tipo_do_indice(indice) != 'hnsw'
+
+
+def tamanho_indice(indice) -> int:
+    """Bytes do índice serializado (≈ memória ocupada)"""
+    return int(faiss.serialize_index(indice).nbytes)
+
+
+# ============================================================================
+# REORDENAÇÃO EXATA
+# ============================================================================
+
+def reordenar(consulta: np.ndarray, ids: np.ndarray, vetores: np.ndarray, k: int):
+    """
+    Recalcula a distância L2 exata de uma consulta aos candidatos de um
+    índice quantizado e devolve (distâncias, ids) dos k mais próximos
+    vetores: float32 dos candidatos, na ordem de ids (ex.: linhas de um memmap)
+    """
+    distancias = ((np.asarray(vetores, dtype=np.float32) - consulta[None, :]) ** 2).sum(axis=1)
+    ordem = np.argsort(distancias, kind='stable')[:k]
+    return distancias[ordem], ids[ordem]
+
+
+def buscar_reordenado(indice, consultas: np.ndarray, k: int, vetores_exatos: Callable,
+                      fator: int = FATOR_REORDENACAO):
+    """
+    index.search por k·fator candidatos + reordenação exata; vetores_exatos(ids)
+    devolve os float32 dos ids (ou None, mantendo a ordem aproximada)
+    """
+    distancias, vizinhos = indice.search(consultas, k * fator)
+    saida_d = np.full((len(consultas), k), np.inf, dtype=np.float32)
+    saida_i = np.full((len(consultas), k), -1, dtype=np.int64)
+
+    for linha, (consulta, candidatos, aproximadas) in enumerate(zip(consultas, vizinhos, distancias)):
+        validos = candidatos >= 0
+        candidatos = candidatos[validos]
+        vetores = vetores_exatos(candidatos) if len(candidatos) else None
+        if vetores is None:
+            d, i = aproximadas[validos][:k], candidatos[:k]
+        else:
+            d, i = reordenar(consulta, candidatos, vetores, k)
+        saida_d[linha, :len(d)] = d
+        saida_i[linha, :len(i)] = i
+
+    return saida_d, saida_i
+
+
+# ============================================================================
+# MEMÓRIA RESIDENTE (RSS)
+# ============================================================================
+
+def rss_atual_mb() -> float:
+    """RSS do processo em MB (Linux: /proc; demais: pico do getrusage)"""
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for linha in f:
+                if linha.startswith('VmRSS:'):
+                    return int(linha.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def rss_indice_mb(caminho: str) -> float:
+    """
+    RSS que o índice gravado em `caminho` acrescenta a um processo novo
+    (o mesmo custo que cada worker do Streamlit paga ao carregá-lo)
+    """
+    processo = subprocess.run([sys.executable, os.path.abspath(__file__), '--medir-rss', caminho],
+                              capture_output=True, text=True, check=True)
+    return float(processo.stdout.strip().splitlines()[-1])
+
+
+# ============================================================================
+# BENCHMARK
+# ============================================================================
+
+def _medir_buscas(consultas, buscar_uma):
+    """Latência (ms) e vizinhos de cada consulta, uma por vez como no app"""
+    latencias = []
+    encontrados = []
+    for consulta in consultas:
+        inicio = time.perf_counter()
+        _, vizinhos = buscar_uma(consulta[None, :])
+        latencias.append((time.perf_counter() - inicio) * 1000)
+        encontrados.append(vizinhos[0])
+    return latencias, np.array(encontrados)
+
+
+def comparar_indices(vetores: np.ndarray, consultas: np.ndarray, k: int = 10,
+                     tipos: List[str] = TIPOS_INDICE, medir_rss: bool = True) -> List[Dict]:
+    """
+    Constrói cada tipo sobre os mesmos vetores e mede construção, tamanho,
+    RSS ao carregar, latência por consulta (p50/p99) e recall@k contra o
+    Flat exato; tipos quantizados ganham uma linha '+reordenado', que busca
+    k·FATOR_REORDENACAO candidatos e reordena pelos float32 em um memmap
+    """
+    vetores = np.ascontiguousarray(vetores, dtype=np.float32)
+    consultas = np.ascontiguousarray(consultas, dtype=np.float32)
+    ids = np.arange(len(vetores), dtype=np.int64)
+    exatos = None
+    resultados = []
+
+    with tempfile.TemporaryDirectory(prefix='indices_') as temporario:
+        # Vetores exatos em disco, como no cache de embeddings
+        caminho_vetores = os.path.join(temporario, 'vetores.f32')
+        vetores.tofile(caminho_vetores)
+        em_disco = np.memmap(caminho_vetores, dtype=np.float32, mode='r', shape=vetores.shape)
+
+        for tipo in dict.fromkeys(('flat', *tipos)):
+            inicio = time.perf_counter()
+            indice = construir_indice(tipo, vetores, ids)
+            construcao = time.perf_counter() - inicio
+
+            caminho_indice = os.path.join(temporario, tipo)
+            faiss.write_index(indice, caminho_indice)
+            rss = rss_indice_mb(caminho_indice) if medir_rss else None
+
+            variantes = [(tipo, lambda q: indice.search(q, k))]
+            if tipo in QUANTIZADOS:
+                variantes.append((f"{tipo}+reordenado",
+                                  lambda q: buscar_reordenado(indice, q, k, lambda c: em_disco[c])))
+
+            for nome, buscar_uma in variantes:
+                latencias, encontrados = _medir_buscas(consultas, buscar_uma)
+                if exatos is None:
+                    exatos = encontrados
+                recall = np.mean([len(set(a) & set(b)) / k for a, b in zip(encontrados, exatos)])
+
+                resultados.append({
+                    'tipo': nome,
+                    'construcao_s': round(construcao, 3),
+                    'tamanho_mb': round(os.path.getsize(caminho_indice) / 1e6, 2),
+                    'rss_mb': None if rss is None else round(rss, 1),
+                    'p50_ms': round(float(np.percentile(latencias, 50)), 3),
+                    'p99_ms': round(float(np.percentile(latencias, 99)), 3),
+                    f'recall@{k}': round(float(recall), 4)
+                })
+
+    return resultados
+
+
+def vetores_sinteticos(n: int, dimensao: int = 768, grupos: int = 200, semente: int = 42) -> np.ndarray:
+    """Vetores agrupados (mistura de gaussianas), mais parecidos com embeddings que ruído uniforme"""
+    gerador = np.random.default_rng(semente)
+    centros = gerador.normal(size=(grupos, dimensao)).astype(np.float32)
+    rotulos = gerador.integers(0, grupos, size=n)
+    return centros[rotulos] + 0.5 * gerador.normal(size=(n, dimensao)).astype(np.float32)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark dos tipos de índice FAISS")
+    parser.add_argument('--sintetico', type=int, metavar='N',
+                        help='Usa N vetores sintéticos em vez do cache de embeddings')
+    parser.add_argument('--consultas', type=int, default=500)
+    parser.add_argument('-k', type=int, default=10)
+    parser.add_argument('--tipos', nargs='+', choices=TIPOS_INDICE, default=list(TIPOS_INDICE))
+    parser.add_argument('--sem-rss', action='store_true', help='Não mede o RSS (um processo por tipo)')
+    parser.add_argument('--medir-rss', metavar='INDICE', help=argparse.SUPPRESS)  # usado por rss_indice_mb
+    args = parser.parse_args()
+
+    if args.medir_rss:
+        antes = rss_atual_mb()
+        indice = faiss.read_index(args.medir_rss)
+        print(rss_atual_mb() - antes)
+        sys.exit(0)
+
+    if args.sintetico:
+        todos = vetores_sinteticos(args.sintetico + args.consultas)
+    else:
+        from cache_embeddings import CacheEmbeddings
+        from modelo_embeddings import MODELO_EMBEDDINGS
+        todos = np.array(CacheEmbeddings(MODELO_EMBEDDINGS).vetores())
+
+    if len(todos) <= args.consultas:
+        raise SystemExit(f"❌ Só {len(todos)} vetores; use --sintetico N ou reduza --consultas")
+
+    # Consultas separadas da base (não estão no índice)
+    base, consultas = todos[:-args.consultas], todos[-args.consultas:]
+    print(f"🔍 {len(base):,} vetores de {base.shape[1]} dims, {len(consultas)} consultas, k={args.k}")
+    print(f"   Escolha automática para este tamanho: {tipo_automatico(len(base))}\n")
+
+    print(f"{'tipo':<18} {'construção':>11} {'tamanho':>10} {'RSS':>10} {'p50':>9} {'p99':>9} "
+          f"{'recall@' + str(args.k):>10}")
+    for r in comparar_indices(base, consultas, args.k, args.tipos, medir_rss=not args.sem_rss):
+        rss = f"{r['rss_mb']:>8.1f}MB" if r['rss_mb'] is not None else f"{'-':>10}"
+        print(f"{r['tipo']:<18} {r['construcao_s']:>10.2f}s {r['tamanho_mb']:>8.1f}MB {rss} "
+              f"{r['p50_ms']:>7.3f}ms {r['p99_ms']:>7.3f}ms {r[f'recall@{args.k}']:>10.3f}")
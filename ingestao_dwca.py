@@ -0,0 +1,208 @@
+"""
+Ingestão de Darwin Core Archives (exportações em lote do GBIF/OBIS)
+Lê o zip direto do disco, linha a linha (meta.xml + occurrence.txt), sem
+descompactar nem carregar o arquivo inteiro em memória
+"""
+
+import csv
+import io
+import os
+import sys
+import xml.etree.ElementTree as ET
+import zipfile
+
+
+# ============================================================================
+# CONFIGURAÇÕES
+# ============================================================================
+
+# Mesma caixa do polígono usado nas consultas à API do OBIS (ZEE simplificada)
+CAIXA_ZEE_BRASIL = {'lat_min': -35.0, 'lat_max': 5.0, 'lon_min': -50.0, 'lon_max': -30.0}
+
+NS_DWC_TEXT = '{http://rs.tdwg.org/dwc/text/}'
+TIPO_OCORRENCIA = 'http://rs.tdwg.org/dwc/terms/Occurrence'
+
+# Termos numéricos (o texto do arquivo vira float/int, como nas respostas da API)
+TERMOS_FLOAT = {
+    'decimalLatitude', 'decimalLongitude', 'coordinateUncertaintyInMeters',
+    'depth', 'minimumDepthInMeters', 'maximumDepthInMeters',
+    'temperature', 'salinity'
+}
+TERMOS_INT = {'gbifID'}
+
+# Linhas de occurrence.txt podem ter campos longos (ex.: occurrenceRemarks)
+csv.field_size_limit(min(sys.maxsize, 2**31 - 1))
+
+
+# ============================================================================
+# META.XML
+# ============================================================================
+
+def _nome_termo(termo):
+    """http://rs.tdwg.org/dwc/terms/decimalLatitude -> decimalLatitude"""
+    return termo.rstrip('/').rsplit('/', 1)[-1].rsplit('#', 1)[-1]
+
+
+def _caractere(valor, padrao):
+    """Decodifica '\\t', '\\n' etc. dos atributos do meta.xml"""
+    if valor is None:
+        return padrao
+    return valor.encode('utf-8').decode('unicode_escape')
+
+
+def ler_meta(arquivo_zip):
+    """
+    Descreve o arquivo de ocorrências do archive: nome no zip, separadores,
+    linhas de cabeçalho, codificação, colunas (índice -> termo) e valores padrão
+    Ocorrências podem ser o core ou uma extensão (archives do OBIS com core Event)
+    Sem meta.xml, assume occurrence.txt separado por tab com cabeçalho
+    """
+    nomes = arquivo_zip.namelist()
+    if 'meta.xml' not in nomes:
+        if 'occurrence.txt' not in nomes:
+            raise ValueError("Archive sem meta.xml e sem occurrence.txt")
+        return {
+            'arquivo': 'occurrence.txt',
+            'separador': '\t',
+            'delimitador': '',
+            'cabecalho': 1,
+            'codificacao': 'utf-8',
+            'colunas': None,
+            'padroes': {}
+        }
+
+    raiz = ET.fromstring(arquivo_zip.read('meta.xml'))
+    candidatos = [raiz.find(f'{NS_DWC_TEXT}core')] + raiz.findall(f'{NS_DWC_TEXT}extension')
+    secao = next((s for s in candidatos if s is not None and s.get('rowType') == TIPO_OCORRENCIA), None)
+    if secao is None:
+        raise ValueError("meta.xml não descreve um arquivo de ocorrências")
+
+    colunas = {}
+    padroes = {}
+    for campo in secao.findall(f'{NS_DWC_TEXT}field'):
+        termo = _nome_termo(campo.get('term', ''))
+        if campo.get('index') is not None:
+            colunas[int(campo.get('index'))] = termo
+        elif campo.get('default') is not None:
+            padroes[termo] = campo.get('default')
+
+    # <id> do core identifica a ocorrência; <coreid> de uma extensão aponta
+    # para o evento (core Event), não para a ocorrência
+    for marcador, termo in (('id', 'id'), ('coreid', 'eventID')):
+        identificador = secao.find(f'{NS_DWC_TEXT}{marcador}')
+        if identificador is not None and identificador.get('index') is not None:
+            colunas.setdefault(int(identificador.get('index')), termo)
+
+    return {
+        'arquivo': secao.find(f'{NS_DWC_TEXT}files/{NS_DWC_TEXT}location').text.strip(),
+        'separador': _caractere(secao.get('fieldsTerminatedBy'), ','),
+        'delimitador': _caractere(secao.get('fieldsEnclosedBy'), '"'),
+        'cabecalho': int(secao.get('ignoreHeaderLines', 0)),
+        'codificacao': secao.get('encoding', 'utf-8'),
+        'colunas': colunas,
+        'padroes': padroes
+    }
+
+
+# ============================================================================
+# LEITURA EM STREAMING
+# ============================================================================
+
+def _converter(termo, valor):
+    if valor is None:
+        return None
+    valor = valor.strip()
+    if valor == '':
+        return None
+    try:
+        if termo in TERMOS_FLOAT:
+            return float(valor)
+        if termo in TERMOS_INT:
+            return int(valor)
+    except ValueError:
+        return None
+    return valor
+
+
+def linhas_dwca(caminho):
+    """
+    Gera cada ocorrência do archive como dict termo -> valor (vazios = None)
+    Memória constante: o zip é lido como stream e só a linha atual fica em RAM
+    """
+    with zipfile.ZipFile(caminho) as arquivo_zip:
+        meta = ler_meta(arquivo_zip)
+
+        with arquivo_zip.open(meta['arquivo']) as bruto:
+            texto = io.TextIOWrapper(bruto, encoding=meta['codificacao'], errors='replace', newline='')
+            if meta['delimitador']:
+                leitor = csv.reader(texto, delimiter=meta['separador'], quotechar=meta['delimitador'])
+            else:
+                leitor = csv.reader(texto, delimiter=meta['separador'], quoting=csv.QUOTE_NONE)
+
+            colunas = meta['colunas']
+            for _ in range(meta['cabecalho']):
+                cabecalho = next(leitor, [])
+                if colunas is None:
+                    colunas = {i: _nome_termo(nome) for i, nome in enumerate(cabecalho)}
+
+            padroes = {termo: _converter(termo, valor) for termo, valor in meta['padroes'].items()}
+            for valores in leitor:
+                if not valores:
+                    continue
+                linha = dict(padroes)
+                for indice, termo in colunas.items():
+                    if indice < len(valores):
+                        linha[termo] = _converter(termo, valores[indice])
+                yield linha
+
+
+# ============================================================================
+# FILTRO E MAPEAMENTO
+# ============================================================================
+
+def na_caixa(linha, caixa=CAIXA_ZEE_BRASIL):
+    """True se a ocorrência tem coordenadas dentro da caixa"""
+    latitude = linha.get('decimalLatitude')
+    longitude = linha.get('decimalLongitude')
+    if latitude is None or longitude is None:
+        return False
+    return (caixa['lat_min'] <= latitude <= caixa['lat_max']
+            and caixa['lon_min'] <= longitude <= caixa['lon_max'])
+
+
+def nome_especie(linha):
+    """
+    Binômio da ocorrência: coluna species (exportações do GBIF) ou as duas
+    primeiras palavras de scientificName (sem autor e ano)
+    """
+    if linha.get('species'):
+        return linha['species']
+    partes = (linha.get('scientificName') or '').split()
+    if len(partes) >= 2 and partes[1][:1].islower():
+        return f"{partes[0]} {partes[1]}"
+    return None
+
+
+def para_registro_api(linha, fonte):
+    """
+    Ajusta a linha DwC ao formato das respostas da API da fonte, para que
+    normalizar_registro_gbif/obis produzam exatamente o mesmo esquema
+    (os nomes de campo das APIs já são termos Darwin Core)
+    """
+    registro = dict(linha)
+    if fonte == 'gbif':
+        registro['key'] = linha.get('gbifID')
+        return registro
+
+    registro['id'] = linha.get('id') or linha.get('occurrenceID')
+    if registro.get('depth') is None:
+        profundidades = [p for p in (linha.get('minimumDepthInMeters'),
+                                     linha.get('maximumDepthInMeters')) if p is not None]
+        if profundidades:
+            registro['depth'] = sum(profundidades) / len(profundidades)
+    return registro
+
+
+def descrever_archive(caminho):
+    """Resumo curto para logs: nome e tamanho do zip"""
+    return f"{os.path.basename(caminho)} ({os.path.getsize(caminho) / 1e6:.1f} MB)"
@@ -0,0 +1,123 @@
+"""
+Micro-lotes de Embeddings entre Sessões
+Pedidos de encode de várias threads (sessões do Streamlit) que chegam dentro
+de uma janela de poucos ms são agrupados em um único model.encode em batch,
+em vez de dezenas de forward passes de 1 query disputando os núcleos
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, List
+
+import numpy as np
+
+
+# ============================================================================
+# CONFIGURAÇÕES
+# ============================================================================
+
+LOTE_MAXIMO = 32       # textos por forward pass
+ESPERA_MAXIMA_MS = 2   # quanto o primeiro pedido espera por companhia
+
+
+_FIM = object()
+
+
+class CodificadorEmLote:
+    """
+    Serviço de encode compartilhado pelo processo: codificar() enfileira o
+    pedido e bloqueia; uma thread junta os pedidos até lote_maximo textos ou
+    espera_maxima_ms desde o primeiro e faz uma única chamada a `funcao`
+    Depois de fechar(), quem ainda tem a referência codifica direto, sem lote
+    """
+
+    def __init__(self, funcao: Callable[[List[str]], np.ndarray],
+                 lote_maximo: int = LOTE_MAXIMO, espera_maxima_ms: float = ESPERA_MAXIMA_MS):
+        self.funcao = funcao
+        self.lote_maximo = lote_maximo
+        self.espera_maxima = espera_maxima_ms / 1000
+        self.estatisticas = {'pedidos': 0, 'textos': 0, 'lotes': 0}
+        self._fila = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._fechado = False
+
+    def codificar(self, textos: List[str]) -> np.ndarray:
+        """Embeddings float32 de textos, calculados junto com os pedidos concorrentes"""
+        with self._lock:
+            if self._fechado:
+                futuro = None
+            else:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._laco, name='codificador-em-lote', daemon=True)
+                    self._thread.start()
+                # Enfileirado sob o lock: nenhum pedido entra na fila depois do _FIM
+                futuro = Future()
+                self._fila.put((list(textos), futuro))
+
+        if futuro is None:
+            return np.asarray(self.funcao(list(textos)), dtype=np.float32)
+        return futuro.result()
+
+    def _juntar(self, primeiro):
+        """Pedidos do próximo lote; o segundo valor indica que fechar() foi chamado"""
+        pedidos = [primeiro]
+        quantidade = len(primeiro[0])
+        prazo = time.perf_counter() + self.espera_maxima
+
+        while quantidade < self.lote_maximo:
+            restante = prazo - time.perf_counter()
+            if restante <= 0:
+                break
+            try:
+                pedido = self._fila.get(timeout=restante)
+            except queue.Empty:
+                break
+            if pedido is _FIM:
+                return pedidos, True
+            pedidos.append(pedido)
+            quantidade += len(pedido[0])
+
+        return pedidos, False
+
+    def _laco(self):
+        while True:
+            primeiro = self._fila.get()
+            if primeiro is _FIM:
+                return
+            pedidos, encerrar = self._juntar(primeiro)
+
+            textos = [texto for textos_pedido, _ in pedidos for texto in textos_pedido]
+            try:
+                vetores = np.asarray(self.funcao(textos), dtype=np.float32)
+            except BaseException as erro:  # repassado a quem pediu
+                for _, futuro in pedidos:
+                    futuro.set_exception(erro)
+            else:
+                inicio = 0
+                for textos_pedido, futuro in pedidos:
+                    futuro.set_result(vetores[inicio:inicio + len(textos_pedido)])
+                    inicio += len(textos_pedido)
+
+            with self._lock:
+                self.estatisticas['pedidos'] += len(pedidos)
+                self.estatisticas['textos'] += len(textos)
+                self.estatisticas['lotes'] += 1
+
+            if encerrar:
+                return
+
+    def fechar(self):
+        """
+        Recusa novos pedidos, processa os que já estão na fila e encerra a
+        thread (bloqueia até a fila esvaziar)
+        """
+        with self._lock:
+            self._fechado = True
+            thread, self._thread = self._thread, None
+            if thread is not None:
+                self._fila.put(_FIM)
+        if thread is not None:
+            thread.join()
@@ -0,0 +1,49 @@
+"""
+Modelo de Embeddings Compartilhado
+Um único SentenceTransformer por processo, carregado só quando alguém
+precisa de um embedding (ou em segundo plano, para aquecer); sobrevive
+a recargas do índice e a novas instâncias do OceanRAG
+"""
+
+import threading
+
+
+# ============================================================================
+# CONFIGURAÇÕES
+# ============================================================================
+
+MODELO_EMBEDDINGS = 'sentence-transformers/paraphrase-multilingual-mpnet-base-v2'
+
+
+_modelo = None
+_lock = threading.Lock()
+_aquecimento = None
+
+
+def obter_modelo():
+    """SentenceTransformer do processo (carregado na primeira chamada; as demais esperam)"""
+    global _modelo
+    if _modelo is None:
+        with _lock:
+            if _modelo is None:
+                print("\n🧠 Carregando modelo de embeddings...")
+                # Importado aqui: índice e metadados não dependem do torch
+                from sentence_transformers import SentenceTransformer
+                _modelo = SentenceTransformer(MODELO_EMBEDDINGS)
+                print("✅ Modelo de embeddings pronto")
+    return _modelo
+
+
+def modelo_pronto():
+    """True se o modelo já está em memória (obter_modelo() não vai bloquear)"""
+    return _modelo is not None
+
+
+def aquecer_em_segundo_plano():
+    """Começa a carregar o modelo numa thread, sem bloquear quem chama (uma vez por processo)"""
+    global _aquecimento
+    with _lock:
+        if _modelo is not None or (_aquecimento is not None and _aquecimento.is_alive()):
+            return
+        _aquecimento = threading.Thread(target=obter_modelo, name='aquecer-modelo', daemon=True)
+        _aquecimento.start()
@@ -0,0 +1,234 @@
+"""
+Pipeline em Estágios da Coleta
+busca -> normalização -> registros em disco -> deduplicação -> gravação -> índice
+Só busca e normalização se sobrepõem: uma thread baixa até PAGINAS_EM_VOO
+páginas à frente enquanto a thread da espécie normaliza e grava as anteriores
+(normalização em processos só com --processos-normalizacao); deduplicação,
+gravação colunar e índice rodam em sequência, depois da coleta
+Cada estágio conta registros, bytes e tempo para o relatório da execução
+"""
+
+import json
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+
+
+# ============================================================================
+# CONFIGURAÇÕES
+# ============================================================================
+
+DIR_EXECUCOES = 'data/execucoes'  # relatórios JSON de cada execução
+
+PROCESSOS_NORMALIZACAO = 0  # 0 = normaliza na própria thread; pool de processos só via --processos-normalizacao
+PAGINAS_EM_VOO = 4  # páginas buscadas à frente da gravação, por espécie
+
+
+# ============================================================================
+# MÉTRICAS POR ESTÁGIO
+# ============================================================================
+
+class MetricasEstagio:
+    """
+    Contadores de um estágio (seguros entre threads)
+    segundos = tempo ocupado somado; a janela inicio..fim (epoch) mede a
+    vazão real quando estágios rodam sobrepostos
+    """
+
+    def __init__(self):
+        self.registros = 0
+        self.bytes = 0
+        self.segundos = 0.0
+        self.inicio = None
+        self.fim = None
+        self._lock = threading.Lock()
+
+    def registrar(self, registros=0, bytes=0, segundos=0.0):
+        agora = time.time()
+        with self._lock:
+            self.registros += registros
+            self.bytes += bytes
+            self.segundos += segundos
+            if self.inicio is None:
+                self.inicio = agora - segundos
+            self.fim = agora
+
+    def acumular(self, outro):
+        """Soma o resumo() de outro processo (coleta em shards)"""
+        with self._lock:
+            self.registros += outro['registros']
+            self.bytes += outro['bytes']
+            self.segundos += outro['segundos_ocupado']
+            if outro['inicio'] is not None:
+                self.inicio = outro['inicio'] if self.inicio is None else min(self.inicio, outro['inicio'])
+                self.fim = outro['fim'] if self.fim is None else max(self.fim, outro['fim'])
+
+    def resumo(self):
+        janela = (self.fim - self.inicio) if self.inicio is not None else 0.0
+        return {
+            'registros': self.registros,
+            'bytes': self.bytes,
+            'segundos_ocupado': round(self.segundos, 3),
+            'segundos_janela': round(janela, 3),
+            'registros_por_s': round(self.registros / janela, 1) if janela > 0 else None,
+            'bytes_por_s': round(self.bytes / janela, 1) if janela > 0 else None,
+            'inicio': self.inicio,
+            'fim': self.fim
+        }
+
+
+class RelatorioExecucao:
+    """Métricas de todos os estágios de uma execução + gravação em JSON"""
+
+    def __init__(self):
+        self.estagios = {}
+        self._lock = threading.Lock()
+
+    def estagio(self, nome):
+        with self._lock:
+            if nome not in self.estagios:
+                self.estagios[nome] = MetricasEstagio()
+            return self.estagios[nome]
+
+    @contextmanager
+    def cronometrar(self, nome):
+        """Mede um estágio inteiro; o bloco preenche registros/bytes em metricas"""
+        metricas = {'registros': 0, 'bytes': 0}
+        inicio = time.perf_counter()
+        try:
+            yield metricas
+        finally:
+            self.estagio(nome).registrar(metricas['registros'], metricas['bytes'],
+                                         time.perf_counter() - inicio)
+
+    def resumo(self):
+        return {nome: metricas.resumo() for nome, metricas in self.estagios.items()}
+
+    def acumular(self, resumo):
+        for nome, metricas in resumo.items():
+            self.estagio(nome).acumular(metricas)
+
+    def salvar(self, extras=None, diretorio=DIR_EXECUCOES):
+        """Grava data/execucoes/coleta_<data>.json (atômico) e devolve o caminho"""
+        os.makedirs(diretorio, exist_ok=True)
+        caminho = os.path.join(diretorio, f"coleta_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+        relatorio = dict(extras or {})
+        relatorio['gerado_em'] = datetime.now().isoformat()
+        relatorio['estagios'] = self.resumo()
+
+        temporario = caminho + '.tmp'
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump(relatorio, f, ensure_ascii=False, indent=2)
+        os.replace(temporario, caminho)
+        return caminho
+
+
+# ============================================================================
+# BUSCA -> NORMALIZAÇÃO (FILA LIMITADA)
+# ============================================================================
+
+def normalizar_pagina(normalizar, resultados):
+    """Normaliza uma página (na thread da espécie ou no pool) e devolve (registros, segundos de CPU)"""
+    inicio = time.perf_counter()
+    registros = [r for r in map(normalizar, resultados) if r is not None]
+    return registros, time.perf_counter() - inicio
+
+
+_FIM = object()
+
+
+class PipelinePaginas:
+    """
+    Liga o gerador de páginas de uma espécie (busca, rede) à normalização
+    (CPU) por uma fila de até `paginas_em_voo` páginas
+    processos=0 (padrão): normaliza na thread que consome as páginas;
+    processos>0: em um pool de processos criado no primeiro uso
+    As páginas saem na ordem em que foram buscadas, então o checkpoint
+    gravado após cada página continua válido; um erro da busca é relançado
+    no consumidor e fechar o gerador interrompe a busca
+    """
+
+    def __init__(self, relatorio, processos=PROCESSOS_NORMALIZACAO, paginas_em_voo=PAGINAS_EM_VOO):
+        self.relatorio = relatorio
+        self.processos = processos
+        self.paginas_em_voo = paginas_em_voo
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _normalizar(self, normalizar, resultados):
+        if self.processos <= 0:
+            futuro = Future()
+            futuro.set_result(normalizar_pagina(normalizar, resultados))
+            return futuro
+
+        with self._lock:
+            if self._executor is None:
+                # spawn: o processo principal tem threads, sessões e SQLite abertos
+                self._executor = ProcessPoolExecutor(max_workers=self.processos,
+                                                     mp_context=multiprocessing.get_context('spawn'))
+        return self._executor.submit(normalizar_pagina, normalizar, resultados)
+
+    @staticmethod
+    def _colocar(fila, item, cancelado):
+        while not cancelado.is_set():
+            try:
+                fila.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def processar(self, paginas, normalizar):
+        """
+        Gera (registros normalizados, lidos, total, cursor) por página
+        A busca roda em uma thread própria, no máximo paginas_em_voo à frente
+        """
+        fila = queue.Queue(maxsize=self.paginas_em_voo)
+        cancelado = threading.Event()
+        busca = self.relatorio.estagio('busca')
+
+        def buscar():
+            try:
+                iterador = iter(paginas)
+                while not cancelado.is_set():
+                    inicio = time.perf_counter()
+                    try:
+                        resultados, total, cursor = next(iterador)
+                    except StopIteration:
+                        break
+                    busca.registrar(len(resultados), segundos=time.perf_counter() - inicio)
+                    futuro = self._normalizar(normalizar, resultados)
+                    self._colocar(fila, (futuro, len(resultados), total, cursor), cancelado)
+            except BaseException as erro:  # repassado ao consumidor
+                self._colocar(fila, erro, cancelado)
+                return
+            self._colocar(fila, _FIM, cancelado)
+
+        produtor = threading.Thread(target=buscar, daemon=True)
+        produtor.start()
+
+        normalizacao = self.relatorio.estagio('normalizacao')
+        try:
+            while True:
+                item = fila.get()
+                if item is _FIM:
+                    break
+                if isinstance(item, BaseException):
+                    raise item
+                futuro, lidos, total, cursor = item
+                registros, segundos = futuro.result()
+                normalizacao.registrar(len(registros), segundos=segundos)
+                yield registros, lidos, total, cursor
+        finally:
+            cancelado.set()
+            produtor.join()
+
+    def fechar(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
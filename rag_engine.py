@@ -3,14 +3,26 @@ RAG Engine para Ocean AI
 Carrega JSONs, cria embeddings, constrói índice FAISS
 """
 
+import hashlib
 import json
 import os
 from pathlib import Path
 from typing import List, Dict, Tuple
 import numpy as np
-from sentence_transformers import SentenceTransformer
 import faiss
 import pickle
+import threading
+
+from armazenamento_colunar import DIR_COLUNAR, LeitorColunar
+from cache_consultas import CacheLRU, normalizar_query
+from cache_embeddings import CacheEmbeddings
+from indices_ann import (QUANTIZADOS, aceita_remocao, buscar_reordenado, construir_indice,
+                         tamanho_indice, tipo_do_indice, tipo_efetivo)
+from lote_embeddings import ESPERA_MAXIMA_MS, LOTE_MAXIMO, CodificadorEmLote
+from modelo_embeddings import MODELO_EMBEDDINGS, modelo_pronto, obter_modelo
+
+
+LOTE_MAXIMO_QUERIES = 128  # queries por forward pass em buscar_lote
 
 
 class OceanRAG:
@@ -18,14 +30,25 @@ class OceanRAG:
     Sistema RAG local para consulta aos dados da Amazônia Azul
     """
     
-    def __init__(self, data_dir: str = "data"):
+    def __init__(self, data_dir: str = "data", tipo_indice: str = "auto", reordenar: bool = True):
         self.data_dir = data_dir
+        self.tipo_indice = tipo_indice  # 'auto' ou um de indices_ann.TIPOS_INDICE
+        self.reordenar = reordenar      # índices quantizados: distância exata pelos vetores em disco
+        self.quantizado = False
+        self._cache_exato = None
+        self.codificador = None  # CodificadorEmLote compartilhado pelas sessões (app)
+        self.cache_embeddings_queries = CacheLRU()  # query normalizada -> embedding
+        self.cache_resultados = CacheLRU()          # (query normalizada, k) -> resultados
+        self._geracao_caches = 0  # incrementada a cada invalidar_caches()
+        self._lock_caches = threading.Lock()
         self.chunks: List[Dict] = []
         self.embeddings: np.ndarray = None
-        self.index: faiss.IndexFlatL2 = None
-        self.model = None
+        self.index: faiss.IndexIDMap2 = None
         self.index_path = "faiss_index"
         self.chunks_path = "chunks_metadata.pkl"
+        self.chunks_por_id: Dict[int, Dict] = {}
+        self.versao_indice = None  # mtime do índice carregado/salvo
+        self._lock_recarga = threading.Lock()
         
     def carregar_jsons(self) -> List[Dict]:
         """
@@ -95,13 +118,16 @@ class OceanRAG:
                     'url': url,
                     'arquivo': arquivo,
                     'tipo': 'metadados',
-                    'secao': 'Informações Gerais'
+                    'secao': 'Informações Gerais',
+                    'chave': 'metadados'
                 })
             
             # Chunks específicos por tipo de arquivo
             if 'obis' in arquivo or 'gbif' in arquivo:
                 # Dados de biodiversidade
                 if 'especies' in conteudo:
+                    colunar = self._abrir_colunar(arquivo)
+                    
                     for especie in conteudo['especies']:
                         texto = f"Espécie: {especie.get('nome_cientifico', 'N/A')}\n"
                         texto += f"Fonte: {fonte}\n"
@@ -109,6 +135,8 @@ class OceanRAG:
                         
                         # Amostra de registros (primeiros 5)
                         registros = especie.get('registros', [])[:5]
+                        if not registros and colunar:
+                            registros = self._amostra_colunar(colunar, especie.get('nome_cientifico'), 5)
                         if registros:
                             texto += "Ocorrências:\n"
                             for reg in registros:
@@ -117,20 +145,38 @@ class OceanRAG:
                                     texto += f"  Local: {reg.get('localidade')}\n"
                                 if reg.get('data_observacao'):
                                     texto += f"  Data: {reg.get('data_observacao')}\n"
-                        
+
+                        if especie.get('agregados'):
+                            texto += self._texto_agregados(especie['agregados'])
+
                         chunks.append({
                             'texto': texto,
                             'fonte': fonte,
                             'url': url,
                             'arquivo': arquivo,
                             'tipo': 'especie',
-                            'secao': especie.get('nome_cientifico', 'Espécie')
+                            'secao': especie.get('nome_cientifico', 'Espécie'),
+                            'chave': especie.get('nome_cientifico', '')
                         })
             
             elif 'copernicus' in arquivo:
                 # Dados oceanográficos
                 if 'produtos' in conteudo:
                     for produto in conteudo['produtos']:
+                        # Grades processadas localmente: um chunk por variável
+                        if produto.get('resumos'):
+                            for resumo in produto['resumos']:
+                                chunks.append({
+                                    'texto': self._texto_resumo_grade(produto, resumo, fonte),
+                                    'fonte': fonte,
+                                    'url': url,
+                                    'arquivo': arquivo,
+                                    'tipo': 'oceanografia',
+                                    'secao': f"{produto.get('produto', 'Produto')} - {resumo['descricao']}",
+                                    'chave': f"{produto.get('produto_id', '')}:{resumo['variavel']}"
+                                })
+                            continue
+
                         texto = f"Produto Oceanográfico: {produto.get('produto', 'N/A')}\n"
                         texto += f"Fonte: {fonte}\n"
                         texto += f"ID: {produto.get('produto_id', 'N/A')}\n"
@@ -151,7 +197,8 @@ class OceanRAG:
                             'url': url,
                             'arquivo': arquivo,
                             'tipo': 'oceanografia',
-                            'secao': produto.get('produto', 'Produto')
+                            'secao': produto.get('produto', 'Produto'),
+                            'chave': produto.get('produto_id', '')
                         })
             
             else:
@@ -165,12 +212,123 @@ class OceanRAG:
                     'url': url,
                     'arquivo': arquivo,
                     'tipo': 'geral',
-                    'secao': 'Dados Gerais'
+                    'secao': 'Dados Gerais',
+                    'chave': 'geral'
                 })
         
+        self._atribuir_ids(chunks)
+        
         print(f"✅ Total de chunks criados: {len(chunks)}")
         return chunks
     
+    @staticmethod
+    def _id_chunk(arquivo: str, secao: str, chave: str) -> int:
+        """
+        ID estável do chunk: hash de arquivo + seção + chave do registro
+        (int64 positivo; o mesmo chunk mantém o ID entre coletas)
+        """
+        digest = hashlib.blake2b(f"{arquivo}\0{secao}\0{chave}".encode('utf-8'), digest_size=8).digest()
+        return int.from_bytes(digest, 'little') & 0x7FFFFFFFFFFFFFFF
+    
+    def _atribuir_ids(self, chunks: List[Dict]):
+        """
+        Preenche chunk['id']; chaves repetidas no mesmo arquivo/seção
+        recebem um sufixo pela ordem de aparição
+        """
+        vistos = set()
+        for chunk in chunks:
+            base = chunk.get('chave', '')
+            chave, repeticao = base, 1
+            while True:
+                id_chunk = self._id_chunk(chunk['arquivo'], chunk['secao'], chave)
+                if id_chunk not in vistos:
+                    break
+                repeticao += 1
+                chave = f"{base}#{repeticao}"
+            vistos.add(id_chunk)
+            chunk['id'] = id_chunk
+    
+    def _abrir_colunar(self, arquivo: str):
+        """
+        Armazém colunar da fonte (data/colunar/obis, data/colunar/gbif) ou None
+        """
+        diretorio = os.path.join(self.data_dir, os.path.relpath(DIR_COLUNAR, 'data'),
+                                 arquivo.split('_')[0])
+        return LeitorColunar(diretorio) if LeitorColunar.existe(diretorio) else None
+    
+    def _amostra_colunar(self, colunar: LeitorColunar, especie: str, n: int) -> List[Dict]:
+        """
+        Primeiros n registros da espécie lendo só as colunas usadas no chunk
+        """
+        colunas = ['latitude', 'longitude', 'localidade', 'data_observacao']
+        return [colunar.registro(i, colunas) for i in colunar.indices('nome_cientifico', especie, limite=n)]
+    
+    def _texto_agregados(self, agregados: Dict, maximo: int = 10) -> str:
+        """
+        Tabelas agregadas da espécie (contagens exatas calculadas pela API):
+        por ano, estado, base de registro e células da grade do OBIS
+        """
+        texto = ""
+
+        resumo = agregados.get('resumo', {})
+        if resumo:
+            texto += f"\nResumo OBIS: {resumo.get('records', 'N/A')} registros em {resumo.get('datasets', 'N/A')} datasets\n"
+
+        por_ano = agregados.get('por_ano', {})
+        if por_ano:
+            texto += "\nRegistros por ano:\n"
+            texto += ", ".join(f"{ano}: {n}" for ano, n in list(por_ano.items())[-maximo * 2:]) + "\n"
+
+        for chave, titulo in (('por_estado', 'Registros por estado'),
+                              ('por_base_de_registro', 'Registros por base de registro')):
+            tabela = agregados.get(chave, {})
+            if tabela:
+                maiores = sorted(tabela.items(), key=lambda item: -item[1])[:maximo]
+                texto += f"\n{titulo}:\n" + ", ".join(f"{nome}: {n}" for nome, n in maiores) + "\n"
+
+        grade = agregados.get('grade', [])
+        if grade:
+            texto += "\nÁreas com mais registros (grade OBIS):\n"
+            for celula in grade[:5]:
+                texto += f"- Lat {celula['lat']}, Lon {celula['lon']}: {celula['registros']} registros\n"
+
+        return texto
+
+    def _texto_resumo_grade(self, produto: Dict, resumo: Dict, fonte: str, meses: int = 24) -> str:
+        """
+        Texto de uma variável de grade Copernicus: média regional, série
+        mensal (últimos `meses`) e as células de 1° mais quentes/frias
+        """
+        unidade = resumo.get('unidade', '')
+        area = produto.get('area_interesse', {})
+
+        texto = f"Produto Oceanográfico: {produto.get('produto', 'N/A')}\n"
+        texto += f"Fonte: {fonte}\n"
+        texto += f"Variável: {resumo['descricao']} ({resumo['variavel']}, {unidade})\n"
+        texto += f"Área: {area.get('regiao', 'costa brasileira')} - "
+        texto += f"lat {area.get('lat_min')} a {area.get('lat_max')}, lon {area.get('lon_min')} a {area.get('lon_max')}\n"
+        if resumo.get('profundidade_m') is not None:
+            texto += f"Profundidade: {resumo['profundidade_m']:.1f} m (superfície)\n"
+        texto += f"Média regional no período: {resumo.get('media_regional')} {unidade} "
+        texto += f"(mínimo {resumo.get('minimo')}, máximo {resumo.get('maximo')})\n"
+
+        mensal = list(resumo.get('mensal', {}).items())[-meses:]
+        if mensal:
+            texto += "\nMédia mensal na costa brasileira:\n"
+            for mes, valores in mensal:
+                texto += f"- {mes}: {valores['media']} {unidade} (mín {valores['minimo']}, máx {valores['maximo']})\n"
+
+        celulas = sorted(resumo.get('celulas', []), key=lambda c: c['media'])
+        if celulas:
+            texto += "\nCélulas de 1° com maiores médias:\n"
+            for celula in celulas[-5:][::-1]:
+                texto += f"- Lat {celula['lat']}, Lon {celula['lon']}: {celula['media']} {unidade}\n"
+            texto += "Células de 1° com menores médias:\n"
+            for celula in celulas[:5]:
+                texto += f"- Lat {celula['lat']}, Lon {celula['lon']}: {celula['media']} {unidade}\n"
+
+        return texto
+
     def _dict_para_texto(self, obj, max_depth=3, current_depth=0, prefix="") -> str:
         """
         Converte dicionário/lista em texto legível
@@ -203,21 +361,31 @@ class OceanRAG:
     def criar_embeddings(self):
         """
         Cria embeddings dos chunks usando SentenceTransformers
+        Chunks com texto já visto vêm do cache em disco; só os novos
+        ou alterados passam pelo modelo
         """
-        print("\n🧠 Carregando modelo de embeddings...")
-        self.model = SentenceTransformer('sentence-transformers/paraphrase-multilingual-mpnet-base-v2')
+        cache = CacheEmbeddings(MODELO_EMBEDDINGS)
+        print(f"\n🗃️  Cache de embeddings: {len(cache)} vetores em disco")
         
-        print("🔢 Gerando embeddings dos chunks...")
         textos = [chunk['texto'] for chunk in self.chunks]
+        self.embeddings = cache.embeddings(textos, self._codificar_textos)
+        
+        print(f"✅ Embeddings gerados: {self.embeddings.shape} "
+              f"({cache.estatisticas['calculados']} calculados, "
+              f"{cache.estatisticas['reaproveitados']} do cache)")
+    
+    def _codificar_textos(self, textos: List[str]) -> np.ndarray:
+        """
+        Passa pelo modelo os textos sem embedding em cache
+        """
+        print(f"🔢 Gerando embeddings de {len(textos)} chunks novos ou alterados...")
         
         # Gera embeddings em batches
-        self.embeddings = self.model.encode(
+        return obter_modelo().encode(
             textos,
             show_progress_bar=True,
             batch_size=32
         )
-        
-        print(f"✅ Embeddings gerados: {self.embeddings.shape}")
     
     def construir_indice_faiss(self):
         """
@@ -225,11 +393,13 @@ class OceanRAG:
         """
         print("\n🔍 Construindo índice FAISS...")
         
-        dimension = self.embeddings.shape[1]
-        self.index = faiss.IndexFlatL2(dimension)
-        self.index.add(self.embeddings.astype('float32'))
+        ids = np.array([chunk['id'] for chunk in self.chunks], dtype=np.int64)
+        self.index = construir_indice(self.tipo_indice, self.embeddings, ids)
+        self.chunks_por_id = {chunk['id']: chunk for chunk in self.chunks}
+        self.quantizado = tipo_do_indice(self.index) in QUANTIZADOS
         
-        print(f"✅ Índice construído com {self.index.ntotal} vetores")
+        print(f"✅ Índice {tipo_do_indice(self.index)} construído com {self.index.ntotal} vetores "
+              f"({tamanho_indice(self.index) / 1e6:.1f} MB)")
     
     def salvar_indice(self):
         """
@@ -237,12 +407,17 @@ class OceanRAG:
         """
         print("\n💾 Salvando índice e metadados...")
         
-        # Salvar índice FAISS
-        faiss.write_index(self.index, self.index_path)
-        
-        # Salvar chunks (sem embeddings para economizar espaço)
-        with open(self.chunks_path, 'wb') as f:
+        # Salvar chunks (sem embeddings para economizar espaço) antes do índice:
+        # o app recarrega quando o índice muda e encontra os metadados novos
+        with open(self.chunks_path + '.tmp', 'wb') as f:
             pickle.dump(self.chunks, f)
+        os.replace(self.chunks_path + '.tmp', self.chunks_path)
+        
+        # Salvar índice FAISS
+        faiss.write_index(self.index, self.index_path + '.tmp')
+        os.replace(self.index_path + '.tmp', self.index_path)
+        self.versao_indice = os.stat(self.index_path).st_mtime_ns
+        self.invalidar_caches()
         
         print("✅ Índice e metadados salvos!")
     
@@ -256,15 +431,24 @@ class OceanRAG:
             
             print("📥 Carregando índice FAISS e metadados...")
             
+            versao = os.stat(self.index_path).st_mtime_ns
             self.index = faiss.read_index(self.index_path)
             
             with open(self.chunks_path, 'rb') as f:
                 self.chunks = pickle.load(f)
             
-            # Carregar modelo
-            self.model = SentenceTransformer('sentence-transformers/paraphrase-multilingual-mpnet-base-v2')
+            # Índices antigos (posição na lista, sem IDs) precisam ser reconstruídos
+            if self.chunks and 'id' not in self.chunks[0]:
+                print("⚠️  Índice sem IDs estáveis; será reconstruído")
+                return False
+            self.chunks_por_id = {chunk['id']: chunk for chunk in self.chunks}
+            self.versao_indice = versao
+            self.quantizado = tipo_do_indice(self.index) in QUANTIZADOS
+            self._cache_exato = None  # reabre o cache com os vetores gravados desde então
+            self.invalidar_caches()
             
-            print(f"✅ Índice carregado: {self.index.ntotal} vetores")
+            print(f"✅ Índice carregado: {self.index.ntotal} vetores ({tipo_do_indice(self.index)}, "
+                  f"{os.path.getsize(self.index_path) / 1e6:.1f} MB)")
             print(f"✅ Chunks carregados: {len(self.chunks)}")
             
             return True
@@ -278,22 +462,200 @@ class OceanRAG:
         Busca chunks relevantes para a query
         Retorna lista de (chunk, score)
         """
-        if self.model is None or self.index is None:
-            raise ValueError("Modelo ou índice não carregado. Execute setup() primeiro.")
+        return self.buscar_lote([query], k)[0]
+    
+    def buscar_lote(self, queries: List[str], k: int = 5) -> List[List[Tuple[Dict, float]]]:
+        """
+        Busca várias queries de uma vez: um único encode em batch e um único
+        index.search sobre a matriz de queries (só das que não estão em cache)
+        Retorna, para cada query, a lista de (chunk, score) de buscar()
+        """
+        if self.index is None:
+            raise ValueError("Índice não carregado. Execute setup() primeiro.")
+        if not queries:
+            return []
+        
+        geracao = self._geracao_caches  # índice trocado durante a busca => não guarda os resultados
+        chaves = [normalizar_query(query) for query in queries]
+        lote = [self.cache_resultados.obter((chave, k)) for chave in chaves]
+        pendentes = list(dict.fromkeys(chave for chave, resultados in zip(chaves, lote) if resultados is None))
+        
+        if pendentes:
+            # Gerar embeddings das queries
+            query_embeddings = self._embeddings_queries(pendentes, queries, chaves)
+            
+            # Buscar no FAISS (índices quantizados: candidatos extras reordenados pela distância exata)
+            if self.quantizado and self.reordenar:
+                distances, indices = buscar_reordenado(self.index, query_embeddings, k, self._vetores_exatos)
+            else:
+                distances, indices = self.index.search(query_embeddings, k)
+            
+            # Chunks com scores de cada query pendente
+            novos = {}
+            for chave, linha_indices, linha_distancias in zip(pendentes, indices, distances):
+                resultados = []
+                for idx, dist in zip(linha_indices, linha_distancias):
+                    chunk = self.chunks_por_id.get(int(idx))
+                    if chunk is not None:
+                        resultados.append((chunk, float(dist)))
+                novos[chave] = resultados
+            
+            with self._lock_caches:
+                if self._geracao_caches == geracao:
+                    for chave, resultados in novos.items():
+                        self.cache_resultados.guardar((chave, k), resultados)
+            
+            lote = [novos[chave] if resultados is None else resultados for chave, resultados in zip(chaves, lote)]
+        
+        return [list(resultados) for resultados in lote]
+    
+    def _embeddings_queries(self, chaves_pendentes: List[str], queries: List[str], chaves: List[str]) -> np.ndarray:
+        """
+        Matriz de embeddings das queries pendentes; só as que não estão no
+        cache de embeddings passam pelo modelo (a primeira grafia de cada chave)
+        """
+        original = {}
+        for query, chave in zip(queries, chaves):
+            original.setdefault(chave, query)
+        
+        vetores = {chave: self.cache_embeddings_queries.obter(chave) for chave in chaves_pendentes}
+        faltantes = [chave for chave, vetor in vetores.items() if vetor is None]
+        if faltantes:
+            calculados = self._codificar_queries([original[chave] for chave in faltantes])
+            for chave, vetor in zip(faltantes, calculados):
+                vetores[chave] = vetor
+                self.cache_embeddings_queries.guardar(chave, vetor)
+        
+        return np.ascontiguousarray(np.stack([vetores[chave] for chave in chaves_pendentes]), dtype=np.float32)
+    
+    def embedding_query(self, query: str) -> np.ndarray:
+        """
+        Embedding de uma query (do cache, se buscar() acabou de calculá-lo)
+        """
+        chave = normalizar_query(query)
+        return self._embeddings_queries([chave], [query], [chave])[0]
+    
+    def invalidar_caches(self):
+        """
+        Limpa os caches de queries (índice reconstruído, atualizado ou recarregado);
+        buscas já em andamento não guardam seus resultados depois disso
+        """
+        with self._lock_caches:
+            self._geracao_caches += 1
+            self.cache_embeddings_queries.limpar()
+            self.cache_resultados.limpar()
+    
+    @property
+    def model(self):
+        """
+        SentenceTransformer compartilhado pelo processo, ou None enquanto não
+        carregado (índice e metadados já podem ser usados antes dele)
+        """
+        return obter_modelo() if modelo_pronto() else None
+    
+    def ativar_micro_lotes(self, lote_maximo: int = LOTE_MAXIMO, espera_maxima_ms: float = ESPERA_MAXIMA_MS):
+        """
+        Agrupa os encodes de queries de threads concorrentes (sessões do app)
+        que chegam dentro de espera_maxima_ms em um único forward pass
+        """
+        if self.codificador is None:
+            self.codificador = CodificadorEmLote(self._encode_queries, lote_maximo, espera_maxima_ms)
+    
+    def _codificar_queries(self, queries: List[str]) -> np.ndarray:
+        """
+        Embeddings float32 das queries (pelo serviço de micro-lotes, se ativo)
+        """
+        if self.codificador is not None:
+            return self.codificador.codificar(queries)
+        return self._encode_queries(queries)
+    
+    def _encode_queries(self, queries: List[str]) -> np.ndarray:
+        """
+        Embeddings float32 das queries em um único forward pass
+        """
+        return np.asarray(obter_modelo().encode(queries, batch_size=min(len(queries), LOTE_MAXIMO_QUERIES)),
+                          dtype=np.float32)
+    
+    def _vetores_exatos(self, ids: np.ndarray):
+        """
+        Embeddings float32 dos chunks, lidos do cache em disco (memmap)
+        None se algum faltar: a busca mantém a ordem aproximada
+        """
+        if self._cache_exato is None:
+            self._cache_exato = CacheEmbeddings(MODELO_EMBEDDINGS)
+        chunks = [self.chunks_por_id.get(int(i)) for i in ids]
+        if None in chunks:
+            return None
+        return self._cache_exato.obter([chunk['texto'] for chunk in chunks])
+    
+    def atualizar_indice(self) -> Dict[str, int]:
+        """
+        Atualização incremental após uma coleta: compara os chunks atuais
+        com os indexados pelo ID estável e só adiciona, substitui ou remove
+        os que mudaram (sem índice no disco, faz o setup completo)
+        """
+        if self.index is None and not self.carregar_indice():
+            self.setup(force_rebuild=True)
+            return {'novos': len(self.chunks), 'alterados': 0, 'removidos': 0}
+        
+        print("🔄 Atualizando índice de forma incremental...")
+        
+        chunks = self.criar_chunks(self.carregar_jsons())
+        atuais = {chunk['id']: chunk for chunk in chunks}
+        
+        novos = [c for id_chunk, c in atuais.items() if id_chunk not in self.chunks_por_id]
+        alterados = [c for id_chunk, c in atuais.items()
+                     if id_chunk in self.chunks_por_id and self.chunks_por_id[id_chunk]['texto'] != c['texto']]
+        removidos = [id_chunk for id_chunk in self.chunks_por_id if id_chunk not in atuais]
+        
+        # Alterados saem e voltam com o vetor novo
+        retirar = removidos + [c['id'] for c in alterados]
+        
+        # Outro tipo para o novo tamanho, ou HNSW com remoções: reconstrói
+        # (os embeddings dos chunks inalterados vêm do cache); compara com o tipo
+        # que a construção produziria, já com o substituto de corpus pequenos
+        tipo = tipo_efetivo(self.tipo_indice, len(chunks))
+        if tipo != tipo_do_indice(self.index) or (retirar and not aceita_remocao(self.index)):
+            motivo = f"{tipo_do_indice(self.index)} -> {tipo}" if tipo != tipo_do_indice(self.index) \
+                else f"{tipo} não remove vetores"
+            print(f"🔨 Índice {motivo}: reconstruindo...")
+            self.chunks = chunks
+            self.criar_embeddings()
+            self.construir_indice_faiss()
+            self.salvar_indice()
+            return {'novos': len(novos), 'alterados': len(alterados), 'removidos': len(removidos)}
         
-        # Gerar embedding da query
-        query_embedding = self.model.encode([query])
+        if retirar:
+            self.index.remove_ids(np.array(retirar, dtype=np.int64))
         
-        # Buscar no FAISS
-        distances, indices = self.index.search(query_embedding.astype('float32'), k)
+        inserir = novos + alterados
+        if inserir:
+            cache = CacheEmbeddings(MODELO_EMBEDDINGS)
+            vetores = cache.embeddings([c['texto'] for c in inserir], self._codificar_textos)
+            self.index.add_with_ids(vetores.astype('float32'),
+                                    np.array([c['id'] for c in inserir], dtype=np.int64))
         
-        # Retornar chunks com scores
-        resultados = []
-        for idx, dist in zip(indices[0], distances[0]):
-            if idx < len(self.chunks):
-                resultados.append((self.chunks[idx], float(dist)))
+        # Chunks só com metadados diferentes (ex.: URL) são atualizados sem reindexar
+        self.chunks = chunks
+        self.chunks_por_id = atuais
+        self.salvar_indice()
         
-        return resultados
+        resumo = {'novos': len(novos), 'alterados': len(alterados), 'removidos': len(removidos)}
+        print(f"✅ Índice atualizado: {resumo['novos']} novos, {resumo['alterados']} alterados, "
+              f"{resumo['removidos']} removidos ({self.index.ntotal} vetores)")
+        return resumo
+    
+    def recarregar_se_alterado(self) -> bool:
+        """
+        Recarrega índice e metadados se outro processo (ex.: o coletor)
+        gravou uma versão nova no disco; o modelo carregado é mantido
+        """
+        if not os.path.exists(self.index_path):
+            return False
+        with self._lock_recarga:  # várias sessões do app compartilham a instância
+            if os.stat(self.index_path).st_mtime_ns == self.versao_indice:
+                return False
+            return self.carregar_indice()
     
     def setup(self, force_rebuild: bool = False):
         """
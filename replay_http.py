@@ -0,0 +1,180 @@
+"""
+Gravação e Replay de Respostas HTTP do Coletor
+Grava as respostas reais das APIs uma vez e as serve de um servidor local,
+com latência, erros e 429 injetados, para medir o coletor sem depender da rede
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+
+# ============================================================================
+# CONFIGURAÇÕES
+# ============================================================================
+
+ARQUIVO_INDICE = 'respostas.jsonl'  # uma linha por resposta gravada
+DIR_CORPOS = 'corpos'               # corpos gzip, um arquivo por requisição
+
+
+def chave_requisicao(url):
+    """host + caminho + query exatamente como enviados (ex.: api.obis.org/v3/occurrence?...)"""
+    partes = urlsplit(url)
+    return f"{partes.netloc}{partes.path}" + (f"?{partes.query}" if partes.query else '')
+
+
+# ============================================================================
+# GRAVAÇÃO
+# ============================================================================
+
+class GravadorRespostas:
+    """
+    Guarda cada resposta 200 do coletor em <diretorio>: o corpo comprimido
+    em corpos/<sha256>.json.gz e uma linha em respostas.jsonl (seguro entre threads)
+    """
+
+    def __init__(self, diretorio):
+        self.diretorio = diretorio
+        self.gravadas = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.join(diretorio, DIR_CORPOS), exist_ok=True)
+
+    def gravar(self, response, url=None):
+        """url: a requisição original, quando response.request.url foi reescrita"""
+        chave = chave_requisicao(url or response.request.url)
+        nome = hashlib.sha256(chave.encode('utf-8')).hexdigest() + '.json.gz'
+        with open(os.path.join(self.diretorio, DIR_CORPOS, nome), 'wb') as f:
+            f.write(gzip.compress(response.content))
+
+        linha = {
+            'chave': chave,
+            'arquivo': f"{DIR_CORPOS}/{nome}",
+            'content_type': response.headers.get('Content-Type', 'application/json')
+        }
+        with self._lock:
+            with open(os.path.join(self.diretorio, ARQUIVO_INDICE), 'a', encoding='utf-8') as f:
+                f.write(json.dumps(linha, ensure_ascii=False) + '\n')
+            self.gravadas += 1
+
+
+# ============================================================================
+# SERVIDOR DE REPLAY
+# ============================================================================
+
+class ServidorReplay:
+    """
+    Servidor HTTP local que responde GET /<host>/<caminho>?<query> com o
+    corpo gravado (gzip, como as APIs reais); requisições sem gravação => 404
+    Injeção de falhas (sorteio reprodutível pela semente):
+      latencia_ms (+ jitter_ms uniforme) antes de cada resposta
+      taxa_429  -> 429 com Retry-After: retry_after
+      taxa_erro -> 503 sem Retry-After
+    """
+
+    def __init__(self, diretorio, porta=0, latencia_ms=0.0, jitter_ms=0.0,
+                 taxa_erro=0.0, taxa_429=0.0, retry_after=1, semente=42):
+        self.diretorio = diretorio
+        self.latencia_ms = latencia_ms
+        self.jitter_ms = jitter_ms
+        self.taxa_erro = taxa_erro
+        self.taxa_429 = taxa_429
+        self.retry_after = retry_after
+        self._sorteio = random.Random(semente)
+        self._lock = threading.Lock()
+        self.respostas = self._carregar_indice()
+        self.zerar_contadores()
+
+        servidor = self
+
+        class Manipulador(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'  # keep-alive, como as APIs reais
+
+            def do_GET(self):
+                servidor._responder(self)
+
+            def log_message(self, *args):
+                pass
+
+        self._http = ThreadingHTTPServer(('127.0.0.1', porta), Manipulador)
+        self._http.daemon_threads = True
+        self._thread = None
+
+    def _carregar_indice(self):
+        respostas = {}
+        with open(os.path.join(self.diretorio, ARQUIVO_INDICE), 'r', encoding='utf-8') as f:
+            for linha in f:
+                if linha.strip():
+                    entrada = json.loads(linha)
+                    respostas[entrada['chave']] = entrada
+        return respostas
+
+    @property
+    def url(self):
+        host, porta = self._http.server_address[:2]
+        return f"http://{host}:{porta}"
+
+    def zerar_contadores(self):
+        with self._lock:
+            self.contadores = {'requisicoes': 0, 'ok': 0, 'http_429': 0, 'http_503': 0, 'nao_gravadas': 0}
+
+    def _contar(self, evento):
+        with self._lock:
+            self.contadores[evento] += 1
+
+    def _sortear(self):
+        with self._lock:
+            return self._sorteio.random(), self._sorteio.uniform(0, self.jitter_ms)
+
+    def _responder(self, pedido):
+        self._contar('requisicoes')
+        sorteio, jitter = self._sortear()
+        time.sleep((self.latencia_ms + jitter) / 1000)
+
+        if sorteio < self.taxa_429:
+            self._contar('http_429')
+            self._enviar(pedido, 429, b'{}', cabecalhos={'Retry-After': str(self.retry_after)})
+            return
+        if sorteio < self.taxa_429 + self.taxa_erro:
+            self._contar('http_503')
+            self._enviar(pedido, 503, b'{}')
+            return
+
+        entrada = self.respostas.get(pedido.path.lstrip('/'))
+        if entrada is None:
+            self._contar('nao_gravadas')
+            self._enviar(pedido, 404, b'{}')
+            return
+
+        with open(os.path.join(self.diretorio, entrada['arquivo']), 'rb') as f:
+            corpo = f.read()
+        cabecalhos = {'Content-Type': entrada['content_type']}
+        if 'gzip' in pedido.headers.get('Accept-Encoding', ''):
+            cabecalhos['Content-Encoding'] = 'gzip'
+        else:
+            corpo = gzip.decompress(corpo)
+        self._contar('ok')
+        self._enviar(pedido, 200, corpo, cabecalhos)
+
+    @staticmethod
+    def _enviar(pedido, status, corpo, cabecalhos=None):
+        pedido.send_response(status)
+        for nome, valor in (cabecalhos or {'Content-Type': 'application/json'}).items():
+            pedido.send_header(nome, valor)
+        pedido.send_header('Content-Length', str(len(corpo)))
+        pedido.end_headers()
+        pedido.wfile.write(corpo)
+
+    def iniciar(self):
+        self._thread = threading.Thread(target=self._http.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def parar(self):
+        self._http.shutdown()
+        self._http.server_close()
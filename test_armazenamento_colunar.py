@@ -0,0 +1,116 @@
+"""
+Testes do armazenamento colunar: ida e volta EscritorColunar -> LeitorColunar
+"""
+
+import numpy as np
+
+from armazenamento_colunar import DATA_AUSENTE, EscritorColunar, LeitorColunar, data_para_epoch, epoch_para_iso
+
+
+REGISTROS = [
+    {
+        'nome_cientifico': 'Chelonia mydas',
+        'latitude': -23.5,
+        'longitude': -45.1,
+        'data_observacao': '2019-03-04T10:20:30Z',
+        'profundidade_m': 12.0,
+        'localidade': 'Ubatuba',
+        'pais': 'Brasil',
+        'gbif_id': 123456789,
+        'obis_id': '0a1b2c3d-0000-4000-8000-000000000001',
+        'fontes': 'obis+gbif'
+    },
+    {
+        'nome_cientifico': 'Caretta caretta',
+        'latitude': -10.0,
+        'longitude': -36.0,
+        'data_observacao': '2005',
+        'localidade': 'Praia do Forte – Mata de São João',
+        'pais': 'Brasil'
+    },
+    {
+        'nome_cientifico': 'Chelonia mydas',
+        'latitude': None,
+        'longitude': None,
+        'data_observacao': None,
+        'localidade': ''
+    }
+]
+
+
+def test_conversao_de_datas():
+    assert epoch_para_iso(data_para_epoch('2019-03-04T10:20:30Z')) == '2019-03-04T10:20:30'
+    assert epoch_para_iso(data_para_epoch('2005')) == '2005-01-01T00:00:00'
+    assert epoch_para_iso(data_para_epoch('2005-07')) == '2005-07-01T00:00:00'
+    assert epoch_para_iso(data_para_epoch('2010-02-01/2010-02-28')) == '2010-02-01T00:00:00'
+    assert data_para_epoch('sem data') == DATA_AUSENTE
+    assert epoch_para_iso(DATA_AUSENTE) is None
+
+
+def test_ida_e_volta(tmp_path):
+    diretorio = str(tmp_path / 'obis')
+    escritor = EscritorColunar(diretorio, list(REGISTROS[0]) + ['coluna_desconhecida'], tamanho_bloco=2)
+    for registro in REGISTROS:
+        escritor.adicionar(registro)
+    esquema = escritor.fechar(metadados={'fonte': 'teste'})
+
+    assert esquema['linhas'] == 3
+    assert 'coluna_desconhecida' not in esquema['colunas']
+    assert LeitorColunar.existe(diretorio)
+
+    leitor = LeitorColunar(diretorio)
+    assert leitor.esquema['metadados'] == {'fonte': 'teste'}
+
+    primeiro = leitor.registro(0)
+    assert primeiro == {
+        'nome_cientifico': 'Chelonia mydas',
+        'latitude': -23.5,
+        'longitude': -45.1,
+        'data_observacao': '2019-03-04T10:20:30',
+        'profundidade_m': 12.0,
+        'localidade': 'Ubatuba',
+        'pais': 'Brasil',
+        'gbif_id': 123456789,
+        'obis_id': '0a1b2c3d-0000-4000-8000-000000000001',
+        'fontes': 'obis+gbif'
+    }
+
+    segundo = leitor.registro(1, ['localidade', 'data_observacao', 'gbif_id', 'obis_id', 'profundidade_m'])
+    assert segundo == {
+        'localidade': 'Praia do Forte – Mata de São João',
+        'data_observacao': '2005-01-01T00:00:00',
+        'gbif_id': None,
+        'obis_id': None,
+        'profundidade_m': None
+    }
+
+    terceiro = leitor.registro(2)
+    assert terceiro['latitude'] is None and terceiro['data_observacao'] is None
+    assert terceiro['localidade'] is None  # string vazia = ausente
+
+    # Colunas tipadas, lidas por memory-map, e busca por valor de dicionário
+    assert leitor.coluna('latitude').dtype == np.dtype('<f8')
+    assert list(leitor.indices('nome_cientifico', 'Chelonia mydas')) == [0, 2]
+    assert list(leitor.indices('nome_cientifico', 'Chelonia mydas', limite=1)) == [0]
+    assert len(leitor.indices('nome_cientifico', 'Dermochelys coriacea')) == 0
+
+
+def test_fechar_substitui_o_diretorio_publicado(tmp_path):
+    diretorio = str(tmp_path / 'gbif')
+    for registros in (REGISTROS, REGISTROS[:1]):
+        escritor = EscritorColunar(diretorio, ['nome_cientifico', 'latitude'])
+        for registro in registros:
+            escritor.adicionar(registro)
+        escritor.fechar()
+
+    leitor = LeitorColunar(diretorio)
+    assert leitor.linhas == 1
+    assert not (tmp_path / 'gbif.tmp').exists() and not (tmp_path / 'gbif.old').exists()
+
+
+def test_armazem_vazio(tmp_path):
+    diretorio = str(tmp_path / 'vazio')
+    EscritorColunar(diretorio, ['latitude', 'obis_id']).fechar()
+    leitor = LeitorColunar(diretorio)
+    assert leitor.linhas == 0
+    assert len(leitor.coluna('latitude')) == 0
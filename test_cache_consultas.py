@@ -0,0 +1,46 @@
+"""
+Testes do cache LRU das buscas do RAG
+"""
+
+from cache_consultas import CacheLRU, normalizar_query
+
+
+def test_normalizar_query():
+    composta, decomposta = 'Tubar\u00e3o', 'Tubara\u0303o'
+    assert normalizar_query(f"  {composta}   AZUL ") == normalizar_query(decomposta + ' azul') == 'tubarão azul'
+
+
+def test_despeja_o_usado_ha_mais_tempo():
+    cache = CacheLRU(tamanho_maximo=2)
+    cache.guardar('a', 1)
+    cache.guardar('b', 2)
+    assert cache.obter('a') == 1  # 'b' passa a ser o mais antigo
+    cache.guardar('c', 3)
+
+    assert (cache.obter('a'), cache.obter('b'), cache.obter('c')) == (1, None, 3)
+    assert cache.estatisticas == {'hits': 3, 'misses': 1, 'despejados': 1, 'invalidacoes': 0}
+    assert cache.taxa_acerto() == 0.75
+
+
+def test_entrada_expira_pelo_ttl(monkeypatch):
+    import cache_consultas
+    agora = [1000.0]
+    monkeypatch.setattr(cache_consultas.time, 'monotonic', lambda: agora[0])
+
+    cache = CacheLRU(ttl=60)
+    cache.guardar('a', 1)
+    agora[0] += 59
+    assert cache.obter('a') == 1
+    agora[0] += 2
+    assert cache.obter('a') is None and len(cache) == 0
+
+
+def test_limpar_mantem_os_contadores():
+    cache = CacheLRU()
+    cache.guardar('a', 1)
+    cache.obter('a')
+    cache.limpar()
+
+    assert len(cache) == 0 and cache.obter('a') is None
+    assert cache.estatisticas == {'hits': 1, 'misses': 1, 'despejados': 0, 'invalidacoes': 1}
+    assert CacheLRU().taxa_acerto() == 0.0
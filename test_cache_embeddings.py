@@ -0,0 +1,117 @@
+"""
+Testes do cache persistente de embeddings
+"""
+
+import multiprocessing
+import os
+
+import numpy as np
+
+from cache_embeddings import TAMANHO_CHAVE, CacheEmbeddings
+
+MODELO = 'modelo/teste'
+
+
+def codificador(chamadas):
+    """Embedding determinístico de dimensão 3 a partir do texto; registra cada lote pedido"""
+    def codificar(textos):
+        chamadas.append(list(textos))
+        return np.array([[len(texto), sum(map(ord, texto)) % 97, 1.0] for texto in textos])
+    return codificar
+
+
+def esperado(textos):
+    return np.array([[len(texto), sum(map(ord, texto)) % 97, 1.0] for texto in textos], dtype=np.float32)
+
+
+def test_conteudo_igual_reaproveitado_entre_reconstrucoes(tmp_path):
+    chamadas = []
+    textos = ['chunk a', 'chunk b', 'chunk a', 'chunk c']
+    cache = CacheEmbeddings(MODELO, diretorio=str(tmp_path))
+    np.testing.assert_array_equal(cache.embeddings(textos, codificador(chamadas)), esperado(textos))
+    assert chamadas == [['chunk a', 'chunk b', 'chunk c']]
+
+    # Reconstrução: um chunk alterado, os outros vêm do disco pelo hash do conteúdo
+    chamadas.clear()
+    reaberto = CacheEmbeddings(MODELO, diretorio=str(tmp_path))
+    textos = ['chunk a', 'chunk b alterado', 'chunk c']
+    np.testing.assert_array_equal(reaberto.embeddings(textos, codificador(chamadas)), esperado(textos))
+    assert chamadas == [['chunk b alterado']]
+    assert reaberto.estatisticas == {'reaproveitados': 2, 'calculados': 1}
+    np.testing.assert_array_equal(reaberto.obter(['chunk c', 'chunk a']), esperado(['chunk c', 'chunk a']))
+
+    # Outro modelo: outro diretório e outras chaves
+    assert CacheEmbeddings('outro-modelo', diretorio=str(tmp_path)).obter(['chunk a']) is None
+
+
+def test_arquivo_de_vetores_ausente_conta_como_vazio(tmp_path):
+    cache = CacheEmbeddings(MODELO, diretorio=str(tmp_path))
+    cache.embeddings(['a', 'b'], codificador([]))
+    os.remove(cache._caminho_vetores)
+
+    reaberto = CacheEmbeddings(MODELO, diretorio=str(tmp_path))
+    assert len(reaberto) == 0 and reaberto.vetores().shape == (0, 3)
+    assert os.path.getsize(reaberto._caminho_chaves) == 0
+
+    chamadas = []
+    np.testing.assert_array_equal(reaberto.embeddings(['b'], codificador(chamadas)), esperado(['b']))
+    assert chamadas == [['b']]
+
+
+def test_gravacao_interrompida_descarta_linhas_incompletas(tmp_path):
+    cache = CacheEmbeddings(MODELO, diretorio=str(tmp_path))
+    cache.embeddings(['a', 'b', 'c'], codificador([]))
+
+    # Vetor da 3ª linha cortado no meio e uma chave sem vetor sobrando
+    with open(cache._caminho_vetores, 'r+b') as f:
+        f.truncate(2 * 3 * 4 + 5)
+    with open(cache._caminho_chaves, 'ab') as f:
+        f.write(b'x' * TAMANHO_CHAVE)
+
+    reaberto = CacheEmbeddings(MODELO, diretorio=str(tmp_path))
+    assert len(reaberto) == 2
+    assert os.path.getsize(reaberto._caminho_vetores) == 2 * 3 * 4
+    assert os.path.getsize(reaberto._caminho_chaves) == 2 * TAMANHO_CHAVE
+    assert reaberto.obter(['c']) is None
+
+    chamadas = []
+    np.testing.assert_array_equal(reaberto.embeddings(['a', 'b', 'c'], codificador(chamadas)),
+                                  esperado(['a', 'b', 'c']))
+    assert chamadas == [['c']]
+
+
+def test_anexacoes_de_duas_instancias_nao_se_sobrepoem(tmp_path):
+    # Como a coleta (--reindexar) e o app, cada um com o cache aberto antes do outro gravar
+    coleta = CacheEmbeddings(MODELO, diretorio=str(tmp_path))
+    app = CacheEmbeddings(MODELO, diretorio=str(tmp_path))
+
+    coleta.embeddings(['a', 'b'], codificador([]))
+    np.testing.assert_array_equal(app.embeddings(['b', 'c'], codificador([])), esperado(['b', 'c']))
+    np.testing.assert_array_equal(coleta.embeddings(['c', 'd'], codificador([])), esperado(['c', 'd']))
+
+    reaberto = CacheEmbeddings(MODELO, diretorio=str(tmp_path))
+    assert len(reaberto) == 4
+    np.testing.assert_array_equal(reaberto.vetores(), esperado(['a', 'b', 'c', 'd']))
+
+
+def anexar_em_outro_processo(diretorio, prefixo):
+    cache = CacheEmbeddings(MODELO, diretorio=diretorio)
+    for i in range(20):
+        cache.embeddings([f"{prefixo}-{i}", f"comum-{i}"], codificador([]))
+
+
+def test_processos_concorrentes_mantem_chaves_e_vetores_alinhados(tmp_path):
+    contexto = multiprocessing.get_context('spawn')
+    processos = [contexto.Process(target=anexar_em_outro_processo, args=(str(tmp_path), prefixo))
+                 for prefixo in ('coleta', 'app')]
+    for processo in processos:
+        processo.start()
+    for processo in processos:
+        processo.join(timeout=60)
+        assert processo.exitcode == 0
+
+    cache = CacheEmbeddings(MODELO, diretorio=str(tmp_path))
+    textos = [f"{prefixo}-{i}" for prefixo in ('coleta', 'app', 'comum') for i in range(20)]
+    assert len(cache) == len(textos)
+    assert cache.vetores().shape == (len(textos), 3)
+    np.testing.assert_array_equal(cache.obter(textos), esperado(textos))
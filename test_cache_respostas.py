@@ -0,0 +1,57 @@
+"""
+Testes do cache semântico de respostas do chat
+"""
+
+import numpy as np
+
+from cache_respostas import CacheRespostas
+
+
+def vetor(*valores):
+    return np.array(valores, dtype=np.float32)
+
+
+def test_pergunta_parecida_com_os_mesmos_chunks(tmp_path):
+    cache = CacheRespostas(str(tmp_path / 'respostas.pkl'), limiar=0.9)
+    cache.guardar('onde desova a tartaruga-verde?', vetor(1, 0, 0), [3, 1], {'resposta': 'Trindade'})
+
+    assert cache.obter(vetor(0.99, 0.1, 0), [1, 3]) == {'resposta': 'Trindade'}
+    assert cache.obter(vetor(0, 1, 0), [1, 3]) is None   # pergunta diferente
+    assert cache.obter(vetor(1, 0, 0), [1, 2]) is None   # outros chunks
+    assert cache.estatisticas['hits'] == 1 and cache.estatisticas['misses'] == 2
+
+
+def test_gravacao_agrupada_e_salvar_ao_encerrar(tmp_path):
+    caminho = str(tmp_path / 'respostas.pkl')
+    cache = CacheRespostas(caminho, intervalo_gravacao=3600, max_nao_gravadas=3)
+
+    for i in range(5):
+        cache.guardar(f"pergunta {i}", vetor(1, i, 0), [i], {'resposta': i})
+
+    # Uma gravação a cada 3 respostas, não uma por resposta
+    assert cache.estatisticas['gravacoes'] == 1
+    assert len(CacheRespostas(caminho)) == 3
+
+    cache.salvar()  # o que o atexit faz ao encerrar o processo
+    cache.salvar()  # nada pendente: não regrava
+    assert cache.estatisticas['gravacoes'] == 2
+    assert len(CacheRespostas(caminho)) == 5
+
+
+def test_gravacao_por_intervalo(tmp_path):
+    caminho = str(tmp_path / 'respostas.pkl')
+    cache = CacheRespostas(caminho, intervalo_gravacao=0, max_nao_gravadas=100)
+    cache.guardar('pergunta', vetor(1, 0, 0), [1], {'resposta': 1})
+    assert len(CacheRespostas(caminho)) == 1
+
+
+def test_versao_nova_descarta_respostas(tmp_path):
+    caminho = str(tmp_path / 'respostas.pkl')
+    cache = CacheRespostas(caminho, max_nao_gravadas=1)
+    cache.sincronizar_versao('indice-1')
+    cache.guardar('pergunta', vetor(1, 0, 0), [1], {'resposta': 1})
+
+    recarregado = CacheRespostas(caminho)
+    assert recarregado.versao == 'indice-1' and len(recarregado) == 1
+    recarregado.sincronizar_versao('indice-2')
+    assert len(CacheRespostas(caminho)) == 0
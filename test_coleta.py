@@ -0,0 +1,450 @@
+"""
+Testes da coleta OBIS/GBIF contra APIs simuladas (servidor_stub)
+"""
+
+import json
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+GEOMETRIA = "POLYGON((-50 5,-30 5,-30 -35,-50 -35,-50 5))"
+
+
+def ocorrencias_gbif(n):
+    return [{
+        'key': 1000 + i,
+        'decimalLatitude': -20.0 - i * 0.001,
+        'decimalLongitude': -40.0,
+        'eventDate': '2020-01-01'
+    } for i in range(n)]
+
+
+def ocorrencias_obis(n, inicio=0):
+    return [{
+        'id': f"obis-{i:05d}",
+        'decimalLatitude': -20.0 - i * 0.01,
+        'decimalLongitude': -40.0,
+        'eventDate': '2020-01-01'
+    } for i in range(inicio, inicio + n)]
+
+
+def rota_obis(registros):
+    """/v3/occurrence paginado por `after`, como a API do OBIS"""
+    def rota(params, cabecalhos):
+        posicao = 0
+        if params.get('after'):
+            posicao = [r['id'] for r in registros].index(params['after']) + 1
+        pagina = registros[posicao:posicao + int(params['size'])]
+        return 200, {'total': len(registros), 'results': pagina}
+    return rota
+
+
+def rota_gbif(registros, falha=None):
+    """/v1/occurrence/search paginado por offset; HTTP 500 a partir de falha['offset'] (se houver)"""
+    def rota(params, cabecalhos):
+        offset, limite = int(params.get('offset', 0)), int(params['limit'])
+        if falha and offset >= falha['offset']:
+            return 500, {}
+        pagina = registros[offset:offset + limite] if limite else []
+        return 200, {'count': len(registros), 'results': pagina,
+                     'endOfRecords': offset + limite >= len(registros), 'facets': []}
+    return rota
+
+
+def preparar_obis(coletor, servidor_stub, monkeypatch, registros):
+    monkeypatch.setattr(coletor, 'URL_API_OBIS', servidor_stub.url + '/v3')
+    servidor_stub.rotas['/v3/occurrence'] = rota_obis(registros)
+    return servidor_stub.url + '/v3/occurrence'
+
+
+def linhas(caminho):
+    with open(caminho, 'r', encoding='utf-8') as f:
+        return sum(1 for linha in f if linha.strip())
+
+
+# ============================================================================
+# PAGINAÇÃO
+# ============================================================================
+
+def test_paginas_obis_seguem_o_cursor_after(coletor, servidor_stub, monkeypatch):
+    base_url = preparar_obis(coletor, servidor_stub, monkeypatch, ocorrencias_obis(5))
+
+    paginas = list(coletor.paginas_obis('Chelonia mydas', base_url, GEOMETRIA, tamanho=2))
+
+    assert [[r['id'] for r in resultados] for resultados, _, _ in paginas] == [
+        ['obis-00000', 'obis-00001'], ['obis-00002', 'obis-00003'], ['obis-00004']
+    ]
+    assert [cursor for _, _, cursor in paginas] == [
+        {'after': 'obis-00001', 'lidos': 2}, {'after': 'obis-00003', 'lidos': 4}, {'after': 'obis-00004', 'lidos': 5}
+    ]
+    assert all(total == 5 for _, total, _ in paginas)
+    assert [params.get('after') for _, params, _ in servidor_stub.requisicoes] == [None, 'obis-00001', 'obis-00003']
+
+    # Retomada pelo cursor de uma página: continua na seguinte
+    retomadas = list(coletor.paginas_obis('Chelonia mydas', base_url, GEOMETRIA, paginas[0][2], tamanho=2))
+    assert [r['id'] for resultados, _, _ in retomadas for r in resultados] == ['obis-00002', 'obis-00003', 'obis-00004']
+    assert retomadas[-1][2]['lidos'] == 5
+
+
+def test_paginas_gbif_param_em_end_of_records(coletor, servidor_stub):
+    registros = ocorrencias_gbif(7)
+
+    def rota(params, cabecalhos):
+        offset, limite = int(params['offset']), int(params['limit'])
+        # count superestimado: só endOfRecords diz que acabou
+        return 200, {'count': 50, 'results': registros[offset:offset + limite],
+                     'endOfRecords': offset + limite >= len(registros)}
+
+    servidor_stub.rotas['/v1/occurrence/search'] = rota
+    paginas = list(coletor.paginas_gbif('Chelonia mydas', servidor_stub.url + '/v1/occurrence/search', tamanho=3))
+
+    assert [len(resultados) for resultados, _, _ in paginas] == [3, 3, 1]
+    assert [cursor for _, _, cursor in paginas] == [{'offset': 3}, {'offset': 6}, {'offset': 7}]
+    assert servidor_stub.contar('/v1/occurrence/search') == 3
+
+
+def test_paginas_gbif_param_no_limite_de_offset(coletor, servidor_stub, monkeypatch):
+    monkeypatch.setattr(coletor, 'LIMITE_OFFSET_GBIF', 900)
+    servidor_stub.rotas['/v1/occurrence/search'] = rota_gbif(ocorrencias_gbif(2000))
+
+    paginas = list(coletor.paginas_gbif('Chelonia mydas', servidor_stub.url + '/v1/occurrence/search'))
+
+    # 3 páginas de 300: a quarta passaria do offset máximo da API de busca
+    assert [cursor['offset'] for _, _, cursor in paginas] == [300, 600, 900]
+    assert max(int(params['offset']) for _, params, _ in servidor_stub.requisicoes) == 600
+
+
+def test_pagina_que_falha_interrompe_a_especie_como_incompleta(coletor, servidor_stub):
+    falha = {'offset': 4}
+    servidor_stub.rotas['/v1/occurrence/search'] = rota_gbif(ocorrencias_gbif(10), falha)
+    base_url = servidor_stub.url + '/v1/occurrence/search'
+
+    paginas = coletor.paginas_gbif('Chelonia mydas', base_url, tamanho=2)
+    assert len(next(paginas)[0]) == 2 and len(next(paginas)[0]) == 2
+    with pytest.raises(coletor.FalhaPaginacao, match='Chelonia mydas'):
+        next(paginas)
+    assert servidor_stub.contar('/v1/occurrence/search') == 2 + coletor.TENTATIVAS
+
+    resultado = coletor.coletar_especie_paginada(
+        'gbif', 'Chelonia mydas',
+        lambda cursor: coletor.paginas_gbif('Chelonia mydas', base_url, cursor, tamanho=2),
+        coletor.normalizar_registro_gbif
+    )
+    assert not resultado['completa']
+    assert (resultado['total'], resultado['lidos'], resultado['gravados']) == (10, 4, 4)
+    assert linhas(resultado['caminho']) == 4
+    with open(coletor.caminho_checkpoint('gbif', 'Chelonia mydas'), 'r', encoding='utf-8') as f:
+        assert json.load(f)['cursor'] == {'offset': 4}
+
+
+def test_coleta_paginada_grava_todas_as_paginas(coletor, servidor_stub, monkeypatch):
+    base_url = preparar_obis(coletor, servidor_stub, monkeypatch, ocorrencias_obis(5))
+
+    resultado = coletor.coletar_especie_paginada(
+        'obis', 'Chelonia mydas',
+        lambda cursor: coletor.paginas_obis('Chelonia mydas', base_url, GEOMETRIA, cursor, tamanho=2),
+        coletor.normalizar_registro_obis
+    )
+
+    assert resultado['completa']
+    assert (resultado['total'], resultado['lidos'], resultado['gravados'], resultado['registros']) == (5, 5, 5, 5)
+    with open(resultado['caminho'], 'r', encoding='utf-8') as f:
+        assert [json.loads(linha)['obis_id'] for linha in f] == [f"obis-{i:05d}" for i in range(5)]
+
+
+# ============================================================================
+# COLETA INCREMENTAL
+# ============================================================================
+
+def test_incremental_obis_consulta_o_total_fora_do_cache(coletor, servidor_stub, monkeypatch):
+    registros = ocorrencias_obis(3)
+    base_url = preparar_obis(coletor, servidor_stub, monkeypatch, registros)
+
+    entrada = coletor._coletar_especie_obis('Chelonia mydas', base_url, GEOMETRIA)
+    assert entrada['registros_coletados'] == 3
+
+    # Registro novo no OBIS dentro do TTL do cache HTTP: a sondagem do total
+    # não pode ser servida do cache, senão a espécie fica "sem novidades"
+    registros.extend(ocorrencias_obis(1, inicio=3))
+    entrada = coletor._coletar_especie_obis('Chelonia mydas', base_url, GEOMETRIA, incremental=True)
+
+    assert entrada['registros_coletados'] == 4
+    assert linhas(coletor.caminho_registros('obis', 'Chelonia mydas')) == 4
+
+
+def test_incremental_obis_recoleta_marca_dagua_antiga(coletor, servidor_stub, monkeypatch):
+    registros = ocorrencias_obis(3)
+    base_url = preparar_obis(coletor, servidor_stub, monkeypatch, registros)
+    coletor._coletar_especie_obis('Chelonia mydas', base_url, GEOMETRIA)
+
+    coletor._coletar_especie_obis('Chelonia mydas', base_url, GEOMETRIA, incremental=True)
+    paginas = servidor_stub.contar('/v3/occurrence')  # total igual: só a sondagem
+
+    caminho = coletor.caminho_estado('obis', 'Chelonia mydas')
+    with open(caminho, 'r', encoding='utf-8') as f:
+        estado = json.load(f)
+    dias = coletor.DIAS_RECOLETA_COMPLETA_OBIS + 1
+    estado['marca_dagua'] = (datetime.now() - timedelta(days=dias)).isoformat()
+    with open(caminho, 'w', encoding='utf-8') as f:
+        json.dump(estado, f)
+
+    registros[0]['eventDate'] = '2021-06-01'  # edição que não muda o total
+    coletor._coletar_especie_obis('Chelonia mydas', base_url, GEOMETRIA, incremental=True)
+
+    assert servidor_stub.contar('/v3/occurrence') == paginas + 1  # recoleta sem sondagem
+    with open(coletor.caminho_registros('obis', 'Chelonia mydas'), 'r', encoding='utf-8') as f:
+        assert json.loads(f.readline())['data_observacao'] == '2021-06-01'
+    assert os.path.exists(caminho)
+
+
+def test_incremental_gbif_no_mesmo_dia_nao_usa_pagina_do_cache(coletor, servidor_stub):
+    registros = ocorrencias_gbif(3)
+    delta = []
+
+    def rota(params, cabecalhos):
+        fonte = delta if 'lastInterpreted' in params else registros
+        offset, limite = int(params.get('offset', 0)), int(params['limit'])
+        return 200, {'count': len(fonte), 'results': fonte[offset:offset + limite] if limite else [],
+                     'endOfRecords': True, 'facets': []}
+
+    servidor_stub.rotas['/v1/occurrence/search'] = rota
+    base_url = servidor_stub.url + '/v1/occurrence/search'
+    coletor._coletar_especie_gbif('Chelonia mydas', base_url)
+
+    novo = ocorrencias_gbif(5)
+    registros.append(novo[3])
+    delta.append(novo[3])
+    assert coletor._coletar_especie_gbif('Chelonia mydas', base_url, incremental=True)['registros_coletados'] == 4
+
+    # Registro interpretado depois da primeira rodada incremental, no mesmo dia:
+    # a URL com lastInterpreted={hoje},* é a mesma, mas a página não pode vir do cache
+    registros.append(novo[4])
+    delta.append(novo[4])
+    entrada = coletor._coletar_especie_gbif('Chelonia mydas', base_url, incremental=True)
+
+    assert entrada['registros_coletados'] == 5
+    with open(coletor.caminho_registros('gbif', 'Chelonia mydas'), 'r', encoding='utf-8') as f:
+        assert sorted(json.loads(linha)['gbif_id'] for linha in f) == [1000, 1001, 1002, 1003, 1004]
+
+
+# ============================================================================
+# AGREGADOS
+# ============================================================================
+
+def test_agregados_gbif_mapeia_facetas(coletor, servidor_stub):
+    def rota(params, cabecalhos):
+        assert params['limit'] == '0'
+        return 200, {'count': 9, 'results': [], 'endOfRecords': True, 'facets': [
+            {'field': 'YEAR', 'counts': [{'name': '2021', 'count': 2}, {'name': '2019', 'count': 3},
+                                         {'name': '2020', 'count': 4}]},
+            {'field': 'STATE_PROVINCE', 'counts': [{'name': 'Bahia', 'count': 5}, {'name': 'São Paulo', 'count': 4}]},
+            {'field': 'BASIS_OF_RECORD', 'counts': [{'name': 'HUMAN_OBSERVATION', 'count': 9}]}
+        ]}
+
+    servidor_stub.rotas['/v1/occurrence/search'] = rota
+    agregados = coletor.agregados_gbif('Chelonia mydas', servidor_stub.url + '/v1/occurrence/search')
+
+    assert agregados == {
+        'por_ano': {'2019': 3, '2020': 4, '2021': 2},
+        'por_estado': {'Bahia': 5, 'São Paulo': 4},
+        'por_base_de_registro': {'HUMAN_OBSERVATION': 9}
+    }
+    assert list(agregados['por_ano']) == ['2019', '2020', '2021']
+    _, params, _ = servidor_stub.requisicoes[0]
+    assert params['facetLimit'] == str(coletor.LIMITE_FACETAS_GBIF)
+
+
+def test_agregados_obis_resumo_anos_e_grade(coletor, servidor_stub, monkeypatch):
+    monkeypatch.setattr(coletor, 'URL_API_OBIS', servidor_stub.url + '/v3')
+
+    def celula(lon, lat, n):
+        anel = [[lon, lat], [lon + 1, lat], [lon + 1, lat + 1], [lon, lat + 1], [lon, lat]]
+        return {'geometry': {'type': 'Polygon', 'coordinates': [anel]}, 'properties': {'n': n}}
+
+    servidor_stub.rotas['/v3/statistics'] = lambda params, cabecalhos: (
+        200, {'records': 12, 'datasets': 2, 'taxa': 1, 'species': 1})
+    servidor_stub.rotas['/v3/statistics/years'] = lambda params, cabecalhos: (
+        200, [{'year': 2020, 'records': 5}, {'year': None, 'records': 1}, {'year': 2018, 'records': 6}])
+    servidor_stub.rotas[f"/v3/occurrence/grid/{coletor.PRECISAO_GRADE_OBIS}"] = lambda params, cabecalhos: (
+        200, {'type': 'FeatureCollection', 'features': [celula(-41, -21, 4), celula(-39, -13, 8)]})
+
+    agregados = coletor.agregados_obis('Chelonia mydas', GEOMETRIA)
+
+    assert agregados['resumo'] == {'records': 12, 'datasets': 2, 'taxa': 1}
+    assert list(agregados['por_ano'].items()) == [('2018', 6), ('2020', 5)]
+    assert agregados['grade'] == [{'lat': -12.5, 'lon': -38.5, 'registros': 8},
+                                  {'lat': -20.5, 'lon': -40.5, 'registros': 4}]
+    for caminho, params, _ in servidor_stub.requisicoes:
+        assert params['scientificname'] == 'Chelonia mydas' and params['geometry'] == GEOMETRIA
+
+
+def contar_chamadas(coletor, monkeypatch, nome, agregados):
+    chamadas = []
+
+    def funcao(*args):
+        chamadas.append(args)
+        return agregados
+    monkeypatch.setattr(coletor, nome, funcao)
+    return chamadas
+
+
+def test_incremental_sem_novidades_reaproveita_agregados(coletor, servidor_stub, monkeypatch):
+    base_obis = preparar_obis(coletor, servidor_stub, monkeypatch, ocorrencias_obis(3))
+    registros, delta = ocorrencias_gbif(4), []
+    servidor_stub.rotas['/v1/occurrence/search'] = lambda params, cabecalhos: rota_gbif(
+        delta if 'lastInterpreted' in params else registros[:3] + delta)(params, cabecalhos)
+    base_gbif = servidor_stub.url + '/v1/occurrence/search'
+    chamadas_obis = contar_chamadas(coletor, monkeypatch, 'agregados_obis', {'por_ano': {'2020': 3}})
+    chamadas_gbif = contar_chamadas(coletor, monkeypatch, 'agregados_gbif', {'por_estado': {'Bahia': 3}})
+
+    for _ in range(2):
+        obis = coletor._coletar_especie_obis('Chelonia mydas', base_obis, GEOMETRIA, incremental=True)
+        gbif = coletor._coletar_especie_gbif('Chelonia mydas', base_gbif, incremental=True)
+
+    assert (len(chamadas_obis), len(chamadas_gbif)) == (1, 1)
+    assert obis['agregados'] == {'por_ano': {'2020': 3}}
+    assert gbif['agregados'] == {'por_estado': {'Bahia': 3}}
+
+    # Registro novo no GBIF: os agregados são buscados de novo
+    delta.append(registros[3])
+    coletor._coletar_especie_gbif('Chelonia mydas', base_gbif, incremental=True)
+    assert len(chamadas_gbif) == 2
+
+
+# ============================================================================
+# CHECKPOINTS E --resume
+# ============================================================================
+
+def test_falha_no_meio_da_especie_mantem_checkpoint_e_retoma(coletor, servidor_stub, monkeypatch):
+    # Todas as APIs vão para o servidor local, como no replay da bancada
+    monkeypatch.setattr(coletor, 'sessoes', coletor.PoolSessoes(coletor.HEADERS, replay=servidor_stub.url))
+    monkeypatch.setattr(coletor, 'coletar_copernicus_marine', lambda: {
+        'metadados': {'produtos_referenciados': 0, 'produtos_consultados': 0}
+    })
+    monkeypatch.setattr(coletor, 'USAR_CACHE_HTTP', False)
+
+    falha = {'offset': 300}
+    registros_gbif = ocorrencias_gbif(700)
+    servidor_stub.rotas['/api.obis.org/v3/occurrence'] = rota_obis(ocorrencias_obis(2))
+    servidor_stub.rotas['/api.gbif.org/v1/occurrence/search'] = rota_gbif(registros_gbif, falha)
+
+    especie = 'Chelonia mydas'
+    coletor.executar_coleta(especies=[especie], paralelo=False)
+
+    with open('data/gbif_ocorrencias.json', 'r', encoding='utf-8') as f:
+        entrada = json.load(f)['especies'][0]
+    assert not entrada['coleta_completa']
+    assert entrada['registros_coletados'] == 300
+
+    # A coleta incompleta não pode apagar os checkpoints
+    with open(coletor.caminho_checkpoint('gbif', especie), 'r', encoding='utf-8') as f:
+        assert json.load(f)['cursor'] == {'offset': 300}
+    with open(coletor.caminho_checkpoint('obis', especie), 'r', encoding='utf-8') as f:
+        assert json.load(f)['concluida']
+
+    # --resume com a API de volta: OBIS é pulado e o GBIF continua do offset 300
+    falha.clear()
+    monkeypatch.setattr(coletor, 'RETOMAR', True)
+    paginas_obis = servidor_stub.contar('/api.obis.org/v3/occurrence')
+    inicio = len(servidor_stub.requisicoes)
+    coletor.executar_coleta(especies=[especie], paralelo=False)
+
+    offsets = [int(params['offset']) for caminho, params, _ in servidor_stub.requisicoes[inicio:]
+               if caminho == '/api.gbif.org/v1/occurrence/search' and params['limit'] != '0']
+    assert offsets == [300, 600]
+    assert servidor_stub.contar('/api.obis.org/v3/occurrence') == paginas_obis
+
+    with open('data/gbif_ocorrencias.json', 'r', encoding='utf-8') as f:
+        entrada = json.load(f)['especies'][0]
+    assert entrada['coleta_completa'] and entrada['registros_coletados'] == 700
+    assert linhas(coletor.caminho_registros('gbif', especie)) == 700
+    assert not os.path.exists(coletor.DIR_CHECKPOINTS)
+
+
+# ============================================================================
+# WORLD BANK (LOTES DE INDICADORES)
+# ============================================================================
+
+def rota_world_bank(codigos, valores):
+    """Vários indicadores por chamada (códigos com ';'), registros misturados, paginado por `page`"""
+    registros = [{'indicator': {'id': codigo}, 'country': {'value': 'Brazil'},
+                  'date': str(ano), 'value': valor, 'unit': ''}
+                 for ano in range(2020, 2024) for codigo in codigos
+                 for valor in [valores.get(codigo, {}).get(ano)] if codigo in valores]
+
+    def rota(params, cabecalhos):
+        assert params['source'] == '2'
+        tamanho, pagina = int(params['per_page']), int(params['page'])
+        paginas = max(1, -(-len(registros) // tamanho))
+        return 200, [{'page': pagina, 'pages': paginas, 'total': len(registros)},
+                     registros[(pagina - 1) * tamanho:pagina * tamanho]]
+    return rota
+
+
+def test_world_bank_em_lotes_paginados_separados_por_indicador(coletor, servidor_stub, monkeypatch):
+    from transporte_http import PoolSessoes
+
+    # Replay: a URL real (api.worldbank.org/...;...) vai para o stub como /<host>/<caminho>
+    monkeypatch.setattr(coletor, 'sessoes', PoolSessoes(coletor.HEADERS, replay=servidor_stub.url))
+    monkeypatch.setattr(coletor, 'INDICADORES_POR_LOTE_WORLD_BANK', 4)
+    monkeypatch.setattr(coletor, 'TAMANHO_PAGINA_WORLD_BANK', 3)
+
+    valores = {
+        'EN.ATM.CO2E.KT': {2020: 1.0, 2021: 2.0, 2022: 3.0, 2023: 4.0},
+        'EN.ATM.GHGT.KT.CE': {2021: 5.0},
+        'ER.PTD.TOTL.ZS': {},                   # responde, mas só com value nulo
+        'AG.LND.EL5M.ZS': {2020: 6.0, 2023: 7.0},
+        'SP.URB.TOTL.IN.ZS': {2022: 8.0},       # EN.POP.EL5M.ZS: sem nenhum registro
+    }
+    lotes = [['EN.ATM.CO2E.KT', 'EN.ATM.GHGT.KT.CE', 'ER.PTD.TOTL.ZS', 'AG.LND.EL5M.ZS'],
+             ['EN.POP.EL5M.ZS', 'SP.URB.TOTL.IN.ZS']]
+    caminhos = [f"/api.worldbank.org/v2/country/BR/indicator/{';'.join(lote)}" for lote in lotes]
+    for caminho, lote in zip(caminhos, lotes):
+        servidor_stub.rotas[caminho] = rota_world_bank(lote, valores)
+
+    resultado = coletor.coletar_world_bank_climate()
+
+    # 16 registros no 1º lote => 6 páginas de 3; 4 no 2º => 2 páginas
+    assert servidor_stub.contar(caminhos[0]) == 6
+    assert servidor_stub.contar(caminhos[1]) == 2
+    assert len(servidor_stub.requisicoes) == 8
+
+    por_codigo = {i['codigo']: i['dados_temporais'] for i in resultado['indicadores_climaticos']}
+    assert {codigo: {int(d['ano']): d['valor'] for d in dados} for codigo, dados in por_codigo.items()} == {
+        codigo: anos for codigo, anos in valores.items() if anos
+    }
+    assert resultado['metadados']['indicadores_com_dados'] == 4
+    assert por_codigo['SP.URB.TOTL.IN.ZS'][0]['pais'] == 'Brazil'
+
+
+# ============================================================================
+# SHARDS EM VÁRIOS PROCESSOS
+# ============================================================================
+
+def test_processo_reaproveitado_por_dois_shards(coletor, servidor_stub, monkeypatch):
+    monkeypatch.setattr(coletor, 'LIMITE_POR_HOST', {'api.obis.org': 4, 'api.gbif.org': 6})
+    coletor.limitador.taxas = {'api.obis.org': (5.0, 5)}
+    configuracao = coletor.configuracao_processo()
+
+    servidor_stub.rotas['/api'] = lambda params, cabecalhos: (200, {})
+
+    def coletar(especies, max_workers, incremental):
+        coletor.fazer_requisicao(servidor_stub.url + '/api', {'especie': especies[0]})
+        return {'metadados': {'total_especies_consultadas': len(especies)}, 'especies': []}
+
+    monkeypatch.setattr(coletor, 'coletar_obis', coletar)
+    monkeypatch.setattr(coletor, 'coletar_gbif', coletar)
+
+    # O mesmo processo (este) executa dois shards seguidos, como um worker do pool
+    partes = [coletor._executar_shard(indice, [f"especie {indice}"], 2, 1, False, configuracao, 0)
+              for indice in range(2)]
+
+    assert coletor.LIMITE_POR_HOST == {'api.obis.org': 2, 'api.gbif.org': 3}
+    assert coletor.limitador.taxas == {'api.obis.org': (2.5, 2)}
+    assert coletor.limitador.padrao == (500.0, 500)
+
+    for _, _, estatisticas in partes:
+        assert estatisticas['cache']['misses'] == 2
+        assert estatisticas['sessoes']['requisicoes'] == 2
+    assert servidor_stub.contar('/api') == 4
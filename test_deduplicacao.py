@@ -0,0 +1,87 @@
+"""
+Testes da deduplicação OBIS x GBIF (chave espaço-temporal e índice hash)
+"""
+
+import json
+import os
+
+from armazenamento_colunar import LeitorColunar
+from deduplicacao import IndiceDuplicatas, chave_ocorrencia
+
+
+def ocorrencia(lat=-23.45678, lon=-45.12345, data='2019-03-04T10:00:00', dataset='REMAB Tartarugas', **extras):
+    return dict(latitude=lat, longitude=lon, data_observacao=data, dataset=dataset, **extras)
+
+
+def test_chave_ocorrencia_tolera_diferencas_entre_fontes():
+    base = chave_ocorrencia(ocorrencia(), 'Chelonia mydas')
+
+    # Arredondamento, hora do dia, intervalo de datas, caixa e espaços do dataset
+    assert chave_ocorrencia(ocorrencia(lat=-23.4568, lon=-45.1235), 'Chelonia mydas') == base
+    assert chave_ocorrencia(ocorrencia(data='2019-03-04'), 'Chelonia mydas') == base
+    assert chave_ocorrencia(ocorrencia(data='2019-03-04/2019-03-05'), 'Chelonia mydas') == base
+    assert chave_ocorrencia(ocorrencia(dataset='  remab   TARTARUGAS '), 'CHELONIA MYDAS') == base
+
+    assert chave_ocorrencia(ocorrencia(lat=-23.458), 'Chelonia mydas') != base
+    assert chave_ocorrencia(ocorrencia(data='2019-03-05'), 'Chelonia mydas') != base
+    assert chave_ocorrencia(ocorrencia(dataset='Outro'), 'Chelonia mydas') != base
+    assert chave_ocorrencia(ocorrencia(), 'Caretta caretta') != base
+
+    assert chave_ocorrencia(ocorrencia(lat=-0.0001), 'x') == chave_ocorrencia(ocorrencia(lat=0.0001), 'x')
+    assert chave_ocorrencia(ocorrencia(lat=None), 'x') is None
+
+
+def test_indice_casa_cada_primario_uma_vez():
+    indice = IndiceDuplicatas()
+    for _ in range(2):
+        indice.indexar(ocorrencia(), 'Chelonia mydas')  # mesmo evento duas vezes no OBIS
+    indice.indexar(ocorrencia(lat=None), 'Chelonia mydas')
+
+    assert indice.casar(ocorrencia(gbif_id=1), 'Chelonia mydas')
+    assert indice.casar(ocorrencia(gbif_id=2), 'Chelonia mydas')
+    assert not indice.casar(ocorrencia(gbif_id=3), 'Chelonia mydas')  # primários esgotados
+    assert not indice.casar(ocorrencia(lat=-10.0, gbif_id=4), 'Chelonia mydas')
+    assert not indice.casar(ocorrencia(lat=None, gbif_id=5), 'Chelonia mydas')
+    assert indice.duplicatas == 2
+
+    ids = {indice.proveniencia(ocorrencia(), 'Chelonia mydas') for _ in range(2)}
+    assert ids == {1, 2}
+    assert indice.proveniencia(ocorrencia(), 'Chelonia mydas') is None
+
+
+def gravar_jsonl(caminho, registros):
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    with open(caminho, 'w', encoding='utf-8') as f:
+        for registro in registros:
+            f.write(json.dumps(registro) + '\n')
+    return caminho
+
+
+def test_mescla_obis_gbif_nos_armazens_colunares(coletor):
+    especie = 'Chelonia mydas'
+    obis = [ocorrencia(obis_id='a'), ocorrencia(lat=-10.0, obis_id='b')]
+    gbif = [ocorrencia(lat=-23.4568, gbif_id=11), ocorrencia(lat=-5.0, gbif_id=12)]
+
+    dados_obis = {'metadados': {}, 'especies': [{
+        'nome_cientifico': especie,
+        'arquivo_registros': gravar_jsonl(coletor.caminho_registros('obis', especie), obis)
+    }]}
+    dados_gbif = {'metadados': {}, 'especies': [{
+        'nome_cientifico': especie,
+        'arquivo_registros': gravar_jsonl(coletor.caminho_registros('gbif', especie), gbif)
+    }]}
+
+    assert coletor.construir_armazens_colunares(dados_obis, dados_gbif) == 1
+    assert dados_obis['especies'][0]['registros_tambem_no_gbif'] == 1
+    assert dados_gbif['especies'][0]['registros_duplicados_obis'] == 1
+
+    leitor_obis = LeitorColunar(os.path.join(coletor.DIR_COLUNAR, 'obis'))
+    linhas = [leitor_obis.registro(i, ['obis_id', 'fontes', 'gbif_id']) for i in range(leitor_obis.linhas)]
+    assert linhas == [
+        {'obis_id': 'a', 'fontes': 'obis+gbif', 'gbif_id': 11},
+        {'obis_id': 'b', 'fontes': 'obis', 'gbif_id': None}
+    ]
+
+    leitor_gbif = LeitorColunar(os.path.join(coletor.DIR_COLUNAR, 'gbif'))
+    assert leitor_gbif.linhas == 1
+    assert leitor_gbif.valor('gbif_id', 0) == 12
@@ -0,0 +1,213 @@
+"""
+Testes dos resumos de grades Copernicus sobre NetCDF3 gerados localmente
+"""
+
+import numpy as np
+import pytest
+
+from grade_copernicus import abrir_grade, ingerir_arquivo, resumir_variavel
+
+CAIXA = {'lat_min': -30.0, 'lat_max': 0.0, 'lon_min': -50.0, 'lon_max': -30.0}
+TIPOS = {np.dtype('>i2'): 3, np.dtype('>i4'): 4, np.dtype('>f4'): 5, np.dtype('>f8'): 6}
+
+
+def _inteiro(valor):
+    return int(valor).to_bytes(4, 'big')
+
+
+def _nome(texto):
+    dados = texto.encode('utf-8')
+    return _inteiro(len(dados)) + dados + b'\0' * (-len(dados) % 4)
+
+
+def escrever_netcdf3(caminho, dimensoes, variaveis):
+    """
+    NetCDF3 clássico (CDF-1) mínimo, sem dimensão de registro
+    dimensoes: [(nome, tamanho)]; variaveis: [(nome, dims, array, atributos)]
+    """
+    indices = {nome: i for i, (nome, _) in enumerate(dimensoes)}
+
+    def atributos(attrs):
+        if not attrs:
+            return _inteiro(0) + _inteiro(0)
+        partes = [_inteiro(0x0C), _inteiro(len(attrs))]
+        for chave, valor in attrs.items():
+            if isinstance(valor, str):
+                dados = valor.encode('utf-8')
+                partes += [_nome(chave), _inteiro(2), _inteiro(len(dados)), dados + b'\0' * (-len(dados) % 4)]
+            else:
+                valor = np.atleast_1d(valor)
+                dados = valor.tobytes()
+                partes += [_nome(chave), _inteiro(TIPOS[valor.dtype]), _inteiro(valor.size),
+                           dados + b'\0' * (-len(dados) % 4)]
+        return b''.join(partes)
+
+    def cabecalho(inicios):
+        partes = [b'CDF\x01', _inteiro(0), _inteiro(0x0A), _inteiro(len(dimensoes))]
+        for nome, tamanho in dimensoes:
+            partes += [_nome(nome), _inteiro(tamanho)]
+        partes += [_inteiro(0), _inteiro(0), _inteiro(0x0B), _inteiro(len(variaveis))]
+        for (nome, dims, array, attrs), inicio in zip(variaveis, inicios):
+            partes += [_nome(nome), _inteiro(len(dims))] + [_inteiro(indices[d]) for d in dims]
+            partes += [atributos(attrs), _inteiro(TIPOS[array.dtype]),
+                       _inteiro(array.nbytes + (-array.nbytes % 4)), _inteiro(inicio)]
+        return b''.join(partes)
+
+    tamanho_cabecalho = len(cabecalho([0] * len(variaveis)))
+    inicios = []
+    posicao = tamanho_cabecalho
+    for _, _, array, _ in variaveis:
+        inicios.append(posicao)
+        posicao += array.nbytes + (-array.nbytes % 4)
+
+    with open(caminho, 'wb') as f:
+        f.write(cabecalho(inicios))
+        for _, _, array, _ in variaveis:
+            f.write(np.ascontiguousarray(array).tobytes() + b'\0' * (-array.nbytes % 4))
+    return str(caminho)
+
+
+def grade_exemplo():
+    """thetao (time, lat, lon) com 3 passos, 2 latitudes e 3 longitudes"""
+    tempo = np.array([0, 31, 60], dtype='>f8')  # 1º de jan, fev e mar de 2020
+    latitudes = np.array([-20.0, -10.0], dtype='>f4')
+    longitudes = np.array([-45.0, -40.0, -35.0], dtype='>f4')
+    thetao = (np.arange(18, dtype=np.float64).reshape(3, 2, 3) + 20.0).astype('>f4')
+    return tempo, latitudes, longitudes, thetao
+
+
+def coordenadas(tempo, latitudes, longitudes):
+    return [
+        ('time', ('time',), tempo, {'units': 'days since 2020-01-01 00:00:00'}),
+        ('latitude', ('latitude',), latitudes, {}),
+        ('longitude', ('longitude',), longitudes, {})
+    ]
+
+
+def test_eixos_em_qualquer_ordem(tmp_path):
+    tempo, latitudes, longitudes, thetao = grade_exemplo()
+    dimensoes = [('time', 3), ('latitude', 2), ('longitude', 3)]
+
+    padrao = escrever_netcdf3(tmp_path / 'padrao.nc', dimensoes, coordenadas(tempo, latitudes, longitudes) + [
+        ('thetao', ('time', 'latitude', 'longitude'), thetao, {})
+    ])
+    invertido = escrever_netcdf3(tmp_path / 'invertido.nc', dimensoes, coordenadas(tempo, latitudes, longitudes) + [
+        ('thetao', ('longitude', 'latitude', 'time'), thetao.transpose(2, 1, 0).copy(), {})
+    ])
+
+    esperado = resumir_variavel(abrir_grade(padrao), 'thetao', CAIXA)
+    resumo = resumir_variavel(abrir_grade(invertido), 'thetao', CAIXA)
+
+    np.testing.assert_allclose(esperado['media'], thetao.astype(np.float64).mean(axis=0))
+    for chave in ('media', 'minimo', 'maximo', 'contagem'):
+        np.testing.assert_array_equal(resumo[chave], esperado[chave])
+    assert resumo['mensal'] == esperado['mensal']
+    assert list(resumo['mensal']) == ['2020-01', '2020-02', '2020-03']
+
+
+def test_preenchimento_padrao_sem_fill_value(tmp_path):
+    tempo, latitudes, longitudes, thetao = grade_exemplo()
+    thetao[1, 0, 0] = np.float32(9.96921e36)  # célula nunca escrita (sem _FillValue declarado)
+    thetao[:, 1, 2] = np.float32(9.96921e36)
+
+    caminho = escrever_netcdf3(tmp_path / 'sem_fill.nc', [('time', 3), ('latitude', 2), ('longitude', 3)],
+                               coordenadas(tempo, latitudes, longitudes) + [
+                                   ('thetao', ('time', 'latitude', 'longitude'), thetao, {})
+                               ])
+    resumo = resumir_variavel(abrir_grade(caminho), 'thetao', CAIXA)
+
+    assert resumo['contagem'][0, 0] == 2
+    assert resumo['media'][0, 0] == pytest.approx((20.0 + 32.0) / 2)
+    assert resumo['contagem'][1, 2] == 0 and np.isnan(resumo['media'][1, 2])
+    assert np.nanmax(resumo['maximo']) < 100
+
+
+def test_fill_value_declarado_e_escala(tmp_path):
+    tempo, latitudes, longitudes, _ = grade_exemplo()
+    bruto = np.full((3, 2, 3), 2000, dtype='>i2')
+    bruto[0, 0, 0] = -999
+
+    caminho = escrever_netcdf3(tmp_path / 'escala.nc', [('time', 3), ('latitude', 2), ('longitude', 3)],
+                               coordenadas(tempo, latitudes, longitudes) + [
+                                   ('so', ('time', 'latitude', 'longitude'), bruto, {
+                                       '_FillValue': np.array([-999], dtype='>i2'),
+                                       'scale_factor': np.array([0.01], dtype='>f8'),
+                                       'add_offset': np.array([15.0], dtype='>f8')
+                                   })
+                               ])
+    resumo = resumir_variavel(abrir_grade(caminho), 'so', CAIXA)
+
+    assert resumo['contagem'][0, 0] == 2
+    np.testing.assert_allclose(resumo['media'], 35.0)
+
+
+def test_profundidade_usa_o_nivel_mais_raso(tmp_path):
+    tempo, latitudes, longitudes, thetao = grade_exemplo()
+    profundidades = np.array([0.5, 100.0], dtype='>f4')
+    cubo = np.stack([thetao, thetao - 10]).transpose(1, 0, 2, 3).astype('>f4')  # (time, depth, lat, lon)
+
+    caminho = escrever_netcdf3(tmp_path / 'profundidade.nc',
+                               [('time', 3), ('depth', 2), ('latitude', 2), ('longitude', 3)],
+                               coordenadas(tempo, latitudes, longitudes) + [
+                                   ('depth', ('depth',), profundidades, {}),
+                                   ('thetao', ('latitude', 'longitude', 'depth', 'time'),
+                                    cubo.transpose(2, 3, 1, 0).copy(), {})
+                               ])
+    resumo = resumir_variavel(abrir_grade(caminho), 'thetao', CAIXA)
+
+    assert resumo['profundidade_m'] == 0.5
+    np.testing.assert_allclose(resumo['media'], thetao.astype(np.float64).mean(axis=0))
+
+
+def test_media_regional_ponderada_como_a_serie_mensal(tmp_path):
+    tempo, latitudes, longitudes, thetao = grade_exemplo()
+    latitudes[:] = [-30.0, 0.0]  # cos(lat) bem diferente entre as duas linhas
+    thetao[0, 1, :] = np.nan      # janeiro sem a linha do equador: contagens desiguais
+
+    caminho = escrever_netcdf3(tmp_path / 'peso.nc', [('time', 3), ('latitude', 2), ('longitude', 3)],
+                               coordenadas(tempo, latitudes, longitudes) + [
+                                   ('thetao', ('time', 'latitude', 'longitude'), thetao, {})
+                               ])
+    resumo = resumir_variavel(abrir_grade(caminho), 'thetao', CAIXA)
+
+    peso = np.broadcast_to(np.cos(np.radians(latitudes.astype(np.float64)))[None, :, None], thetao.shape)
+    validos = ~np.isnan(thetao)
+    esperado = (np.where(validos, thetao, 0) * peso).sum() / (validos * peso).sum()
+    assert resumo['media_regional'] == pytest.approx(esperado, abs=1e-3)
+    assert resumo['media_regional'] != pytest.approx(float(np.nanmean(resumo['media'])), abs=1e-3)
+
+    # Um único mês: média regional do período == média do mês
+    um_mes = escrever_netcdf3(tmp_path / 'um_mes.nc', [('time', 1), ('latitude', 2), ('longitude', 3)],
+                              coordenadas(tempo[:1], latitudes, longitudes) + [
+                                  ('thetao', ('time', 'latitude', 'longitude'), thetao[1:2].copy(), {})
+                              ])
+    produto = ingerir_arquivo(um_mes, CAIXA, destino=str(tmp_path / 'grades'))
+    resumo_produto = produto['resumos'][0]
+    assert resumo_produto['media_regional'] == resumo_produto['mensal']['2020-01']['media']
+
+
+def test_longitudes_0_a_360(tmp_path):
+    tempo, latitudes, longitudes, thetao = grade_exemplo()
+    dimensoes = [('time', 3), ('latitude', 2), ('longitude', 3)]
+
+    referencia = escrever_netcdf3(tmp_path / 'referencia.nc', dimensoes, coordenadas(tempo, latitudes, longitudes) + [
+        ('thetao', ('time', 'latitude', 'longitude'), thetao, {})
+    ])
+
+    # Mesma grade em 0..360 e com colunas fora da caixa dos dois lados
+    longitudes_360 = np.array([100.0, 315.0, 320.0, 325.0, 355.0], dtype='>f4')
+    cubo = np.concatenate([np.full((3, 2, 1), 99.0), thetao, np.full((3, 2, 1), 99.0)], axis=2).astype('>f4')
+    global_360 = escrever_netcdf3(tmp_path / 'global_360.nc', [('time', 3), ('latitude', 2), ('longitude', 5)],
+                                  coordenadas(tempo, latitudes, longitudes_360) + [
+                                      ('thetao', ('time', 'latitude', 'longitude'), cubo, {})
+                                  ])
+
+    grade = abrir_grade(global_360)
+    np.testing.assert_allclose(grade['longitude'], [100.0, -45.0, -40.0, -35.0, -5.0])
+
+    esperado = resumir_variavel(abrir_grade(referencia), 'thetao', CAIXA)
+    resumo = resumir_variavel(grade, 'thetao', CAIXA)
+    np.testing.assert_allclose(resumo['longitude'], [-45.0, -40.0, -35.0])
+    np.testing.assert_array_equal(resumo['media'], esperado['media'])
+    assert resumo['media_regional'] == esperado['media_regional']
+    assert resumo['mensal'] == esperado['mensal']
@@ -0,0 +1,56 @@
+"""
+Testes da construção de índices FAISS em corpus pequenos
+"""
+
+import numpy as np
+import pytest
+
+from indices_ann import QUANTIZADOS, construir_indice, tipo_do_indice, tipo_efetivo, vetores_sinteticos
+
+
+@pytest.mark.parametrize('tipo, esperado', [
+    ('pq', 'sq8'),          # 25 < 2^8 vetores por subquantizador
+    ('ivf_pq', 'sq8'),
+    ('ivf_flat', 'ivf_flat'),
+    ('flat', 'flat'),
+])
+def test_corpus_pequeno_nao_quebra_o_treino(tipo, esperado, capsys):
+    vetores = vetores_sinteticos(25, dimensao=64, grupos=5)
+    ids = np.arange(100, 125)
+
+    indice = construir_indice(tipo, vetores, ids)
+
+    assert tipo_do_indice(indice) == esperado == tipo_efetivo(tipo, 25)
+    assert (tipo_do_indice(indice) in QUANTIZADOS) == (tipo in QUANTIZADOS)  # reordenação continua valendo
+    assert indice.ntotal == 25
+    _, vizinhos = indice.search(vetores[:1], 1)
+    assert vizinhos[0, 0] == 100
+    assert ('não bastam' in capsys.readouterr().out) == (esperado != tipo)
+
+
+def test_pq_treina_com_vetores_suficientes():
+    vetores = vetores_sinteticos(300, dimensao=32, grupos=5)
+    indice = construir_indice('pq', vetores, np.arange(300))
+    assert tipo_do_indice(indice) == 'pq'
+
+
+def test_tipo_desconhecido():
+    with pytest.raises(ValueError, match='desconhecido'):
+        construir_indice('lsh', vetores_sinteticos(10, dimensao=8), np.arange(10))
+
+
+def test_ivf_pq_pequeno_vira_sq8_que_busca_e_atualiza():
+    vetores = vetores_sinteticos(200, dimensao=32, grupos=5)
+    indice = construir_indice('ivf_pq', vetores[:150], np.arange(150))
+    assert tipo_do_indice(indice) == 'sq8' and indice.ntotal == 150
+
+    _, vizinhos = indice.search(vetores[:3], 1)
+    assert vizinhos[:, 0].tolist() == [0, 1, 2]
+
+    # Atualização incremental como em atualizar_indice: remove e adiciona por ID
+    assert indice.remove_ids(np.arange(0, 10, dtype=np.int64)) == 10
+    indice.add_with_ids(vetores[150:], np.arange(150, 200))
+    assert indice.ntotal == 190
+
+    _, vizinhos = indice.search(vetores[[0, 160, 199]], 1)
+    assert vizinhos[0, 0] != 0 and vizinhos[1:, 0].tolist() == [160, 199]
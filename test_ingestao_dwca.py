@@ -0,0 +1,128 @@
+"""
+Testes da ingestão de Darwin Core Archives (zips gerados localmente)
+"""
+
+import json
+import os
+import zipfile
+
+from armazenamento_colunar import LeitorColunar
+from ingestao_dwca import linhas_dwca, na_caixa, nome_especie, para_registro_api
+
+
+META_OBIS = """<?xml version="1.0" encoding="UTF-8"?>
+<archive xmlns="http://rs.tdwg.org/dwc/text/">
+  <core rowType="http://rs.tdwg.org/dwc/terms/Event" fieldsTerminatedBy="\\t" ignoreHeaderLines="1">
+    <files><location>event.txt</location></files>
+    <id index="0"/>
+  </core>
+  <extension rowType="http://rs.tdwg.org/dwc/terms/Occurrence" fieldsTerminatedBy="\\t"
+             fieldsEnclosedBy="" ignoreHeaderLines="1" encoding="UTF-8">
+    <files><location>occurrence.txt</location></files>
+    <coreid index="0"/>
+    <field index="1" term="http://rs.tdwg.org/dwc/terms/occurrenceID"/>
+    <field index="2" term="http://rs.tdwg.org/dwc/terms/scientificName"/>
+    <field index="3" term="http://rs.tdwg.org/dwc/terms/decimalLatitude"/>
+    <field index="4" term="http://rs.tdwg.org/dwc/terms/decimalLongitude"/>
+    <field index="5" term="http://rs.tdwg.org/dwc/terms/eventDate"/>
+    <field index="6" term="http://rs.tdwg.org/dwc/terms/minimumDepthInMeters"/>
+    <field index="7" term="http://rs.tdwg.org/dwc/terms/maximumDepthInMeters"/>
+    <field term="http://rs.tdwg.org/dwc/terms/country" default="Brazil"/>
+  </extension>
+</archive>
+"""
+
+# occurrenceID reais costumam ser URNs com bem mais de 36 caracteres,
+# iguais até o fim (truncá-los juntaria registros distintos)
+PREFIXO_URN = 'urn:catalog:Projeto Tamar – Praia do Forte:Tartarugas:'
+OCORRENCIAS_OBIS = [
+    ['ev1', PREFIXO_URN + '2019-0001', 'Chelonia mydas (Linnaeus, 1758)', '-12.57', '-38.00', '2019-01-02', '1', '3'],
+    ['ev1', PREFIXO_URN + '2019-0002', 'Chelonia mydas (Linnaeus, 1758)', '-12.58', '-38.01', '2019-01-02', '', ''],
+    ['ev2', 'curto-1', 'Caretta caretta', '-3.0', '-20.0', '2020', '', ''],   # fora da ZEE
+    ['ev2', 'curto-2', 'Caretta caretta', '', '', '2020', '', ''],            # sem coordenadas
+]
+
+
+def criar_archive(caminho, arquivos):
+    with zipfile.ZipFile(caminho, 'w', zipfile.ZIP_DEFLATED) as arquivo_zip:
+        for nome, conteudo in arquivos.items():
+            arquivo_zip.writestr(nome, conteudo)
+    return str(caminho)
+
+
+def archive_obis(caminho):
+    cabecalho = '\t'.join(['id', 'occurrenceID', 'scientificName', 'decimalLatitude', 'decimalLongitude',
+                           'eventDate', 'minimumDepthInMeters', 'maximumDepthInMeters'])
+    linhas = [cabecalho] + ['\t'.join(linha) for linha in OCORRENCIAS_OBIS]
+    return criar_archive(caminho, {
+        'meta.xml': META_OBIS,
+        'event.txt': 'id\teventDate\nev1\t2019-01-02\nev2\t2020\n',
+        'occurrence.txt': '\n'.join(linhas) + '\n'
+    })
+
+
+def test_linhas_de_uma_extensao_de_ocorrencias(tmp_path):
+    linhas = list(linhas_dwca(archive_obis(tmp_path / 'obis.zip')))
+
+    assert len(linhas) == 4
+    primeira = linhas[0]
+    assert primeira['eventID'] == 'ev1'  # coreid aponta para o evento, não para a ocorrência
+    assert primeira['occurrenceID'] == PREFIXO_URN + '2019-0001'
+    assert primeira['decimalLatitude'] == -12.57  # termos numéricos viram float
+    assert primeira['country'] == 'Brazil'        # valor padrão do meta.xml
+    assert linhas[1]['minimumDepthInMeters'] is None
+    assert linhas[3]['decimalLatitude'] is None
+
+    assert nome_especie(primeira) == 'Chelonia mydas'
+    assert [na_caixa(linha) for linha in linhas] == [True, True, False, False]
+
+    registro = para_registro_api(primeira, 'obis')
+    assert registro['id'] == PREFIXO_URN + '2019-0001'
+    assert registro['depth'] == 2.0
+
+
+def test_archive_do_gbif_sem_meta_xml(tmp_path):
+    caminho = criar_archive(tmp_path / 'gbif.zip', {
+        'occurrence.txt': 'gbifID\tspecies\tdecimalLatitude\tdecimalLongitude\n'
+                          '4011\tChelonia mydas\t-23.1\t-44.2\n'
+                          'x\tChelonia mydas\tnão numérico\t-44.2\n'
+    })
+    linhas = list(linhas_dwca(caminho))
+
+    assert linhas[0] == {'gbifID': 4011, 'species': 'Chelonia mydas',
+                         'decimalLatitude': -23.1, 'decimalLongitude': -44.2}
+    assert linhas[1]['gbifID'] is None and linhas[1]['decimalLatitude'] is None
+    assert para_registro_api(linhas[0], 'gbif')['key'] == 4011
+
+
+def test_occurrence_id_longo_chega_intacto_ao_armazem(coletor, tmp_path):
+    dados_obis = coletor.ingerir_dwca(archive_obis(tmp_path / 'obis.zip'), 'obis')
+    dados_gbif = {'metadados': {}, 'especies': []}
+
+    assert [e['nome_cientifico'] for e in dados_obis['especies']] == ['Chelonia mydas']
+    caminho = dados_obis['especies'][0]['arquivo_registros']
+    with open(caminho, 'r', encoding='utf-8') as f:
+        ids = [json.loads(linha)['obis_id'] for linha in f]
+    assert ids == [PREFIXO_URN + '2019-0001', PREFIXO_URN + '2019-0002']
+
+    coletor.construir_armazens_colunares(dados_obis, dados_gbif)
+    leitor = LeitorColunar(os.path.join(coletor.DIR_COLUNAR, 'obis'))
+    assert [leitor.valor('obis_id', i) for i in range(leitor.linhas)] == ids
+
+
+def test_coordenada_zero_nao_e_descartada(coletor, tmp_path):
+    caminho = criar_archive(tmp_path / 'equador.zip', {
+        'occurrence.txt': 'gbifID\tspecies\tdecimalLatitude\tdecimalLongitude\n'
+                          '7001\tCaretta caretta\t0.0\t-38.5\n'   # sobre o equador, dentro da ZEE
+                          '7002\tCaretta caretta\t-1.5\t-38.5\n'
+                          '7003\tCaretta caretta\t\t-38.5\n'
+    })
+    dados = coletor.ingerir_dwca(caminho, 'gbif')
+
+    with open(dados['especies'][0]['arquivo_registros'], 'r', encoding='utf-8') as f:
+        registros = [json.loads(linha) for linha in f]
+    assert [(r['gbif_id'], r['latitude']) for r in registros] == [(7001, 0.0), (7002, -1.5)]
+
+    for normalizar in (coletor.normalizar_registro_obis, coletor.normalizar_registro_gbif):
+        assert normalizar({'decimalLatitude': 0.0, 'decimalLongitude': 0.0})['longitude'] == 0.0
+        assert normalizar({'decimalLatitude': None, 'decimalLongitude': 0.0}) is None
@@ -0,0 +1,55 @@
+"""
+Testes do serviço de micro-lotes de embeddings
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from lote_embeddings import CodificadorEmLote
+
+
+def codificacao_lenta(lotes):
+    def funcao(textos):
+        lotes.append(list(textos))
+        time.sleep(0.05)
+        return np.array([[len(texto), 1.0] for texto in textos])
+    return funcao
+
+
+def test_pedidos_concorrentes_em_um_lote():
+    lotes = []
+    codificador = CodificadorEmLote(codificacao_lenta(lotes), lote_maximo=8, espera_maxima_ms=50)
+
+    with ThreadPoolExecutor(4) as executor:
+        resultados = list(executor.map(codificador.codificar, [['a'], ['bb'], ['ccc'], ['dddd', 'e']]))
+    codificador.fechar()
+
+    assert [r[:, 0].tolist() for r in resultados] == [[1], [2], [3], [4, 1]]
+    assert resultados[0].dtype == np.float32
+    assert len(lotes) < 4 and codificador.estatisticas['textos'] == 5
+
+
+def test_fechar_esvazia_a_fila_e_referencias_antigas_continuam_funcionando():
+    lotes = []
+    codificador = CodificadorEmLote(codificacao_lenta(lotes), lote_maximo=1, espera_maxima_ms=0)
+
+    # Sessões ainda com o RAG antigo, com pedidos na fila durante o fechar()
+    with ThreadPoolExecutor(6) as executor:
+        futuros = [executor.submit(codificador.codificar, [f"q{i}"]) for i in range(6)]
+        time.sleep(0.02)
+        fechamento = threading.Thread(target=codificador.fechar)
+        fechamento.start()
+        resultados = [futuro.result(timeout=5) for futuro in futuros]
+        fechamento.join(timeout=5)
+
+    assert not fechamento.is_alive()
+    assert all(r[0, 0] == 2 for r in resultados)
+
+    # Depois de fechado, codifica direto na thread de quem pediu (sem travar)
+    atrasado = codificador.codificar(['depois'])
+    assert atrasado[0, 0] == 6
+    assert codificador._thread is None
+    assert codificador.estatisticas['textos'] + 1 == len(lotes)
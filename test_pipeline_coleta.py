@@ -0,0 +1,76 @@
+"""
+Testes do pipeline busca -> normalização da coleta
+"""
+
+import threading
+import time
+
+import pytest
+
+from pipeline_coleta import PipelinePaginas, RelatorioExecucao
+
+
+def dobrar(valor):
+    return None if valor < 0 else valor * 2
+
+
+def paginas_lentas(n, buscadas, atraso=0.0):
+    """Páginas de 3 valores; a busca da página i demora `atraso` s"""
+    for i in range(n):
+        time.sleep(atraso)
+        buscadas.append(i)
+        yield [i * 10, -1, i * 10 + 1], 2 * n, {'pagina': i}
+
+
+@pytest.mark.parametrize('processos', [0, 2])
+def test_paginas_saem_na_ordem_da_busca(processos):
+    relatorio = RelatorioExecucao()
+    pipeline = PipelinePaginas(relatorio, processos=processos, paginas_em_voo=2)
+    try:
+        saida = list(pipeline.processar(paginas_lentas(6, []), dobrar))
+    finally:
+        pipeline.fechar()
+
+    assert [cursor for _, _, _, cursor in saida] == [{'pagina': i} for i in range(6)]
+    assert [registros for registros, _, _, _ in saida] == [[i * 20, i * 20 + 2] for i in range(6)]
+    assert all((lidos, total) == (3, 12) for _, lidos, total, _ in saida)
+    resumo = relatorio.resumo()
+    assert (resumo['busca']['registros'], resumo['normalizacao']['registros']) == (18, 12)
+
+
+def test_erro_da_busca_chega_ao_consumidor_depois_das_paginas_anteriores():
+    def paginas():
+        yield [1], 2, {'pagina': 0}
+        raise ConnectionError('falha na página 1')
+
+    pipeline = PipelinePaginas(RelatorioExecucao(), processos=0)
+    recebidas = []
+    with pytest.raises(ConnectionError, match='página 1'):
+        for registros, _, _, cursor in pipeline.processar(paginas(), dobrar):
+            recebidas.append((registros, cursor))
+
+    assert recebidas == [([2], {'pagina': 0})]
+
+
+def test_erro_da_normalizacao_chega_ao_consumidor():
+    def normalizar(valor):
+        raise ValueError(f"registro inválido: {valor}")
+
+    pipeline = PipelinePaginas(RelatorioExecucao(), processos=0)
+    with pytest.raises(ValueError, match='registro inválido'):
+        list(pipeline.processar(paginas_lentas(3, []), normalizar))
+
+
+def test_fechar_o_gerador_interrompe_a_busca():
+    buscadas = []
+    pipeline = PipelinePaginas(RelatorioExecucao(), processos=0, paginas_em_voo=2)
+    threads = threading.active_count()
+
+    gerador = pipeline.processar(paginas_lentas(1000, buscadas, atraso=0.001), dobrar)
+    next(gerador)
+    time.sleep(0.1)  # a busca enche a fila e espera o consumidor
+    gerador.close()
+
+    # 1 entregue + até 2 na fila + 1 esperando vaga (+ 1 em curso no cancelamento)
+    assert len(buscadas) <= 5
+    assert threading.active_count() == threads
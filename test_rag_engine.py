@@ -0,0 +1,182 @@
+"""
+Testes do índice do RAG (atualização incremental e buscas) com um
+codificador determinístico no lugar do SentenceTransformer
+"""
+
+import hashlib
+
+import faiss
+import numpy as np
+import pytest
+
+from rag_engine import OceanRAG
+
+DIMENSAO = 32
+
+
+def codificar(textos):
+    """Vetor unitário pseudoaleatório por texto (mesmo texto => mesmo vetor)"""
+    vetores = []
+    for texto in textos:
+        semente = int.from_bytes(hashlib.blake2b(texto.encode('utf-8'), digest_size=8).digest(), 'little')
+        vetor = np.random.default_rng(semente).standard_normal(DIMENSAO)
+        vetores.append(vetor / np.linalg.norm(vetor))
+    return np.array(vetores, dtype=np.float32)
+
+
+@pytest.fixture
+def corpus():
+    """chave do registro -> texto do chunk; os testes alteram entre atualizações"""
+    return {f"especie-{i}": f"Registro {i} da espécie marinha {i * 7}" for i in range(20)}
+
+
+@pytest.fixture
+def rag(tmp_path, monkeypatch, corpus):
+    monkeypatch.chdir(tmp_path)  # índice, metadados e .cache/embeddings são relativos
+    return novo_rag(monkeypatch, corpus)
+
+
+def novo_rag(monkeypatch, corpus, tipo_indice='auto'):
+    rag = OceanRAG(tipo_indice=tipo_indice)
+
+    def criar_chunks(documentos):
+        chunks = [{'arquivo': 'teste.json', 'secao': 'especies', 'chave': chave,
+                   'texto': texto, 'fonte': 'teste'} for chave, texto in corpus.items()]
+        rag._atribuir_ids(chunks)
+        return chunks
+
+    monkeypatch.setattr(rag, 'carregar_jsons', lambda: [])
+    monkeypatch.setattr(rag, 'criar_chunks', criar_chunks)
+    monkeypatch.setattr(rag, '_codificar_textos', codificar)
+    monkeypatch.setattr(rag, '_encode_queries', codificar)
+    return rag
+
+
+def ids_no_indice(rag):
+    return set(faiss.vector_to_array(rag.index.id_map).tolist())
+
+
+def primeiro(rag, texto):
+    chunk, _ = rag.buscar(texto, k=1)[0]
+    return chunk['chave'], chunk['id']
+
+
+# ============================================================================
+# ATUALIZAÇÃO INCREMENTAL
+# ============================================================================
+
+def test_atualizacao_adiciona_substitui_e_remove_com_ids_estaveis(rag, corpus, monkeypatch):
+    rag.setup(force_rebuild=True)
+    ids = {chunk['chave']: chunk['id'] for chunk in rag.chunks}
+    assert rag.index.ntotal == 20 and ids_no_indice(rag) == set(ids.values())
+
+    corpus['especie-3'] = 'Registro 3 revisado: tartaruga-verde em Abrolhos'
+    del corpus['especie-5']
+    corpus['especie-nova'] = 'Registro novo de baleia-jubarte'
+    assert rag.atualizar_indice() == {'novos': 1, 'alterados': 1, 'removidos': 1}
+
+    atuais = {chunk['chave']: chunk['id'] for chunk in rag.chunks}
+    assert rag.index.ntotal == 20
+    assert ids_no_indice(rag) == set(atuais.values())
+    assert {chave: atuais[chave] for chave in ids if chave != 'especie-5'} == \
+        {chave: id_chunk for chave, id_chunk in ids.items() if chave != 'especie-5'}
+
+    # O chunk alterado responde pelo texto novo com o mesmo ID; o removido sumiu
+    assert primeiro(rag, corpus['especie-3']) == ('especie-3', ids['especie-3'])
+    assert primeiro(rag, corpus['especie-nova'])[0] == 'especie-nova'
+    assert all(chunk['chave'] != 'especie-5'
+               for chunk, _ in rag.buscar('Registro 5 da espécie marinha 35', k=20))
+
+    # Reconstrução do zero e releitura do disco: mesmos IDs e mesmas respostas
+    resultados = rag.buscar('baleia', k=5)
+    rag.setup(force_rebuild=True)
+    assert {chunk['chave']: chunk['id'] for chunk in rag.chunks} == atuais
+    assert ids_no_indice(rag) == set(atuais.values())
+
+    relido = novo_rag(monkeypatch, corpus)
+    relido.setup()
+    assert [(c['id'], s) for c, s in relido.buscar('baleia', k=5)] == [(c['id'], s) for c, s in resultados]
+
+
+def test_ivf_pq_em_corpus_pequeno_atualiza_sem_reconstruir(tmp_path, monkeypatch, corpus):
+    monkeypatch.chdir(tmp_path)
+    rag = novo_rag(monkeypatch, corpus, tipo_indice='ivf_pq')
+    rag.setup(force_rebuild=True)
+    assert rag.quantizado  # construído como sq8: 20 vetores não treinam o PQ
+
+    construcoes = []
+    monkeypatch.setattr(rag, 'construir_indice_faiss', lambda: construcoes.append(1))
+    corpus['especie-0'] = 'Registro 0 revisado'
+    assert rag.atualizar_indice() == {'novos': 0, 'alterados': 1, 'removidos': 0}
+
+    assert construcoes == []
+    assert rag.index.ntotal == 20
+    assert primeiro(rag, corpus['especie-0'])[0] == 'especie-0'
+
+
+# ============================================================================
+# BUSCA EM LOTE
+# ============================================================================
+
+CONSULTAS = ['baleia-jubarte', 'Registro 3 da espécie marinha 21', 'BALEIA-JUBARTE  ',
+             'tartaruga', 'Registro 12', 'baleia-jubarte']
+
+
+@pytest.mark.parametrize('tipo_indice', ['flat', 'sq8'])
+def test_buscar_lote_igual_a_buscar_uma_por_vez(tmp_path, monkeypatch, corpus, tipo_indice):
+    monkeypatch.chdir(tmp_path)
+    rag = novo_rag(monkeypatch, corpus, tipo_indice=tipo_indice)
+    rag.setup(force_rebuild=True)
+    assert rag.quantizado == (tipo_indice == 'sq8')
+
+    lote = rag.buscar_lote(CONSULTAS, k=4)
+    rag.invalidar_caches()
+    uma_por_vez = [rag.buscar(query, k=4) for query in CONSULTAS]
+
+    assert [[(c['id'], s) for c, s in r] for r in lote] == [[(c['id'], s) for c, s in r] for r in uma_por_vez]
+    assert all(len(resultados) == 4 for resultados in lote)
+
+
+def test_sessoes_concorrentes_com_micro_lotes_igual_a_buscar_lote(rag):
+    from concurrent.futures import ThreadPoolExecutor
+
+    # Uma grafia por query: com grafias diferentes, a primeira a chegar define o embedding
+    consultas = ['baleia-jubarte', 'Registro 3 da espécie marinha 21', 'tartaruga', 'Registro 12']
+    rag.setup(force_rebuild=True)
+    esperado = [[(c['id'], s) for c, s in r] for r in rag.buscar_lote(consultas, k=3)]
+    rag.invalidar_caches()
+
+    rag.ativar_micro_lotes(lote_maximo=8, espera_maxima_ms=50)
+    try:
+        with ThreadPoolExecutor(len(consultas)) as executor:
+            respostas = list(executor.map(lambda query: rag.buscar(query, k=3), consultas))
+    finally:
+        rag.codificador.fechar()
+
+    assert [[(c['id'], s) for c, s in r] for r in respostas] == esperado
+    assert rag.codificador.estatisticas['textos'] == len(consultas)
+    assert rag.codificador.estatisticas['lotes'] < len(consultas)
+
+
+# ============================================================================
+# CACHE DE RESULTADOS
+# ============================================================================
+
+def test_busca_em_andamento_nao_guarda_resultados_de_indice_trocado(rag, monkeypatch):
+    rag.setup(force_rebuild=True)
+    original = rag._embeddings_queries
+
+    def recarregado_no_meio(*args):
+        vetores = original(*args)
+        rag.invalidar_caches()  # outra sessão recarregou o índice (recarregar_se_alterado)
+        return vetores
+
+    monkeypatch.setattr(rag, '_embeddings_queries', recarregado_no_meio)
+    assert rag.buscar('baleia', k=3)
+    assert len(rag.cache_resultados) == 0
+
+    monkeypatch.setattr(rag, '_embeddings_queries', original)
+    rag.buscar('baleia', k=3)
+    rag.buscar('  Baleia', k=3)
+    assert len(rag.cache_resultados) == 1
+    assert rag.cache_resultados.estatisticas['hits'] == 1
@@ -0,0 +1,232 @@
+"""
+Testes do transporte HTTP: cache com revalidação condicional,
+Retry-After, backoff, limitador de taxa e sessões por host
+"""
+
+import gzip
+import json
+import os
+import random
+import sqlite3
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+from transporte_http import CacheHTTP, LimitadorTaxa, PoolSessoes, atraso_backoff, ler_retry_after
+
+
+# ============================================================================
+# CACHE DE RESPOSTAS
+# ============================================================================
+
+def test_chave_independe_da_ordem_dos_parametros():
+    assert CacheHTTP.chave('https://x/a', {'b': 1, 'a': 2}) == CacheHTTP.chave('https://x/a', {'a': 2, 'b': 1})
+    assert CacheHTTP.chave('https://x/a', {'a': 1}) != CacheHTTP.chave('https://x/a', {'a': 2})
+
+
+def test_guardar_obter_e_ttl(tmp_path):
+    cache = CacheHTTP(str(tmp_path / 'cache.sqlite'), ttl_por_host={'x': 60}, ttl_padrao=0)
+    cache.guardar('k', 'https://x/a', b'{"ok": 1}', etag='"v1"', last_modified='Mon, 01 Jan 2024 00:00:00 GMT')
+
+    entrada = cache.obter('k')
+    assert entrada['corpo'] == b'{"ok": 1}'
+    assert cache.fresca(entrada)
+    assert CacheHTTP.cabecalhos_condicionais(entrada) == {
+        'If-None-Match': '"v1"',
+        'If-Modified-Since': 'Mon, 01 Jan 2024 00:00:00 GMT'
+    }
+
+    cache.guardar('y', 'https://y/a', b'{}')
+    assert not cache.fresca(cache.obter('y'))  # host sem TTL configurado: ttl_padrao
+    assert cache.obter('inexistente') is None
+    cache.fechar()
+
+
+def test_despejo_lru(tmp_path):
+    corpo = os.urandom(1000)  # incompressível: ~1 KB no cache
+    cache = CacheHTTP(str(tmp_path / 'cache.sqlite'), tamanho_max=4400)
+    for chave in ('a', 'b', 'c', 'd'):
+        cache.guardar(chave, 'https://x/' + chave, corpo)
+        time.sleep(0.01)
+    cache.obter('a')  # 'b' passa a ser a menos usada
+    cache.guardar('e', 'https://x/e', corpo)
+
+    assert cache.obter('b') is None
+    assert all(cache.obter(chave) is not None for chave in ('a', 'c', 'd', 'e'))
+    assert cache.estatisticas['despejados'] == 1
+    cache.fechar()
+
+
+def test_leitura_nao_escreve_e_total_sem_varrer_a_tabela(tmp_path):
+    caminho = str(tmp_path / 'cache.sqlite')
+    cache = CacheHTTP(caminho, tamanho_max=4400)
+    comandos = []
+    cache._conexao.set_trace_callback(comandos.append)
+
+    corpo = os.urandom(1000)
+    for chave in ('a', 'b', 'c'):
+        cache.guardar(chave, 'https://x/' + chave, corpo)
+    cache.guardar('a', 'https://x/a', os.urandom(500))  # substituição: total ajustado, não somado de novo
+    assert not any('SUM(' in comando for comando in comandos)
+    assert cache._total == cache._somar_tamanhos()
+
+    comandos.clear()
+    for _ in range(5):
+        cache.obter('b')
+    assert not any(comando.lstrip().upper().startswith(('UPDATE', 'INSERT', 'DELETE', 'COMMIT'))
+                   for comando in comandos)
+
+    # O acesso em memória vale para o LRU e vai para o disco ao fechar
+    cache.fechar()
+    conexao = sqlite3.connect(caminho)
+    ordem = [chave for chave, in conexao.execute("SELECT chave FROM respostas ORDER BY ultimo_acesso")]
+    conexao.close()
+    assert ordem == ['c', 'a', 'b']
+
+
+def test_revalidacao_com_etag_e_304(coletor, servidor_stub):
+    versao = {'etag': '"v1"', 'corpo': {'total': 7}}
+
+    def rota(params, cabecalhos):
+        if cabecalhos.get('If-None-Match') == versao['etag']:
+            return 304, None, {'ETag': versao['etag']}
+        return 200, versao['corpo'], {'ETag': versao['etag']}
+
+    servidor_stub.rotas['/v3/occurrence'] = rota
+    url = servidor_stub.url + '/v3/occurrence'
+    params = {'scientificname': 'Chelonia mydas'}
+
+    assert coletor.fazer_requisicao(url, params) == {'total': 7}
+    assert 'If-None-Match' not in servidor_stub.requisicoes[-1][2]
+
+    # Dentro do TTL: servido do disco, sem requisição
+    assert coletor.fazer_requisicao(url, params) == {'total': 7}
+    assert servidor_stub.contar('/v3/occurrence') == 1
+
+    # TTL vencido: revalida com If-None-Match; 304 reaproveita o corpo
+    cache = coletor.obter_cache_http()
+    cache.ttl_padrao = 0
+    assert coletor.fazer_requisicao(url, params) == {'total': 7}
+    assert servidor_stub.requisicoes[-1][2].get('If-None-Match') == '"v1"'
+
+    # Conteúdo mudou no servidor: 200 com o corpo novo substitui a entrada
+    versao.update(etag='"v2"', corpo={'total': 8})
+    assert coletor.fazer_requisicao(url, params) == {'total': 8}
+
+    assert cache.estatisticas['hits'] == 1
+    assert cache.estatisticas['revalidados'] == 1
+    assert cache.estatisticas['misses'] == 2
+
+
+# ============================================================================
+# LIMITADOR DE TAXA
+# ============================================================================
+
+def test_ler_retry_after():
+    assert ler_retry_after(None) is None
+    assert ler_retry_after('') is None
+    assert ler_retry_after('7') == 7.0
+    assert ler_retry_after('-3') == 0.0
+    assert ler_retry_after('amanhã') is None
+
+    futuro = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=30), usegmt=True)
+    assert 25 <= ler_retry_after(futuro) <= 30
+    passado = format_datetime(datetime.now(timezone.utc) - timedelta(hours=1), usegmt=True)
+    assert ler_retry_after(passado) == 0.0
+
+
+def test_atraso_backoff_com_jitter_limitado():
+    random.seed(0)
+    for tentativa in range(10):
+        limite = min(60.0, 1.0 * 2 ** tentativa)
+        atrasos = [atraso_backoff(tentativa) for _ in range(200)]
+        assert all(0 <= atraso <= limite for atraso in atrasos)
+    assert len({round(atraso_backoff(3), 6) for _ in range(20)}) > 1  # jitter
+
+
+def test_limitador_respeita_a_taxa_do_host():
+    limitador = LimitadorTaxa(taxas={'lento': (20.0, 2)}, padrao=(1000.0, 1000))
+    inicio = time.perf_counter()
+    for _ in range(6):
+        limitador.aguardar('http://lento/a')
+    # 2 de rajada + 4 a 20 req/s
+    assert time.perf_counter() - inicio >= 0.18
+    assert limitador.estatisticas['esperas'] >= 4
+
+    inicio = time.perf_counter()
+    for _ in range(6):
+        limitador.aguardar('http://rapido/a')  # outro host: balde próprio
+    assert time.perf_counter() - inicio < 0.05
+
+
+def test_limitador_pausa_o_host_e_reduz_a_taxa():
+    limitador = LimitadorTaxa(taxas={'h': (100.0, 1)})
+    limitador.aguardar('http://h/a')
+
+    assert limitador.throttle('http://h/a', 429, 0.2, 0) == 0.2
+    balde = limitador._balde('http://h/a')
+    assert balde.taxa == 50.0
+
+    inicio = time.perf_counter()
+    limitador.aguardar('http://h/b')
+    assert time.perf_counter() - inicio >= 0.19
+
+    limitador.throttle('http://h/a', 503, None, 0)  # sem Retry-After: backoff
+    assert balde.taxa == 25.0
+    limitador.sucesso('http://h/a')
+    assert balde.taxa == 30.0
+    assert limitador.estatisticas['http_429'] == 1
+    assert limitador.estatisticas['http_503'] == 1
+    assert limitador.estatisticas['retry_after'] == 1
+
+
+def test_requisicao_espera_retry_after_e_repete(coletor, servidor_stub):
+    respostas = [(429, {}, {'Retry-After': '0.1'}), (503, {}), (200, {'ok': True})]
+    servidor_stub.rotas['/api'] = lambda params, cabecalhos: respostas.pop(0)
+
+    assert coletor.fazer_requisicao(servidor_stub.url + '/api') == {'ok': True}
+    assert servidor_stub.contar('/api') == 3
+    estatisticas = coletor.limitador.estatisticas
+    assert (estatisticas['http_429'], estatisticas['http_503'], estatisticas['retry_after']) == (1, 1, 1)
+    assert estatisticas['retentativas'] == 2
+
+
+# ============================================================================
+# SESSÕES POR HOST
+# ============================================================================
+
+def test_sessoes_por_host_reaproveitam_conexoes_e_negociam_gzip(servidor_stub):
+    corpo = json.dumps({'results': [{'id': i, 'especie': 'Chelonia mydas'} for i in range(200)]}).encode('utf-8')
+
+    def rota(params, cabecalhos):
+        if 'gzip' in cabecalhos.get('Accept-Encoding', ''):
+            return 200, gzip.compress(corpo), {'Content-Encoding': 'gzip'}
+        return 200, corpo
+
+    servidor_stub.rotas['/api'] = rota
+    porta = servidor_stub.url.rsplit(':', 1)[1]
+    url_a = f"http://127.0.0.1:{porta}/api"
+    url_b = f"http://localhost:{porta}/api"  # mesmo servidor, outro host para o pool
+
+    sessoes = PoolSessoes({'User-Agent': 'teste'}, tamanhos={f"127.0.0.1:{porta}": 4})
+    for _ in range(3):
+        assert len(sessoes.get(url_a, timeout=5).json()['results']) == 200
+    assert sessoes.get(url_b, timeout=5).json()['results'][0]['especie'] == 'Chelonia mydas'
+
+    assert sessoes.sessao(url_a) is sessoes.sessao(url_a + '?x=1')
+    assert sessoes.sessao(url_a) is not sessoes.sessao(url_b)
+    assert all('gzip' in cabecalhos['Accept-Encoding'] for _, _, cabecalhos in servidor_stub.requisicoes)
+    assert all(cabecalhos['User-Agent'] == 'teste' for _, _, cabecalhos in servidor_stub.requisicoes)
+
+    estatisticas = sessoes.estatisticas()
+    assert estatisticas['requisicoes'] == 4
+    assert estatisticas['conexoes'] == 2  # uma por host, mantida entre as requisições
+    assert estatisticas['reusos'] == 2
+    assert estatisticas['bytes_conteudo'] == 4 * len(corpo)
+    assert estatisticas['bytes_rede'] == 4 * len(gzip.compress(corpo))
+    assert estatisticas['bytes_rede'] < estatisticas['bytes_conteudo'] / 5
+
+    # Contadores de outro processo (shard) somam aos locais
+    sessoes.acumular({'requisicoes': 10, 'bytes_rede': 1})
+    assert sessoes.estatisticas()['requisicoes'] == 14
+    sessoes.fechar()
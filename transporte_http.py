@@ -0,0 +1,469 @@
+"""
+Transporte HTTP do Coletor da Amazônia Azul
+Cache persistente de respostas com revalidação condicional (ETag/Last-Modified)
+Limitador de taxa por host (token bucket) com backoff adaptativo
+Sessões HTTP por host com keep-alive e compressão
+"""
+
+import hashlib
+import os
+import random
+import sqlite3
+import threading
+import time
+import zlib
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlencode, urlparse, urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING
+
+
+# ============================================================================
+# CONFIGURAÇÕES
+# ============================================================================
+
+CACHE_HTTP_ARQUIVO = '.cache/http_cache.sqlite'
+CACHE_HTTP_TAMANHO_MAX = 512 * 1024 * 1024  # bytes (comprimidos) antes de despejar por LRU
+
+# Tempo (segundos) em que uma resposta é servida sem consultar o servidor
+# Depois disso ela é revalidada com If-None-Match / If-Modified-Since
+CACHE_TTL_POR_HOST = {
+    'api.obis.org': 24 * 3600,
+    'api.gbif.org': 12 * 3600,
+    'api.worldbank.org': 7 * 24 * 3600,
+    'dados.gov.br': 24 * 3600
+}
+CACHE_TTL_PADRAO = 6 * 3600
+
+# Taxa máxima por host: (requisições por segundo, rajada)
+# A taxa efetiva cai pela metade a cada 429/503 e volta a subir aos poucos
+TAXA_POR_HOST = {
+    'api.obis.org': (5.0, 5),
+    'api.gbif.org': (10.0, 10),
+    'api.worldbank.org': (10.0, 10)
+}
+TAXA_PADRAO = (2.0, 2)
+TAXA_MINIMA = 0.2          # piso da taxa adaptativa (req/s)
+RECUPERACAO_TAXA = 0.05    # fração da taxa máxima recuperada a cada sucesso
+
+# Backoff exponencial com jitter ("full jitter") entre tentativas
+BACKOFF_BASE = 1.0   # segundos
+BACKOFF_MAX = 60.0
+
+
+# ============================================================================
+# CACHE DE RESPOSTAS
+# ============================================================================
+
+class CacheHTTP:
+    """
+    Cache em disco (SQLite) de respostas HTTP, chaveado por URL + parâmetros
+    Seguro para uso entre threads; despeja as entradas menos usadas (LRU)
+    quando o tamanho total passa de tamanho_max
+    Leituras não escrevem no disco: os acessos ficam em memória e são
+    gravados junto com a próxima escrita (guardar, renovar ou fechar)
+    """
+
+    def __init__(self, caminho=CACHE_HTTP_ARQUIVO, tamanho_max=CACHE_HTTP_TAMANHO_MAX,
+                 ttl_por_host=None, ttl_padrao=CACHE_TTL_PADRAO):
+        self.caminho = caminho
+        self.tamanho_max = tamanho_max
+        self.ttl_por_host = CACHE_TTL_POR_HOST if ttl_por_host is None else ttl_por_host
+        self.ttl_padrao = ttl_padrao
+        self.estatisticas = {'hits': 0, 'revalidados': 0, 'misses': 0, 'despejados': 0}
+        self._lock = threading.Lock()
+        self._acessos = {}  # chave -> último acesso ainda não gravado
+
+        if os.path.dirname(caminho):
+            os.makedirs(os.path.dirname(caminho), exist_ok=True)
+
+        # timeout: vários processos (shards) podem gravar no mesmo arquivo
+        self._conexao = sqlite3.connect(caminho, check_same_thread=False, timeout=30)
+        self._conexao.execute("""
+            CREATE TABLE IF NOT EXISTS respostas (
+                chave TEXT PRIMARY KEY,
+                url TEXT,
+                corpo BLOB,
+                etag TEXT,
+                last_modified TEXT,
+                armazenado_em REAL,
+                ultimo_acesso REAL,
+                tamanho INTEGER
+            )
+        """)
+        self._conexao.execute(
+            "CREATE INDEX IF NOT EXISTS idx_ultimo_acesso ON respostas (ultimo_acesso)"
+        )
+        self._conexao.commit()
+        self._total = self._somar_tamanhos()  # bytes, mantido a cada inserção/remoção
+
+    @staticmethod
+    def chave(url, params=None):
+        """Chave estável para URL + parâmetros (ordem dos parâmetros não importa)"""
+        consulta = urlencode(sorted((params or {}).items()), doseq=True)
+        return hashlib.sha256(f"{url}?{consulta}".encode('utf-8')).hexdigest()
+
+    def ttl(self, url):
+        """TTL configurado para o host da URL"""
+        return self.ttl_por_host.get(urlparse(url).netloc, self.ttl_padrao)
+
+    def obter(self, chave):
+        """
+        Retorna a entrada do cache (dict) ou None
+        O último acesso (LRU) fica em memória até a próxima escrita
+        """
+        with self._lock:
+            linha = self._conexao.execute(
+                "SELECT url, corpo, etag, last_modified, armazenado_em FROM respostas WHERE chave = ?",
+                (chave,)
+            ).fetchone()
+
+            if linha is None:
+                return None
+
+            self._acessos[chave] = time.time()
+
+        url, corpo, etag, last_modified, armazenado_em = linha
+        return {
+            'url': url,
+            'corpo': zlib.decompress(corpo),
+            'etag': etag,
+            'last_modified': last_modified,
+            'armazenado_em': armazenado_em
+        }
+
+    def fresca(self, entrada):
+        """True se a entrada ainda está dentro do TTL do host"""
+        return time.time() - entrada['armazenado_em'] < self.ttl(entrada['url'])
+
+    @staticmethod
+    def cabecalhos_condicionais(entrada):
+        """Cabeçalhos para revalidar a entrada no servidor"""
+        cabecalhos = {}
+        if entrada.get('etag'):
+            cabecalhos['If-None-Match'] = entrada['etag']
+        if entrada.get('last_modified'):
+            cabecalhos['If-Modified-Since'] = entrada['last_modified']
+        return cabecalhos
+
+    def guardar(self, chave, url, corpo, etag=None, last_modified=None):
+        """Armazena (ou substitui) uma resposta e aplica o limite de tamanho"""
+        comprimido = zlib.compress(corpo)
+
+        # Respostas enormes expulsariam todo o resto do cache
+        if len(comprimido) > self.tamanho_max // 4:
+            return
+
+        agora = time.time()
+        with self._lock:
+            self._gravar_acessos()
+            anterior = self._conexao.execute(
+                "SELECT tamanho FROM respostas WHERE chave = ?", (chave,)
+            ).fetchone()
+            self._conexao.execute(
+                "INSERT OR REPLACE INTO respostas VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (chave, url, comprimido, etag, last_modified, agora, agora, len(comprimido))
+            )
+            self._acessos.pop(chave, None)
+            self._total += len(comprimido) - (anterior[0] if anterior else 0)
+            self._despejar()
+            self._conexao.commit()
+
+    def renovar(self, chave):
+        """Marca a entrada como recém-validada (resposta 304 do servidor)"""
+        agora = time.time()
+        with self._lock:
+            self._gravar_acessos()
+            self._acessos.pop(chave, None)
+            self._conexao.execute(
+                "UPDATE respostas SET armazenado_em = ?, ultimo_acesso = ? WHERE chave = ?",
+                (agora, agora, chave)
+            )
+            self._conexao.commit()
+
+    def _somar_tamanhos(self):
+        return self._conexao.execute("SELECT COALESCE(SUM(tamanho), 0) FROM respostas").fetchone()[0]
+
+    def _gravar_acessos(self):
+        """Leva ao disco os acessos acumulados em memória (chamar com o lock)"""
+        if self._acessos:
+            self._conexao.executemany(
+                "UPDATE respostas SET ultimo_acesso = ? WHERE chave = ?",
+                [(instante, chave) for chave, instante in self._acessos.items()]
+            )
+            self._acessos.clear()
+
+    def _despejar(self):
+        """Remove as entradas menos usadas até caber em tamanho_max (chamar com o lock)"""
+        if self._total <= self.tamanho_max:
+            return
+
+        # Outros processos (shards) gravam no mesmo arquivo: confere o total real antes de despejar
+        total = self._total = self._somar_tamanhos()
+        if total <= self.tamanho_max:
+            return
+
+        cursor = self._conexao.execute(
+            "SELECT chave, tamanho FROM respostas ORDER BY ultimo_acesso ASC"
+        )
+        remover = []
+        for chave, tamanho in cursor:
+            if total <= self.tamanho_max:
+                break
+            remover.append((chave,))
+            total -= tamanho
+
+        self._conexao.executemany("DELETE FROM respostas WHERE chave = ?", remover)
+        self._total = total
+        self.estatisticas['despejados'] += len(remover)
+
+    def registrar(self, evento, quantidade=1):
+        """Conta um evento: 'hits', 'revalidados' ou 'misses'"""
+        with self._lock:
+            self.estatisticas[evento] += quantidade
+
+    def sincronizar(self):
+        """Grava os acessos pendentes (fim de uma coleta ou de um shard)"""
+        with self._lock:
+            self._gravar_acessos()
+            self._conexao.commit()
+
+    def fechar(self):
+        with self._lock:
+            self._gravar_acessos()
+            self._conexao.commit()
+            self._conexao.close()
+
+
+# ============================================================================
+# LIMITADOR DE TAXA
+# ============================================================================
+
+def ler_retry_after(valor):
+    """Converte o cabeçalho Retry-After (segundos ou data HTTP) em segundos"""
+    if not valor:
+        return None
+    try:
+        return max(0.0, float(valor))
+    except ValueError:
+        pass
+    try:
+        data = parsedate_to_datetime(valor)
+        return max(0.0, (data - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+def atraso_backoff(tentativa, base=BACKOFF_BASE, maximo=BACKOFF_MAX):
+    """Espera antes da próxima tentativa: aleatória em [0, base * 2^tentativa]"""
+    return random.uniform(0, min(maximo, base * (2 ** tentativa)))
+
+
+class BaldeTokens:
+    """
+    Token bucket de um host: libera até `capacidade` requisições de uma vez
+    e depois `taxa` requisições por segundo
+    """
+
+    def __init__(self, taxa, capacidade):
+        self.taxa_maxima = taxa
+        self.taxa = taxa
+        self.capacidade = capacidade
+        self.tokens = float(capacidade)
+        self.atualizado_em = time.monotonic()
+        self.bloqueado_ate = 0.0
+        self._lock = threading.Lock()
+
+    def adquirir(self):
+        """Bloqueia até haver um token; retorna os segundos esperados"""
+        esperado = 0.0
+        while True:
+            with self._lock:
+                agora = time.monotonic()
+                self.tokens = min(self.capacidade, self.tokens + (agora - self.atualizado_em) * self.taxa)
+                self.atualizado_em = agora
+
+                if agora < self.bloqueado_ate:
+                    espera = self.bloqueado_ate - agora
+                elif self.tokens >= 1:
+                    self.tokens -= 1
+                    return esperado
+                else:
+                    espera = (1 - self.tokens) / self.taxa
+
+            time.sleep(espera)
+            esperado += espera
+
+    def pausar(self, segundos):
+        """Suspende o host inteiro (ex.: Retry-After) e reduz a taxa pela metade"""
+        with self._lock:
+            self.bloqueado_ate = max(self.bloqueado_ate, time.monotonic() + segundos)
+            self.taxa = max(TAXA_MINIMA, self.taxa / 2)
+            self.tokens = 0.0
+
+    def recuperar(self):
+        """Sucesso: aumenta a taxa em direção à taxa máxima do host"""
+        with self._lock:
+            self.taxa = min(self.taxa_maxima, self.taxa + self.taxa_maxima * RECUPERACAO_TAXA)
+
+
+class LimitadorTaxa:
+    """
+    Limitador compartilhado por todas as threads do coletor, um balde por host
+    Conta esperas e eventos de throttling para o resumo da execução
+    """
+
+    def __init__(self, taxas=None, padrao=TAXA_PADRAO):
+        self.taxas = TAXA_POR_HOST if taxas is None else taxas
+        self.padrao = padrao
+        self.estatisticas = {
+            'http_429': 0,
+            'http_503': 0,
+            'retry_after': 0,
+            'retentativas': 0,
+            'esperas': 0,
+            'segundos_espera': 0.0
+        }
+        self._baldes = {}
+        self._lock = threading.Lock()
+
+    def _balde(self, url):
+        host = urlparse(url).netloc
+        with self._lock:
+            if host not in self._baldes:
+                taxa, capacidade = self.taxas.get(host, self.padrao)
+                self._baldes[host] = BaldeTokens(taxa, capacidade)
+            return self._baldes[host]
+
+    def aguardar(self, url):
+        """Espera a vez do host da URL antes de enviar a requisição"""
+        esperado = self._balde(url).adquirir()
+        if esperado > 0:
+            self.registrar('esperas')
+            self.registrar('segundos_espera', esperado)
+
+    def sucesso(self, url):
+        self._balde(url).recuperar()
+
+    def throttle(self, url, status, retry_after, tentativa):
+        """
+        Resposta 429/503: pausa o host pelo Retry-After (ou backoff com jitter)
+        Retorna os segundos de pausa aplicados
+        """
+        self.registrar(f"http_{status}")
+        if retry_after is not None:
+            self.registrar('retry_after')
+            pausa = retry_after
+        else:
+            pausa = atraso_backoff(tentativa)
+        self._balde(url).pausar(pausa)
+        return pausa
+
+    def registrar(self, evento, quantidade=1):
+        with self._lock:
+            self.estatisticas[evento] += quantidade
+
+
+# ============================================================================
+# SESSÕES HTTP (KEEP-ALIVE)
+# ============================================================================
+
+class PoolSessoes:
+    """
+    Uma requests.Session por host, reaproveitando conexões TCP/TLS entre
+    requisições; o pool de cada host tem o tamanho do limite de conexões
+    simultâneas daquele host, então pode ser compartilhado entre threads
+    Negocia gzip/deflate (e brotli/zstd se os pacotes estiverem instalados)
+    replay: URL base de um servidor de replay (bancada_coleta.py); as
+    requisições vão para <replay>/<host>/<caminho>, mas pools, limites e
+    estatísticas continuam separados pelo host original
+    """
+
+    def __init__(self, cabecalhos, tamanhos=None, tamanho_padrao=2, replay=None):
+        self.cabecalhos = dict(cabecalhos)
+        self.cabecalhos['Accept-Encoding'] = ACCEPT_ENCODING
+        self.tamanhos = tamanhos or {}
+        self.tamanho_padrao = tamanho_padrao
+        self.replay = replay
+        self.bytes_rede = 0
+        self.bytes_conteudo = 0
+        self._externas = {}
+        self._sessoes = {}
+        self._lock = threading.Lock()
+
+    def destino(self, url):
+        """URL efetivamente requisitada (reescrita para o servidor de replay, se houver)"""
+        if not self.replay:
+            return url
+        partes = urlsplit(url)  # urlparse cortaria o ';a;b' dos lotes do World Bank
+        consulta = f"?{partes.query}" if partes.query else ''
+        return f"{self.replay.rstrip('/')}/{partes.netloc}{partes.path}{consulta}"
+
+    def origem(self, url):
+        """Inverso de destino(): a URL da API real por trás de uma URL de replay"""
+        prefixo = self.replay.rstrip('/') + '/' if self.replay else None
+        if not prefixo or not url.startswith(prefixo):
+            return url
+        return 'https://' + url[len(prefixo):]
+
+    def sessao(self, url):
+        """Sessão do host da URL (criada na primeira requisição)"""
+        partes = urlparse(url)
+        with self._lock:
+            if partes.netloc not in self._sessoes:
+                tamanho = self.tamanhos.get(partes.netloc, self.tamanho_padrao)
+                adaptador = HTTPAdapter(pool_connections=1, pool_maxsize=tamanho, pool_block=True)
+                sessao = requests.Session()
+                sessao.headers.update(self.cabecalhos)
+                montagem = urlparse(self.destino(url))
+                sessao.mount(f"{montagem.scheme}://{montagem.netloc}", adaptador)
+                self._sessoes[partes.netloc] = sessao
+            return self._sessoes[partes.netloc]
+
+    def get(self, url, **kwargs):
+        """GET pela sessão do host; lê o corpo e contabiliza os bytes trafegados"""
+        response = self.sessao(url).get(self.destino(url), **kwargs)
+        conteudo = response.content
+        with self._lock:
+            self.bytes_rede += response.raw.tell() if response.raw else len(conteudo)
+            self.bytes_conteudo += len(conteudo)
+        return response
+
+    def estatisticas(self):
+        """Requisições, conexões abertas, reusos e bytes (rede x descomprimidos)"""
+        requisicoes = 0
+        conexoes = 0
+        with self._lock:
+            sessoes = list(self._sessoes.values())
+        for sessao in sessoes:
+            for adaptador in sessao.adapters.values():
+                pools = adaptador.poolmanager.pools
+                for chave in pools.keys():
+                    pool = pools[chave]
+                    requisicoes += pool.num_requests
+                    conexoes += pool.num_connections
+        estatisticas = {
+            'requisicoes': requisicoes,
+            'conexoes': conexoes,
+            'reusos': requisicoes - conexoes,
+            'bytes_rede': self.bytes_rede,
+            'bytes_conteudo': self.bytes_conteudo
+        }
+        for chave, valor in self._externas.items():
+            estatisticas[chave] += valor
+        return estatisticas
+
+    def acumular(self, estatisticas):
+        """Soma contadores de sessões de outro processo (coleta em shards)"""
+        with self._lock:
+            for chave, valor in estatisticas.items():
+                self._externas[chave] = self._externas.get(chave, 0) + valor
+
+    def fechar(self):
+        with self._lock:
+            for sessao in self._sessoes.values():
+                sessao.close()
+            self._sessoes.clear()